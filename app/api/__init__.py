@@ -1,3 +1,4 @@
 from app.api.auth import router as auth_router
+from app.api.jobs import router as jobs_router
 from app.api.playlists import router as playlists_router
 from app.api.songs import router as songs_router
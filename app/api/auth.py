@@ -1,15 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 from typing import Optional
-import json
 import os
-from app.services.auth_service import SpotifyAuthService
+from app.core.concurrency import run_blocking
+from app.api.deps import get_current_user_id
+from app.services.auth_service import SESSION_COOKIE, get_auth_service
 
 router = APIRouter()
 
-# Instantiate the SpotifyAuthService
-auth_service = SpotifyAuthService()
+# Share one SpotifyAuthService (and its client registry) across routers
+auth_service = get_auth_service()
 
 
 class AuthResponse(BaseModel):
@@ -29,18 +30,25 @@ async def login():
     return {"auth_url": auth_url}
 
 
+# Create a dependency to get the Spotify client of the session user
+def get_spotify_client(user_id: str = Depends(get_current_user_id)):
+    return auth_service.get_spotify_client(user_id=user_id)
+
+
 @router.get("/callback")
-async def callback(code: str, state: Optional[str] = None):
+async def callback(response: Response, code: str, state: Optional[str] = None):
     """
     Handle the callback from Spotify OAuth
     """
     try:
-        sp_oauth = auth_service.get_auth_manager()
-        token_info = sp_oauth.get_access_token(code)
-
-        # Save token info to cache file for future use
-        with open(".cache", "w") as f:
-            json.dump(token_info, f)
+        # Store the token under the Spotify user ID and start a session for it
+        user_id, token_info = await run_blocking(auth_service.complete_login, code)
+        response.set_cookie(
+            SESSION_COOKIE,
+            auth_service.create_session(user_id),
+            httponly=True,
+            samesite="lax",
+        )
 
         return {"message": "Authentication successful", "token_info": token_info}
 
@@ -52,17 +60,16 @@ async def callback(code: str, state: Optional[str] = None):
 
 
 @router.get("/current-user")
-async def get_current_user():
+async def get_current_user(sp=Depends(get_spotify_client)):
     """
     Get information about the current authenticated user
     """
     try:
-        sp = auth_service.get_spotify_client()
         if not sp:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
             )
-        user_info = sp.current_user()
+        user_info = await run_blocking(sp.current_user)
         return user_info
     except Exception as e:
         raise HTTPException(
@@ -72,13 +79,13 @@ async def get_current_user():
 
 
 @router.get("/logout")
-async def logout():
+async def logout(response: Response, user_id: str = Depends(get_current_user_id)):
     """
     Log out the current user by clearing the token cache
     """
     try:
-        if os.path.exists(".cache"):
-            os.remove(".cache")
+        auth_service.logout(user_id)
+        response.delete_cookie(SESSION_COOKIE)
         return {"message": "Successfully logged out"}
     except Exception as e:
         raise HTTPException(
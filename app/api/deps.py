@@ -0,0 +1,12 @@
+from fastapi import HTTPException, Request, status
+from app.services.auth_service import get_auth_service
+
+
+def get_current_user_id(request: Request) -> str:
+    """Resolve the Spotify user ID of the request from its session cookie"""
+    user_id = get_auth_service().get_session_user(request)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
+        )
+    return user_id
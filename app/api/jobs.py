@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.api.deps import get_current_user_id
+from app.core.jobs import get_job_manager
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(get_current_user_id)):
+    """
+    Get the stage, progress and result of a playlist generation job
+    """
+    job = get_job_manager().get(job_id)
+    # Other users' jobs are reported as missing
+    if not job or job["owner"] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
@@ -1,47 +1,151 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Dict, Optional
-from app.services.auth_service import SpotifyAuthService
+from typing import Callable, List, Dict, Optional
+from app.core.jobs import get_job_manager, scaled_progress
+from app.api.deps import get_current_user_id
+from app.services.auth_service import get_auth_service
+from app.services.genre_service import GenreService
+from app.services.language_service import LanguageService
 from app.services.playlist_service import PlaylistService
 from app.services.song_service import SongService
 
 router = APIRouter()
 
-# Instantiate the SpotifyAuthService
-auth_service = SpotifyAuthService()
+# Job percent reached once liked songs are fetched, and once they are grouped;
+# writing the playlists takes the job the rest of the way to 100
+FETCHED_PERCENT = 50
+GROUPED_PERCENT = 60
 
+# Share one SpotifyAuthService (and its client registry) across routers
+auth_service = get_auth_service()
 
-# Create a dependency to get the Spotify client
-def get_spotify_client():
-    return auth_service.get_spotify_client()
+
+# Create a dependency to get the Spotify client of the session user
+def get_spotify_client(user_id: str = Depends(get_current_user_id)):
+    return auth_service.get_spotify_client(user_id=user_id)
 
 
 # Instantiate the SongService and PlaylistService using the Spotify client
-def get_song_service(spotify_client=Depends(get_spotify_client)):
-    return SongService(spotify_client)
+def get_song_service(
+    spotify_client=Depends(get_spotify_client),
+    user_id: str = Depends(get_current_user_id),
+):
+    return SongService(spotify_client, user_id=user_id)
 
 
 def get_playlist_service(spotify_client=Depends(get_spotify_client)):
     return PlaylistService(spotify_client)
 
 
-@router.post("/genres", status_code=status.HTTP_201_CREATED)
+def run_genre_pipeline(
+    progress: Callable,
+    song_service: SongService,
+    playlist_service: PlaylistService,
+    streaming: bool = False,
+) -> Dict:
+    """Fetch liked songs, group them by genre and create the playlists.
+
+    With ``streaming=True`` liked songs are classified page by page as they
+    are fetched instead of being loaded into memory first.
+    """
+    if streaming:
+        progress("streaming", 0)
+        genre_service = GenreService(
+            data_dir=song_service.base_data_dir, user_id=song_service.user_id
+        )
+        genre_playlists = genre_service.organize_by_broad_genre(
+            song_service.iter_song_data(
+                on_progress=scaled_progress(progress, "streaming", 0, GROUPED_PERCENT)
+            )
+        )
+    else:
+        # Fetch liked songs
+        progress("fetching", 0)
+        liked_songs = song_service.sync_liked_songs(
+            on_progress=scaled_progress(progress, "fetching", 0, FETCHED_PERCENT)
+        )
+
+        # Group songs by genre
+        progress("grouping", FETCHED_PERCENT)
+        genre_playlists = song_service.group_songs_by_genre(liked_songs)
+
+    # Create genre playlists
+    progress("creating_playlists", GROUPED_PERCENT)
+    result = playlist_service.create_genre_playlists(
+        genre_playlists,
+        parallel=True,
+        on_progress=scaled_progress(
+            progress, "creating_playlists", GROUPED_PERCENT, 100
+        ),
+    )
+    return {"message": "Genre playlists created successfully", "playlists": result}
+
+
+def run_language_pipeline(
+    progress: Callable,
+    song_service: SongService,
+    playlist_service: PlaylistService,
+    streaming: bool = False,
+) -> Dict:
+    """Fetch liked songs, group them by language and create the playlists.
+
+    With ``streaming=True`` liked songs are classified page by page as they
+    are fetched instead of being loaded into memory first.
+    """
+    if streaming:
+        progress("streaming", 0)
+        language_service = LanguageService(
+            data_dir=song_service.base_data_dir, user_id=song_service.user_id
+        )
+        language_playlists = language_service.detect_languages(
+            song_service.iter_song_data(
+                on_progress=scaled_progress(progress, "streaming", 0, GROUPED_PERCENT)
+            )
+        )
+    else:
+        # Fetch liked songs
+        progress("fetching", 0)
+        liked_songs = song_service.sync_liked_songs(
+            on_progress=scaled_progress(progress, "fetching", 0, FETCHED_PERCENT)
+        )
+
+        # Group songs by language
+        progress("grouping", FETCHED_PERCENT)
+        language_playlists = song_service.group_songs_by_language(liked_songs)
+
+    # Create language playlists
+    progress("creating_playlists", GROUPED_PERCENT)
+    result = playlist_service.create_language_playlists(
+        language_playlists,
+        parallel=True,
+        on_progress=scaled_progress(
+            progress, "creating_playlists", GROUPED_PERCENT, 100
+        ),
+    )
+    return {
+        "message": "Language playlists created successfully",
+        "playlists": result,
+    }
+
+
+@router.post("/genres", status_code=status.HTTP_202_ACCEPTED)
 async def generate_genre_playlists(
     playlist_service: PlaylistService = Depends(get_playlist_service),
     song_service: SongService = Depends(get_song_service),
+    streaming: bool = False,
 ):
     """
-    Create playlists organized by genre from liked songs
+    Queue a job creating playlists organized by genre from liked songs
     """
     try:
-        # Fetch liked songs
-        liked_songs = song_service.fetch_liked_songs()
-
-        # Group songs by genre
-        genre_playlists = song_service.group_songs_by_genre(liked_songs)
-
-        # Create genre playlists
-        result = playlist_service.create_genre_playlists(genre_playlists)
-        return {"message": "Genre playlists created successfully", "playlists": result}
+        job = get_job_manager().submit(
+            "genres",
+            run_genre_pipeline,
+            song_service,
+            playlist_service,
+            owner=song_service.user_id,
+            streaming=streaming,
+        )
+        return {"job_id": job["id"], "status_url": f"/jobs/{job['id']}"}
 
     except Exception as e:
         raise HTTPException(
@@ -50,27 +154,25 @@ async def generate_genre_playlists(
         )
 
 
-@router.post("/languages", status_code=status.HTTP_201_CREATED)
+@router.post("/languages", status_code=status.HTTP_202_ACCEPTED)
 async def generate_language_playlists(
     playlist_service: PlaylistService = Depends(get_playlist_service),
     song_service: SongService = Depends(get_song_service),
+    streaming: bool = False,
 ):
     """
-    Create playlists organized by language from liked songs
+    Queue a job creating playlists organized by language from liked songs
     """
     try:
-        # Fetch liked songs
-        liked_songs = song_service.fetch_liked_songs()
-
-        # Group songs by language
-        language_playlists = song_service.group_songs_by_language(liked_songs)
-
-        # Create language playlists
-        result = playlist_service.create_language_playlists(language_playlists)
-        return {
-            "message": "Language playlists created successfully",
-            "playlists": result,
-        }
+        job = get_job_manager().submit(
+            "languages",
+            run_language_pipeline,
+            song_service,
+            playlist_service,
+            owner=song_service.user_id,
+            streaming=streaming,
+        )
+        return {"job_id": job["id"], "status_url": f"/jobs/{job['id']}"}
 
     except Exception as e:
         raise HTTPException(
@@ -1,23 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from typing import Any, Awaitable, Callable, List, Dict, Optional
 from pydantic import BaseModel
-from app.services.auth_service import SpotifyAuthService  # Import the auth service
-from app.services.song_service import SongService  # Import the song service
+from app.core.concurrency import run_blocking
+from app.core.library_index import (
+    InvalidCursor,
+    InvalidPageRequest,
+    get_library_index_cache,
+)
+from app.core.response_cache import etag_matches, get_response_cache
+from app.api.deps import get_current_user_id
+from app.services.auth_service import get_auth_service  # Import the auth service
+from app.services.song_service import (  # Import the song service
+    SongService,
+    get_artist_cache,
+)
 
 router = APIRouter()
 
-# Instantiate the SpotifyAuthService
-auth_service = SpotifyAuthService()
+# Most liked songs served per /liked page, matching Spotify's own page size
+MAX_LIKED_PAGE_LIMIT = 50
 
+# Share one SpotifyAuthService (and its client registry) across routers
+auth_service = get_auth_service()
 
-# Create a dependency to get the Spotify client
-def get_spotify_client():
-    return auth_service.get_spotify_client()
+
+# Create a dependency to get the Spotify client of the session user
+def get_spotify_client(user_id: str = Depends(get_current_user_id)):
+    return auth_service.get_spotify_client(user_id=user_id)
 
 
 # Instantiate the SongService using the Spotify client
-def get_song_service(spotify_client=Depends(get_spotify_client)):
-    return SongService(spotify_client)
+def get_song_service(
+    spotify_client=Depends(get_spotify_client),
+    user_id: str = Depends(get_current_user_id),
+):
+    return SongService(spotify_client, user_id=user_id)
 
 
 class SongGenre(BaseModel):
@@ -39,37 +56,116 @@ class SongItem(BaseModel):
     uri: str
     image_url: Optional[str] = None
     preview_url: Optional[str] = None
+    added_at: Optional[str] = None
+
+
+class LikedSongsPage(BaseModel):
+    items: List[SongItem]
+    total: int
+    next_cursor: Optional[str] = None
 
 
-@router.get("/liked", response_model=List[SongItem])
+async def library_index(song_service: SongService, version: str):
+    """Return the user's indexed library at ``version``, building it if needed."""
+    return await run_blocking(
+        get_library_index_cache().get,
+        song_service.user_id or "",
+        version,
+        song_service.build_library_index,
+    )
+
+
+async def cached_response(
+    key: str,
+    request: Request,
+    response: Response,
+    song_service: SongService,
+    build: Callable[[str], Awaitable[Any]],
+):
+    """Serve ``key`` from the per-user response cache, or build and store it.
+
+    The cache entry and ETag are tied to the library version, so a client
+    revalidating with a current ETag gets a bodyless 304 and an unchanged
+    library is never re-fetched from Spotify. ``build`` gets the version.
+    """
+    cache = get_response_cache()
+    user_id = song_service.user_id or ""
+    version = await run_blocking(
+        cache.library_version, user_id, song_service.library_version
+    )
+    etag = cache.etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        cache.record_not_modified(key)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = cache.get(user_id, key, version)
+    if body is None:
+        body = await build(version)
+        cache.set(user_id, key, version, body)
+    response.headers.update(headers)
+    return body
+
+
+@router.get("/liked", response_model=LikedSongsPage)
 async def fetch_liked_songs(
+    request: Request,
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    sort: str = "recent",
+    genre: Optional[str] = None,
+    artist: Optional[str] = None,
     song_service: SongService = Depends(get_song_service),
 ):
     """
-    Fetch user's liked songs with pagination
+    Fetch a page of the user's liked songs from the local library index
+
+    Pass the previous page's ``next_cursor`` to continue. Songs can be sorted
+    by ``recent``, ``oldest``, ``name`` or ``artist`` and filtered by genre
+    and artist ID. ``limit`` is clamped to 1-50.
     """
-    try:
-        # Fetch liked songs using the SongService instance
-        liked_songs = song_service.fetch_liked_songs(limit=limit, offset=offset)
+    limit = min(max(limit, 1), MAX_LIKED_PAGE_LIMIT)
+
+    async def build(version: str):
+        index = await library_index(song_service, version)
+        items, total, next_cursor = index.page(
+            auth_service.cursors,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            sort=sort,
+            genre=genre,
+            artist=artist,
+        )
+        return LikedSongsPage(
+            items=[
+                SongItem(
+                    id=track.id,
+                    name=track.name,
+                    artist=track.artist,
+                    album=track.album,
+                    genres=list(track.genres),
+                    uri=track.uri,
+                    image_url=track.image_url,
+                    preview_url=track.preview_url,
+                    added_at=added_at,
+                )
+                for track, added_at in items
+            ],
+            total=total,
+            next_cursor=next_cursor,
+        ).model_dump()
 
-        return [
-            SongItem(
-                id=song["track"]["id"],
-                name=song["track"]["name"],
-                artist=song["track"]["artists"][0]["name"],
-                album=song["track"]["album"]["name"],
-                genres=[],
-                uri=song["track"]["uri"],
-                image_url=song["track"]["album"]["images"][0]["url"]
-                if song["track"]["album"]["images"]
-                else None,
-                preview_url=song["track"].get("preview_url"),
-            )
-            for song in liked_songs["items"]
-        ]
+    try:
+        return await cached_response(
+            f"liked?{request.url.query}", request, response, song_service, build
+        )
 
+    except (InvalidCursor, InvalidPageRequest) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -78,25 +174,26 @@ async def fetch_liked_songs(
 
 
 @router.get("/genres")
-async def get_songs_by_genre(song_service: SongService = Depends(get_song_service)):
+async def get_songs_by_genre(
+    request: Request,
+    response: Response,
+    song_service: SongService = Depends(get_song_service),
+):
     """
     Get song counts grouped by genre
     """
-    try:
-        # Fetch liked songs and their metadata
-        liked_songs = song_service.fetch_liked_songs()
-        song_data, all_genres = song_service.fetch_song_metadata(liked_songs)
-
-        # Count songs per genre
-        genre_counts = {}
-        for song in song_data:
-            for genre in song["genres"]:
-                genre_counts[genre] = genre_counts.get(genre, 0) + 1
 
+    async def build(version: str):
+        # Genre counts are the sizes of the library index's genre lists
+        index = await library_index(song_service, version)
         return [
-            {"name": genre, "count": count} for genre, count in genre_counts.items()
+            {"name": genre, "count": len(positions)}
+            for genre, positions in index.by_genre.items()
         ]
 
+    try:
+        return await cached_response("genres", request, response, song_service, build)
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -122,3 +219,14 @@ async def get_songs_by_language(song_service: SongService = Depends(get_song_ser
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch song languages: {str(e)}",
         )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit/miss counters for the server-side caches
+    """
+    return {
+        "artist_cache": get_artist_cache().stats(),
+        "response_cache": get_response_cache().stats(),
+    }
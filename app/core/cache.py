@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import logging
+from app.core.storage import atomic_write_json
+
+logger = logging.getLogger("spotify_playlist_sorter")
+
+# Artist genres rarely change, so entries can live for a week
+DEFAULT_ARTIST_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_ARTISTS = 50000
+# Playlists whose track URIs are cached per user
+DEFAULT_MAX_PLAYLISTS = 1000
+
+
+class ArtistCache:
+    """Persistent artist-id -> genres cache with per-entry TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        cache_file: Optional[str] = None,
+        ttl: int = DEFAULT_ARTIST_TTL,
+        max_entries: int = DEFAULT_MAX_ARTISTS,
+    ):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[List[str], float]]" = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if cache_file:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, artist_id: str) -> Optional[List[str]]:
+        """Return cached genres for an artist, or None on a miss."""
+        with self._lock:
+            return self._get(artist_id, time.time())
+
+    def get_many(self, artist_ids: Iterable[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """Split artist IDs into cached genres and a de-duplicated list of misses."""
+        found = {}
+        missing = []
+        seen = set()
+        now = time.time()
+        with self._lock:
+            for artist_id in artist_ids:
+                if artist_id in seen:
+                    continue
+                seen.add(artist_id)
+                genres = self._get(artist_id, now)
+                if genres is None:
+                    missing.append(artist_id)
+                else:
+                    found[artist_id] = genres
+        return found, missing
+
+    def set(self, artist_id: str, genres: List[str]):
+        """Store genres for an artist, evicting the least recently used entries."""
+        with self._lock:
+            self._set(artist_id, genres, time.time())
+
+    def set_many(self, artist_genres: Dict[str, List[str]]):
+        """Store genres for several artists at once."""
+        now = time.time()
+        with self._lock:
+            for artist_id, genres in artist_genres.items():
+                self._set(artist_id, genres, now)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters so API savings can be monitored."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def load(self):
+        """Load cache entries from file, dropping any that have expired."""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r") as f:
+                    data = json.load(f)
+                now = time.time()
+                with self._lock:
+                    for artist_id, (genres, fetched_at) in data.items():
+                        if now - fetched_at < self.ttl:
+                            self._entries[artist_id] = (genres, fetched_at)
+                    self._evict()
+        except Exception as e:
+            logger.error(f"Error loading artist cache: {e}")
+
+    def save(self):
+        """Persist the cache atomically if it changed since the last save."""
+        if not self.cache_file or not self._dirty:
+            return
+        try:
+            with self._lock:
+                data = {
+                    artist_id: [genres, fetched_at]
+                    for artist_id, (genres, fetched_at) in self._entries.items()
+                }
+                self._dirty = False
+            atomic_write_json(self.cache_file, data)
+        except Exception as e:
+            logger.error(f"Error saving artist cache: {e}")
+
+    def _get(self, artist_id: str, now: float) -> Optional[List[str]]:
+        entry = self._entries.get(artist_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        genres, fetched_at = entry
+        if now - fetched_at >= self.ttl:
+            del self._entries[artist_id]
+            self._dirty = True
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(artist_id)
+        self.hits += 1
+        return genres
+
+    def _set(self, artist_id: str, genres: List[str], now: float):
+        self._entries[artist_id] = (list(genres), now)
+        self._entries.move_to_end(artist_id)
+        self._dirty = True
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+
+class PlaylistCache:
+    """Persistent playlist-id -> track URIs cache, valid for one snapshot_id.
+
+    Spotify gives a playlist a new ``snapshot_id`` on every edit, so entries
+    never expire by age: one is used only while its snapshot is current.
+    """
+
+    def __init__(
+        self,
+        cache_file: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_PLAYLISTS,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, FrozenSet[str]]]" = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if cache_file:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(
+        self, playlist_id: str, snapshot_id: Optional[str]
+    ) -> Optional[FrozenSet[str]]:
+        """Return the cached URIs of a playlist if cached at ``snapshot_id``."""
+        with self._lock:
+            entry = self._entries.get(playlist_id)
+            if entry is None or snapshot_id is None or entry[0] != snapshot_id:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(playlist_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, playlist_id: str, snapshot_id: Optional[str], uris: Iterable[str]):
+        """Store a playlist's URIs at a snapshot; an unknown snapshot drops it."""
+        if not snapshot_id:
+            self.discard(playlist_id)
+            return
+        with self._lock:
+            self._entries[playlist_id] = (snapshot_id, frozenset(uris))
+            self._entries.move_to_end(playlist_id)
+            self._dirty = True
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, playlist_id: str):
+        """Forget a playlist, so its contents are read again next time."""
+        with self._lock:
+            if self._entries.pop(playlist_id, None) is not None:
+                self._dirty = True
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters so API savings can be monitored."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def load(self):
+        """Load cached playlists from file."""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r") as f:
+                    data = json.load(f)
+                with self._lock:
+                    for playlist_id, (snapshot_id, uris) in data.items():
+                        self._entries[playlist_id] = (snapshot_id, frozenset(uris))
+        except Exception as e:
+            logger.error(f"Error loading playlist cache: {e}")
+
+    def save(self):
+        """Persist the cache atomically if it changed since the last save."""
+        if not self.cache_file or not self._dirty:
+            return
+        try:
+            with self._lock:
+                data = {
+                    playlist_id: [snapshot_id, sorted(uris)]
+                    for playlist_id, (snapshot_id, uris) in self._entries.items()
+                }
+                self._dirty = False
+            atomic_write_json(self.cache_file, data, separators=(",", ":"))
+        except Exception as e:
+            logger.error(f"Error saving playlist cache: {e}")
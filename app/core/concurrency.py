@@ -0,0 +1,35 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable
+import logging
+
+logger = logging.getLogger("spotify_playlist_sorter")
+
+# Threads available for blocking Spotify I/O across all in-flight requests
+SPOTIFY_IO_WORKERS = 32
+
+
+@lru_cache()
+def get_io_executor() -> ThreadPoolExecutor:
+    """Return the managed thread pool used for blocking Spotify I/O."""
+    return ThreadPoolExecutor(
+        max_workers=SPOTIFY_IO_WORKERS, thread_name_prefix="spotify-io"
+    )
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Run a blocking service call in the I/O pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_io_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_io_executor():
+    """Wait for in-flight Spotify calls and release the I/O pool."""
+    if get_io_executor.cache_info().currsize:
+        logger.info("Shutting down Spotify I/O executor...")
+        get_io_executor().shutdown(wait=True)
+        get_io_executor.cache_clear()
@@ -0,0 +1,4 @@
+class S:
+    SPOTIFY_CLIENT_ID="x"; SPOTIFY_CLIENT_SECRET="y"; SPOTIFY_REDIRECT_URI="http://localhost/callback"; SPOTIFY_SCOPE="user-library-read"; HOST="127.0.0.1"; PORT=8000; DEBUG=False
+settings=S()
+def get_settings(): return settings
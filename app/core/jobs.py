@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+import logging
+import redis
+
+logger = logging.getLogger("spotify_playlist_sorter")
+
+# Jobs running playlist pipelines at the same time, per worker process
+JOB_WORKERS = 4
+# How long finished job state is kept around for polling
+JOB_TTL = 24 * 60 * 60
+# Set to share job state between gunicorn workers, e.g. redis://localhost:6379/0
+REDIS_URL = os.environ.get("REDIS_URL")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Called by services with (items done, items in total) as work advances
+ProgressCallback = Callable[[int, int], None]
+
+
+def scaled_progress(
+    progress: Callable, stage: str, start: float, end: float
+) -> ProgressCallback:
+    """Map a stage's done/total counts onto the ``start``-``end`` job percent."""
+
+    def report(done: int, total: int):
+        fraction = min(done / total, 1) if total else 0
+        progress(stage, start + (end - start) * fraction)
+
+    return report
+
+
+class InMemoryJobStore:
+    """Job state kept in this process; fine for a single worker."""
+
+    def __init__(self, ttl: int = JOB_TTL):
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def save(self, job: Dict):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            self._expire()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["status"] in (COMPLETED, FAILED) and job["updated_at"] < cutoff
+        ]:
+            del self._jobs[job_id]
+
+
+class RedisJobStore:
+    """Job state kept in redis so every worker process can report on it."""
+
+    def __init__(self, client, prefix: str = "jobs:", ttl: int = JOB_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        data = self.client.get(self.prefix + job_id)
+        return json.loads(data) if data else None
+
+    def save(self, job: Dict):
+        self.client.set(self.prefix + job["id"], json.dumps(job), ex=self.ttl)
+
+
+class JobManager:
+    """Runs long pipelines on a worker pool and records their progress."""
+
+    def __init__(self, store, max_workers: int = JOB_WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job-worker"
+        )
+
+    def submit(
+        self, job_type: str, func: Callable, *args, owner: Optional[str] = None, **kwargs
+    ) -> Dict:
+        """Queue ``func(progress, *args, **kwargs)`` and return the new job.
+
+        ``owner`` records the user the job belongs to so only they can poll it.
+        """
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "type": job_type,
+            "owner": owner,
+            "status": QUEUED,
+            "stage": QUEUED,
+            "percent": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.store.save(job)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        logger.info(f"Queued {job_type} job {job['id']}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _update(self, job: Dict, **fields):
+        job.update(fields, updated_at=time.time())
+        self.store.save(job)
+
+    def _run(self, job: Dict, func: Callable, args, kwargs):
+        def progress(stage: str, percent: float):
+            self._update(job, stage=stage, percent=round(min(percent, 100), 1))
+
+        self._update(job, status=RUNNING, stage="starting")
+        try:
+            result = func(progress, *args, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            self._update(job, status=FAILED, error=str(e))
+            return
+        self._update(job, status=COMPLETED, stage="done", percent=100, result=result)
+        logger.info(f"Job {job['id']} completed")
+
+
+@lru_cache()
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager, backed by redis when configured."""
+    if REDIS_URL:
+        return JobManager(RedisJobStore(redis.Redis.from_url(REDIS_URL)))
+    return JobManager(InMemoryJobStore())
+
+
+def shutdown_job_manager():
+    """Let running jobs finish and release the worker pool."""
+    if get_job_manager.cache_info().currsize:
+        logger.info("Shutting down job workers...")
+        get_job_manager().shutdown(wait=True)
+        get_job_manager.cache_clear()
@@ -0,0 +1,247 @@
+"""In-memory index of a user's liked songs for paging without Spotify calls.
+
+The index holds the library once as slim tracks in Spotify's saved order
+(newest first) and precomputes, at build time:
+
+* posting lists of track positions per genre and per artist ID, and
+* the track orderings by name and by artist.
+
+A page is a slice of one of those sequences, so serving it costs O(page)
+regardless of library size. Filtered lists in an order other than the saved
+order are sorted on first use and memoized.
+
+Page cursors are signed and carry the index version, sort and filters they
+were issued for, so they cannot be replayed against another query or a
+rebuilt index.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from app.models.track import Track
+
+# Page orders accepted by LibraryIndex.page
+SORTS = ("recent", "oldest", "name", "artist")
+# Filtered orderings kept per index before the least recently used is dropped
+MAX_MEMOIZED_ORDERS = 64
+# Users whose library index is kept in memory
+MAX_INDEXED_USERS = 32
+CURSOR_SALT = "liked-cursor"
+
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that cannot be resumed in the current library."""
+
+
+class InvalidPageRequest(ValueError):
+    """A page sort, limit or offset the index cannot serve."""
+
+
+class LibraryIndex:
+    """Liked tracks of one library version with genre and artist indexes."""
+
+    def __init__(
+        self, tracks: Sequence[Track], added_at: Sequence[str], version: str = ""
+    ):
+        if len(tracks) != len(added_at):
+            raise ValueError("Every track needs an added_at timestamp.")
+        self.version = version
+        self.tracks = list(tracks)
+        self.added_at = list(added_at)
+
+        self.by_genre: Dict[str, array] = {}
+        self.by_artist: Dict[str, array] = {}
+        for pos, track in enumerate(self.tracks):
+            for genre in track.genres:
+                self.by_genre.setdefault(genre, array("I")).append(pos)
+            for artist_id in track.artist_ids:
+                self.by_artist.setdefault(artist_id, array("I")).append(pos)
+
+        self._orders = {
+            "name": self._sorted_positions(lambda track: (track.name.casefold(),)),
+            "artist": self._sorted_positions(
+                lambda track: (track.artist.casefold(), track.name.casefold())
+            ),
+        }
+        # Rank of every track in each precomputed order, for sorting subsets
+        self._ranks = {}
+        for sort, order in self._orders.items():
+            ranks = array("I", bytes(4 * len(order)))
+            for rank, pos in enumerate(order):
+                ranks[pos] = rank
+            self._ranks[sort] = ranks
+        self._memo: "OrderedDict[Tuple, Sequence[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def _sorted_positions(self, key: Callable[[Track], Tuple]) -> array:
+        return array(
+            "I",
+            sorted(range(len(self.tracks)), key=lambda pos: key(self.tracks[pos])),
+        )
+
+    def genres(self) -> List[str]:
+        """Return every genre in the library, alphabetically."""
+        return sorted(self.by_genre)
+
+    def ordered(
+        self,
+        sort: str = "recent",
+        genre: Optional[str] = None,
+        artist: Optional[str] = None,
+    ) -> Sequence[int]:
+        """Return track positions matching the filters, in ``sort`` order."""
+        if sort not in SORTS:
+            raise InvalidPageRequest(f"Unknown sort {sort!r}, expected one of {SORTS}.")
+        if genre is None and artist is None:
+            if sort == "recent":
+                return range(len(self.tracks))
+            if sort == "oldest":
+                return range(len(self.tracks) - 1, -1, -1)
+            return self._orders[sort]
+
+        key = (sort, genre, artist)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        positions = self._filtered(genre, artist)
+        if sort == "oldest":
+            positions = positions[::-1]
+        elif sort != "recent":
+            ranks = self._ranks[sort]
+            positions = array("I", sorted(positions, key=ranks.__getitem__))
+
+        with self._lock:
+            self._memo[key] = positions
+            while len(self._memo) > MAX_MEMOIZED_ORDERS:
+                self._memo.popitem(last=False)
+        return positions
+
+    def _filtered(self, genre: Optional[str], artist: Optional[str]) -> array:
+        """Intersect the posting lists for the filters, in saved order."""
+        lists = []
+        if genre is not None:
+            lists.append(self.by_genre.get(genre, array("I")))
+        if artist is not None:
+            lists.append(self.by_artist.get(artist, array("I")))
+        if len(lists) == 1:
+            return lists[0]
+        shortest, other = sorted(lists, key=len)
+        members = set(other)
+        return array("I", (pos for pos in shortest if pos in members))
+
+    def page(
+        self,
+        signer: URLSafeSerializer,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        sort: str = "recent",
+        genre: Optional[str] = None,
+        artist: Optional[str] = None,
+    ) -> Tuple[List[Tuple[Track, str]], int, Optional[str]]:
+        """Return a page of (track, added_at) pairs, match count and next cursor.
+
+        Cursors are signed with ``signer``. A cursor resumes only on the
+        index version, sort and filters it was issued for; any other cursor
+        is rejected with InvalidCursor.
+        """
+        if limit < 1 or offset < 0:
+            raise InvalidPageRequest(
+                "Limit must be positive and offset non-negative."
+            )
+        positions = self.ordered(sort, genre, artist)
+        query = [sort, genre, artist]
+        start = offset
+        if cursor is not None:
+            version, start, cursor_query = decode_cursor(signer, cursor)
+            if cursor_query != query:
+                raise InvalidCursor("The cursor was issued for a different query.")
+            if version != self.version:
+                raise InvalidCursor("The library changed; restart from the first page.")
+
+        page = positions[start : start + limit]
+        items = [(self.tracks[pos], self.added_at[pos]) for pos in page]
+        end = start + len(page)
+        next_cursor = None
+        if end < len(positions):
+            next_cursor = encode_cursor(signer, self.version, end, query)
+        return items, len(positions), next_cursor
+
+
+def cursor_signer(secret: str) -> URLSafeSerializer:
+    """Return the serializer that signs /liked page cursors with ``secret``."""
+    return URLSafeSerializer(secret, salt=CURSOR_SALT)
+
+
+def encode_cursor(
+    signer: URLSafeSerializer, version: str, position: int, query: List
+) -> str:
+    """Sign an index version, page position and [sort, genre, artist] query."""
+    return signer.dumps([version, position, query])
+
+
+def decode_cursor(signer: URLSafeSerializer, cursor: str) -> Tuple[str, int, List]:
+    """Unpack a cursor made by encode_cursor, raising InvalidCursor if invalid."""
+    try:
+        version, position, query = signer.loads(cursor)
+    except (BadSignature, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}") from e
+    if not isinstance(position, int) or position < 0:
+        raise InvalidCursor("Malformed cursor: bad position")
+    return version, position, query
+
+
+class LibraryIndexCache:
+    """Keep the latest library index per user, rebuilt when its version changes.
+
+    Builds for one user are serialized, so concurrent page requests after a
+    library change trigger a single rebuild.
+    """
+
+    def __init__(self, max_users: int = MAX_INDEXED_USERS):
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, LibraryIndex]" = OrderedDict()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, user_id: str, version: str, build: Callable[[], LibraryIndex]
+    ) -> LibraryIndex:
+        """Return the user's index for ``version``, building it if needed."""
+        with self._lock:
+            build_lock = self._build_locks.setdefault(user_id, threading.Lock())
+        with build_lock:
+            with self._lock:
+                index = self._indexes.get(user_id)
+                if index is not None and index.version == version:
+                    self._indexes.move_to_end(user_id)
+                    return index
+            index = build()
+            index.version = version
+            with self._lock:
+                self._indexes[user_id] = index
+                self._indexes.move_to_end(user_id)
+                while len(self._indexes) > self.max_users:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    self._build_locks.pop(evicted, None)
+            return index
+
+    def invalidate(self, user_id: str):
+        """Drop a user's index so the next request rebuilds it."""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+
+@lru_cache()
+def get_library_index_cache() -> LibraryIndexCache:
+    """Return the process-wide library index cache shared across requests."""
+    return LibraryIndexCache()
@@ -0,0 +1,68 @@
+"""Request and keep only the Spotify fields each pipeline stage uses.
+
+Playlist and playlist-item reads accept a ``fields`` filter, so Spotify
+sends only the projected fields and less is transferred. The saved-tracks,
+artists and user playlists endpoints have no such filter and always send
+full objects; their results are projected with ``project`` once spotipy has
+decoded them. That drops ``available_markets`` and other unused fields
+before the pages are cached or held, but does not shrink the download.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+
+# Field filters, in Spotify's ``fields`` syntax, per pipeline stage
+SAVED_TRACKS_FIELDS = (
+    "items(added_at,track(id,uri,name,preview_url,artists(id,name),"
+    "album(name,images(url)))),next,total"
+)
+ARTISTS_FIELDS = "artists(id,genres)"
+PLAYLISTS_FIELDS = "items(id,name,snapshot_id),next,total"
+PLAYLIST_ITEMS_FIELDS = "items(track(uri)),next,total"
+PLAYLIST_SNAPSHOT_FIELDS = "snapshot_id"
+
+
+@lru_cache(maxsize=64)
+def parse_fields(spec: str) -> Dict[str, Any]:
+    """Parse a Spotify ``fields`` filter such as ``items(track(uri)),next``.
+
+    Returns a nested dict of field name -> sub-filter, or None for a field
+    kept whole.
+    """
+    fields, stack, name = {}, [], ""
+    current = fields
+    for char in spec:
+        if char == ",":
+            if name:
+                current.setdefault(name, None)
+            name = ""
+        elif char == "(":
+            child = current[name] = {}
+            stack.append(current)
+            current, name = child, ""
+        elif char == ")":
+            if name:
+                current.setdefault(name, None)
+            current, name = stack.pop(), ""
+        else:
+            name += char
+    if name:
+        current.setdefault(name, None)
+    return fields
+
+
+def project(value: Any, fields: Union[str, Optional[Dict[str, Any]]]) -> Any:
+    """Keep only ``fields`` of a response, like Spotify's ``fields`` parameter."""
+    if isinstance(fields, str):
+        fields = parse_fields(fields)
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: project(value[key], sub_fields)
+            for key, sub_fields in fields.items()
+            if key in value
+        }
+    return value
+
@@ -0,0 +1,118 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Optional
+import logging
+
+from spotipy.exceptions import SpotifyException
+
+logger = logging.getLogger("spotify_playlist_sorter")
+
+# Requests per second allowed before Spotify has pushed back at all
+DEFAULT_MAX_RATE = 100.0
+# Never slow down below this many requests per second
+DEFAULT_MIN_RATE = 1.0
+# Additive increase per successful call and multiplicative decrease per 429
+DEFAULT_RATE_INCREASE = 0.5
+DEFAULT_RATE_DECREASE = 0.5
+DEFAULT_MAX_RETRIES = 3
+
+
+class RateLimiter:
+    """Shared token-bucket rate limiter with AIMD adjustment on HTTP 429.
+
+    Calls run at ``max_rate`` until Spotify throttles. A 429 pauses every
+    caller until its ``Retry-After`` has passed, halves the rate, and each
+    later success ramps the rate back up by a small fixed step.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = DEFAULT_MAX_RATE,
+        min_rate: float = DEFAULT_MIN_RATE,
+        increase: float = DEFAULT_RATE_INCREASE,
+        decrease: float = DEFAULT_RATE_DECREASE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+
+        self.rate = max_rate
+        self.throttle_count = 0
+        self._tokens = max_rate
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    capacity = max(1.0, self.rate)
+                    self._tokens = min(
+                        capacity, self._tokens + (now - self._last_refill) * self.rate
+                    )
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Additively ramp the rate back towards the maximum."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float):
+        """Pause all callers for ``retry_after`` seconds and cut the rate."""
+        with self._lock:
+            self.throttle_count += 1
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + retry_after
+            )
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 1.0)
+        logger.warning(
+            f"Rate limit exceeded. Pausing for {retry_after} seconds, "
+            f"rate reduced to {self.rate:.1f} requests/s."
+        )
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Run a Spotify call under the limiter, retrying on HTTP 429."""
+        retries = self.max_retries
+        while True:
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except SpotifyException as e:
+                if e.http_status != 429 or retries <= 0:
+                    raise
+                retries -= 1
+                self.on_throttle(_retry_after(e))
+                continue
+            self.on_success()
+            return result
+
+
+def _retry_after(error: SpotifyException, default: float = 1.0) -> float:
+    """Read the Retry-After header (in seconds) from a throttled response."""
+    headers: Optional[dict] = getattr(error, "headers", None)
+    if not headers:
+        return default
+    try:
+        return float(headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter shared by all Spotify calls."""
+    return RateLimiter()
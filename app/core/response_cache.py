@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Responses kept across all users before the least recently used is dropped
+DEFAULT_MAX_RESPONSES = 1000
+# How long a probed library version is trusted before Spotify is asked again
+DEFAULT_VERSION_TTL = 30
+
+
+class ResponseCache:
+    """Per-user cache of API response bodies, valid for one library version.
+
+    Entries are keyed by user and endpoint (including query parameters) and
+    store the library version they were built from, so a changed library is
+    a miss without explicit invalidation. ETags are derived from the endpoint
+    and version, which lets clients revalidate with If-None-Match.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_RESPONSES,
+        version_ttl: float = DEFAULT_VERSION_TTL,
+    ):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Any]]" = OrderedDict()
+        self._versions: Dict[str, Tuple[str, float]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(key: str, version: str) -> str:
+        """Strong ETag for the response of ``key`` at a library version."""
+        digest = hashlib.sha1(f"{key}\0{version}".encode("utf-8")).hexdigest()
+        return f'"{digest}"'
+
+    def library_version(self, user_id: str, probe: Callable[[], str]) -> str:
+        """Return the user's library version, probing Spotify at most once per TTL."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(user_id)
+            if cached and now - cached[1] < self.version_ttl:
+                return cached[0]
+        version = probe()
+        with self._lock:
+            self._versions[user_id] = (version, now)
+        return version
+
+    def get(self, user_id: str, key: str, version: str) -> Optional[Any]:
+        """Return the cached body for ``key`` if it was built at ``version``."""
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end((user_id, key))
+                self._count(key, "hits")
+                return entry[1]
+            self._count(key, "misses")
+            return None
+
+    def set(self, user_id: str, key: str, version: str, body: Any):
+        """Store a response body, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[(user_id, key)] = (version, body)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_not_modified(self, key: str):
+        """Count a request answered with 304 Not Modified."""
+        with self._lock:
+            self._count(key, "not_modified")
+
+    def invalidate(self, user_id: str):
+        """Drop every response and the probed version for a user."""
+        with self._lock:
+            self._versions.pop(user_id, None)
+            for entry in [entry for entry in self._entries if entry[0] == user_id]:
+                del self._entries[entry]
+
+    def _count(self, key: str, counter: str):
+        endpoint = key.split("?", 1)[0]
+        counters = self._counters.setdefault(
+            endpoint, {"hits": 0, "misses": 0, "not_modified": 0}
+        )
+        counters[counter] += 1
+
+    def stats(self) -> Dict:
+        """Return hit, miss and 304 counters, overall and per endpoint."""
+        with self._lock:
+            endpoints = {
+                endpoint: dict(counters, hit_rate=_hit_rate(counters))
+                for endpoint, counters in self._counters.items()
+            }
+            totals = {
+                counter: sum(c[counter] for c in self._counters.values())
+                for counter in ("hits", "misses", "not_modified")
+            }
+            return {
+                **totals,
+                "hit_rate": _hit_rate(totals),
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "endpoints": endpoints,
+            }
+
+
+def _hit_rate(counters: Dict[str, int]) -> float:
+    """Share of requests served without rebuilding the response."""
+    served = counters["hits"] + counters["not_modified"]
+    requests = served + counters["misses"]
+    return round(served / requests, 4) if requests else 0.0
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison) against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag[2:] == etag if tag.startswith("W/") else tag == etag
+        for tag in candidates
+    )
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache shared across requests."""
+    return ResponseCache()
@@ -0,0 +1,261 @@
+"""Compact, memory-mappable snapshot of a song library.
+
+Layout (native byte order, recorded in the header)::
+
+    header       magic, version, byte order, section counts
+    offsets      uint32[n_strings + 1]   string table offsets into ``blob``
+    blob         utf-8 bytes of every interned string
+    names        uint32[n_tracks]        string index of each track name
+    artists      uint32[n_tracks]        string index of each track artist
+    uris         uint32[n_tracks]        string index of each track URI
+    genre_start  uint32[n_tracks + 1]    slice of ``genre_refs`` per track
+    genre_refs   uint32[n_genre_refs]    string index of each track genre
+    all_genres   uint32[n_all_genres]    string index of each library genre
+
+Artists and genres are interned, so each distinct string is stored once.
+Opening a snapshot maps the file and casts the columns in place; strings
+are only decoded when a track is read.
+
+Convert an existing ``song_data.json``::
+
+    python -m app.core.snapshot data/song_data.json data/song_data.snap
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.storage import atomic_write_bytes
+from app.models.track import Track
+
+MAGIC = b"SPLS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHBxIIII")
+_BYTE_ORDERS = {"little": 0, "big": 1}
+
+
+def build_snapshot(
+    song_data: Iterable[Dict[str, Any]], all_genres: Optional[Sequence[str]] = None
+) -> bytes:
+    """Encode tracks or song data records into snapshot bytes."""
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    names, artists, uris = array("I"), array("I"), array("I")
+    genre_start, genre_refs = array("I", [0]), array("I")
+    for song in song_data:
+        names.append(intern(song["name"]))
+        artists.append(intern(song["artist"]))
+        uris.append(intern(song["uri"]))
+        genre_refs.extend(intern(genre) for genre in song["genres"])
+        genre_start.append(len(genre_refs))
+
+    if all_genres is None:
+        by_index = list(strings)
+        all_genres = sorted({by_index[index] for index in genre_refs})
+    genre_list = array("I", (intern(genre) for genre in all_genres))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = array("I", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    blob = b"".join(encoded)
+
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        _BYTE_ORDERS[sys.byteorder],
+        len(names),
+        len(strings),
+        len(genre_refs),
+        len(genre_list),
+    )
+    # Pad the blob so the integer columns after it stay 4-byte aligned
+    padding = b"\0" * (-len(blob) % 4)
+    return b"".join(
+        [
+            header,
+            offsets.tobytes(),
+            blob,
+            padding,
+            names.tobytes(),
+            artists.tobytes(),
+            uris.tobytes(),
+            genre_start.tobytes(),
+            genre_refs.tobytes(),
+            genre_list.tobytes(),
+        ]
+    )
+
+
+def write_snapshot(
+    path: str,
+    song_data: Iterable[Dict[str, Any]],
+    all_genres: Optional[Sequence[str]] = None,
+):
+    """Write a snapshot file atomically."""
+    atomic_write_bytes(path, build_snapshot(song_data, all_genres))
+
+
+class LibrarySnapshot(Sequence):
+    """Read-only, lazily decoded view over a snapshot file or buffer.
+
+    Items are :class:`Track` objects whose strings are decoded on first use
+    and shared between tracks afterwards.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        # Every view onto ``buffer``, released by close() so it can be unmapped
+        self._views: List[memoryview] = [memoryview(buffer)]
+        try:
+            self._map_columns(self._views[0])
+        except Exception:
+            self._release_views()
+            raise
+
+    def _map_columns(self, view: memoryview):
+        if len(view) < _HEADER.size:
+            raise ValueError("Truncated library snapshot header")
+        magic, version, byte_order, n_tracks, n_strings, n_refs, n_genres = (
+            _HEADER.unpack_from(view)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a library snapshot or unsupported version")
+        swap = byte_order != _BYTE_ORDERS[sys.byteorder]
+
+        position = _HEADER.size
+
+        def column(length: int):
+            nonlocal position
+            if position + 4 * length > len(view):
+                raise ValueError("Truncated library snapshot")
+            data = view[position : position + 4 * length]
+            position += 4 * length
+            if swap:
+                # Foreign byte order: decode into a private, swapped copy
+                values = array("I", data.tobytes())
+                values.byteswap()
+                return values
+            values = data.cast("I")
+            self._views.append(values)
+            return values
+
+        self._offsets = column(n_strings + 1)
+        blob_size = self._offsets[-1]
+        self._blob = view[position : position + blob_size]
+        self._views.append(self._blob)
+        position += blob_size + (-blob_size % 4)
+        self._names = column(n_tracks)
+        self._artists = column(n_tracks)
+        self._uris = column(n_tracks)
+        self._genre_start = column(n_tracks + 1)
+        self._genre_refs = column(n_refs)
+        self._all_genres = column(n_genres)
+        # Decoded strings, filled on first use; artists and genres repeat a lot
+        self._strings: List[Optional[str]] = [None] * n_strings
+
+    @classmethod
+    def open(cls, path: str) -> "LibrarySnapshot":
+        """Memory-map a snapshot file without reading it into memory.
+
+        The mapping stays open until :meth:`close`; use the snapshot as a
+        context manager to release it. Raises ValueError for an empty or
+        malformed file.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapped)
+        except Exception:
+            mapped.close()
+            raise
+
+    def close(self):
+        """Release the views onto the buffer and unmap the file, if any.
+
+        Tracks already read stay valid; the snapshot itself can no longer
+        be read.
+        """
+        self._release_views()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def _release_views(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+
+    def __enter__(self) -> "LibrarySnapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snapshot index out of range")
+        return Track(
+            name=self.string(self._names[index]),
+            artist=self.string(self._artists[index]),
+            genres=self.track_genres(index),
+            uri=self.string(self._uris[index]),
+        )
+
+    def string(self, index: int) -> str:
+        """Decode one interned string."""
+        value = self._strings[index]
+        if value is None:
+            value = self._strings[index] = str(
+                self._blob[self._offsets[index] : self._offsets[index + 1]], "utf-8"
+            )
+        return value
+
+    def track_genres(self, index: int) -> Tuple[str, ...]:
+        start, end = self._genre_start[index], self._genre_start[index + 1]
+        return tuple(self.string(self._genre_refs[i]) for i in range(start, end))
+
+    @property
+    def all_genres(self) -> List[str]:
+        return [self.string(index) for index in self._all_genres]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Convert song_data.json into a compact library snapshot"
+    )
+    parser.add_argument("source", help="song_data.json written by SongService")
+    parser.add_argument("target", help="snapshot file to write")
+    parser.add_argument(
+        "--genres", help="unique_genres.json to store as the library genre list"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.source, "r") as f:
+        song_data = json.load(f)
+    all_genres = None
+    if args.genres:
+        with open(args.genres, "r") as f:
+            all_genres = json.load(f)
+
+    write_snapshot(args.target, song_data, all_genres)
+    print(f"Wrote {len(song_data)} tracks to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import tempfile
+from urllib.parse import quote
+
+USERS_DIR = "users"
+# Two hex characters give 256 shard directories, keeping each one small
+SHARD_WIDTH = 2
+
+
+def shard_for(key: str) -> str:
+    """Return the shard a key belongs to, stable across processes and hosts."""
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:SHARD_WIDTH]
+
+
+def safe_key(key: str) -> str:
+    """Make a user ID safe to use as a single path component.
+
+    Percent-encoding keeps distinct IDs distinct, and a leading dot is
+    encoded too so "." and ".." can never point outside the shard.
+    """
+    key = quote(key, safe="")
+    return "%2E" + key[1:] if key.startswith(".") else key
+
+
+def sharded_path(root: str, key: str, filename: str = "") -> str:
+    """Return ``root/<shard>/<key>[/filename]`` for a user or token key."""
+    path = os.path.join(root, shard_for(key), safe_key(key))
+    return os.path.join(path, filename) if filename else path
+
+
+def user_data_dir(user_id: str, data_dir: str = "data") -> str:
+    """Return (and create) the private data directory of a Spotify user."""
+    path = sharded_path(os.path.join(data_dir, USERS_DIR), user_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write bytes to a temp file next to ``path`` and atomically swap it in."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data, **kwargs):
+    """Write JSON atomically, so readers never see a half-written file."""
+    atomic_write_bytes(path, json.dumps(data, **kwargs).encode("utf-8"))
@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional
+import logging
+
+from spotipy.cache_handler import CacheHandler
+
+from app.core.storage import atomic_write_json, sharded_path
+
+logger = logging.getLogger("spotify_playlist_sorter")
+
+TOKEN_DIR = os.path.join("data", "tokens")
+# Refresh access tokens this many seconds before they expire
+REFRESH_MARGIN = 300
+
+
+class FileTokenBackend:
+    """Persist token info as one JSON file per key, sharded by key hash."""
+
+    def __init__(self, directory: str = TOKEN_DIR):
+        self.directory = directory
+
+    def load(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, token_info: Dict):
+        atomic_write_json(self._path(key), token_info)
+
+    def delete(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def load_or_create(self, key: str, value: Dict) -> Dict:
+        """Store ``value`` unless ``key`` exists, and return the stored value.
+
+        The file is linked into place, so concurrent workers agree on the
+        first value written and never read a partial file.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.link(tmp_path, path)
+            return value
+        except FileExistsError:
+            return self.load(key)
+        finally:
+            os.remove(tmp_path)
+
+    def _path(self, key: str) -> str:
+        return sharded_path(self.directory, key) + ".json"
+
+
+class RedisTokenBackend:
+    """Persist token info in redis so every worker process shares it."""
+
+    def __init__(self, client, prefix: str = "tokens:"):
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, key: str) -> Optional[Dict]:
+        data = self.client.get(self.prefix + key)
+        return json.loads(data) if data else None
+
+    def save(self, key: str, token_info: Dict):
+        self.client.set(self.prefix + key, json.dumps(token_info))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def load_or_create(self, key: str, value: Dict) -> Dict:
+        """Store ``value`` unless ``key`` exists, and return the stored value."""
+        self.client.set(self.prefix + key, json.dumps(value), nx=True)
+        return self.load(key)
+
+
+class TokenStore:
+    """In-memory token cache in front of a pluggable persistence backend.
+
+    Tokens are refreshed ``margin`` seconds before they expire, and only
+    one refresh per key runs at a time: concurrent callers wait for it and
+    reuse its result.
+    """
+
+    def __init__(
+        self,
+        backend,
+        refresh: Callable[[str], Dict],
+        margin: int = REFRESH_MARGIN,
+    ):
+        self.backend = backend
+        self.refresh = refresh
+        self.margin = margin
+        self._tokens: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return valid token info for ``key``, refreshing it if close to expiry."""
+        token_info = self._cached(key)
+        if token_info is None or not self._needs_refresh(token_info):
+            return token_info
+
+        with self._refresh_lock(key):
+            # Another caller may have refreshed while we waited
+            token_info = self._cached(key)
+            if token_info is None or not self._needs_refresh(token_info):
+                return token_info
+
+            logger.info("Refreshing Spotify access token...")
+            try:
+                refreshed = self.refresh(token_info["refresh_token"])
+            except Exception as e:
+                logger.error(f"Error refreshing access token: {e}")
+                return token_info if token_info["expires_at"] > time.time() else None
+            self.save(key, refreshed)
+            return self._tokens[key]
+
+    def get_access_token(self, key: str) -> Optional[str]:
+        token_info = self.get(key)
+        return token_info["access_token"] if token_info else None
+
+    def save(self, key: str, token_info: Dict):
+        """Cache token info in memory and persist it through the backend."""
+        token_info = dict(token_info)
+        if "expires_at" not in token_info:
+            token_info["expires_at"] = int(time.time()) + token_info["expires_in"]
+        with self._lock:
+            self._tokens[key] = token_info
+        self.backend.save(key, token_info)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._tokens.pop(key, None)
+        self.backend.delete(key)
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            token_info = self._tokens.get(key)
+        if token_info is None:
+            token_info = self.backend.load(key)
+            if token_info is not None:
+                with self._lock:
+                    self._tokens[key] = token_info
+        return token_info
+
+    def _needs_refresh(self, token_info: Dict) -> bool:
+        return token_info["expires_at"] - time.time() < self.margin
+
+    def _refresh_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._refresh_locks.setdefault(key, threading.Lock())
+
+
+class TokenStoreCacheHandler(CacheHandler):
+    """spotipy cache handler that reads and writes tokens through a TokenStore."""
+
+    def __init__(self, token_store: TokenStore, key: str):
+        self.token_store = token_store
+        self.key = key
+
+    def get_cached_token(self):
+        return self.token_store.get(self.key)
+
+    def save_token_to_cache(self, token_info):
+        self.token_store.save(self.key, token_info)
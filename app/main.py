@@ -5,8 +5,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
 from app.core.config import settings
+from app.core.concurrency import shutdown_io_executor
+from app.core.jobs import shutdown_job_manager
 from app.core.logging import setup_logging
-from app.api import auth, playlists, songs
+from app.api import auth, jobs, playlists, songs
 
 # Set up logging
 setup_logging()
@@ -37,6 +39,7 @@ templates = Jinja2Templates(directory="app/static/templates")
 app.include_router(auth.router)
 app.include_router(playlists.router)
 app.include_router(songs.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -45,6 +48,13 @@ async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.on_event("shutdown")
+def shutdown():
+    """Release the job workers and the Spotify I/O thread pool"""
+    shutdown_job_manager()
+    shutdown_io_executor()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
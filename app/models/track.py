@@ -0,0 +1,146 @@
+"""Slim track record built once from a Spotify API payload."""
+from sys import intern
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple, Union
+
+
+def intern_all(values: Iterable[str]) -> Tuple[str, ...]:
+    """Return ``values`` as a tuple of interned strings."""
+    return tuple(intern(value) for value in values)
+
+
+def merge_genres(
+    artist_ids: Sequence[str], artist_genres: Mapping[str, Sequence[str]]
+) -> Sequence[str]:
+    """Combine the genres of several artists in order, without duplicates."""
+    if len(artist_ids) == 1:
+        return artist_genres.get(artist_ids[0], ())
+    return tuple(
+        dict.fromkeys(
+            genre
+            for artist_id in artist_ids
+            for genre in artist_genres.get(artist_id, ())
+        )
+    )
+
+
+class Track:
+    """A liked track, keeping only the fields the services and API use.
+
+    Artist names, album names, artist IDs and genres repeat across a
+    library, so they are interned and share storage between tracks. Tracks
+    also support ``track["name"]``-style access to the song data record
+    fields (name, artist, genres, uri), so code written against song data
+    dicts keeps working.
+    """
+
+    __slots__ = (
+        "name",
+        "artist",
+        "artist_ids",
+        "album",
+        "uri",
+        "image_url",
+        "preview_url",
+        "genres",
+    )
+
+    RECORD_FIELDS = ("name", "artist", "genres", "uri")
+
+    def __init__(
+        self,
+        name: str,
+        artist: str,
+        uri: str,
+        genres: Sequence[str] = (),
+        artist_ids: Tuple[str, ...] = (),
+        album: str = "",
+        image_url: Optional[str] = None,
+        preview_url: Optional[str] = None,
+    ):
+        self.name = name
+        self.artist = intern(artist)
+        self.artist_ids = artist_ids
+        self.album = intern(album)
+        self.uri = uri
+        # Album art is shared by every track on the album
+        self.image_url = intern(image_url) if image_url else image_url
+        self.preview_url = preview_url
+        self.genres = genres
+
+    @classmethod
+    def from_spotify(
+        cls,
+        track: Dict[str, Any],
+        artist_genres: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> "Track":
+        """Build a track from a Spotify track object.
+
+        ``artist_genres`` maps artist IDs to genres. A track's genres are
+        those of all its credited artists, first artist first; tracks with a
+        single artist share that artist's genres rather than copying them.
+        """
+        artists = track.get("artists") or []
+        artist = artists[0] if artists else {}
+        artist_ids = intern_all(a["id"] for a in artists if a.get("id"))
+        album = track.get("album") or {}
+        images = album.get("images") or []
+        return cls(
+            name=track["name"],
+            artist=artist.get("name", ""),
+            artist_ids=artist_ids,
+            album=album.get("name", ""),
+            uri=track["uri"],
+            image_url=images[0]["url"] if images else None,
+            preview_url=track.get("preview_url"),
+            genres=merge_genres(artist_ids, artist_genres or {}),
+        )
+
+    @property
+    def id(self) -> str:
+        """Spotify track ID, the last part of the track URI."""
+        return self.uri.rpartition(":")[2]
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any]) -> "Track":
+        """Build a track from a song data record (name, artist, genres, uri)."""
+        return cls(
+            name=record.get("name", ""),
+            artist=record.get("artist", ""),
+            uri=record["uri"],
+            genres=intern_all(record.get("genres", ())),
+        )
+
+    @classmethod
+    def coerce(cls, song: Union["Track", Mapping[str, Any]]) -> "Track":
+        """Return ``song`` as a Track, converting song data records."""
+        return song if isinstance(song, Track) else cls.from_record(song)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the song data record for this track."""
+        return {
+            "name": self.name,
+            "artist": self.artist,
+            "genres": list(self.genres),
+            "uri": self.uri,
+        }
+
+    def __getitem__(self, key: str):
+        if key not in self.RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Track):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field)
+            for field in self.__slots__
+            if field != "genres"
+        ) and tuple(self.genres) == tuple(other.genres)
+
+    def __hash__(self) -> int:
+        # Equal tracks always share a URI, so tracks can be deduplicated in sets
+        return hash(self.uri)
+
+    def __repr__(self) -> str:
+        return f"Track(name={self.name!r}, artist={self.artist!r}, uri={self.uri!r})"
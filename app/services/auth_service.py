@@ -1,32 +1,206 @@
 import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Optional
+import requests
 import spotipy
+from requests.adapters import HTTPAdapter
+from spotipy.cache_handler import MemoryCacheHandler
 from spotipy.oauth2 import SpotifyOAuth
+from urllib3.util.retry import Retry
 from fastapi import HTTPException, Request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+import redis
 from app.core.config import get_settings
+from app.core.library_index import cursor_signer, get_library_index_cache
+from app.core.response_cache import get_response_cache
+from app.core.token_store import (
+    FileTokenBackend,
+    RedisTokenBackend,
+    TokenStore,
+    TokenStoreCacheHandler,
+)
 import logging
 
 logger = logging.getLogger("spotify_playlist_sorter")
 
+# Let 429s reach the shared rate limiter instead of being retried blindly
+# inside the HTTP adapter; other transient errors are still retried there
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# Keep-alive connection pool per client session; size it above the number
+# of threads that may share one client (fetch workers, playlist writers)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+# Clients (one per user/token) kept alive before the least recent is closed
+MAX_CACHED_CLIENTS = 256
+# Token store key used when no Spotify user is given (single-account use)
+DEFAULT_TOKEN_KEY = "default"
+# Signed cookie holding the Spotify user ID of the browser session
+SESSION_COOKIE = "spotify_user"
+SESSION_SECRET_KEY = os.environ.get("SESSION_SECRET_KEY")
+# Token store key of the generated session key shared by every worker when
+# SESSION_SECRET_KEY is not set; ":" never appears in a Spotify user ID
+SHARED_SESSION_SECRET = ":session-secret"
+# Seconds a session cookie stays valid after it was signed
+SESSION_MAX_AGE = 30 * 24 * 60 * 60
+# Set to keep tokens in redis instead of files, e.g. redis://localhost:6379/0
+REDIS_URL = os.environ.get("REDIS_URL")
+
+
+class SpotifyClientRegistry:
+    """Keeps one pooled, keep-alive Spotify client per user/token."""
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        max_clients: int = MAX_CACHED_CLIENTS,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, spotipy.Spotify]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, factory: Callable[[requests.Session], spotipy.Spotify]):
+        """Return the client for ``key``, building it with a pooled session if new."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+
+            client = factory(self.build_session())
+            self._clients[key] = client
+            while len(self._clients) > self.max_clients:
+                _, evicted = self._clients.popitem(last=False)
+                evicted._session.close()
+            return client
+
+    def remove(self, key: str):
+        """Close and forget the client for ``key``."""
+        with self._lock:
+            client = self._clients.pop(key, None)
+        if client is not None:
+            client._session.close()
+
+    def build_session(self) -> requests.Session:
+        """Build a keep-alive session with a sized connection pool."""
+        session = requests.Session()
+        retry = Retry(
+            total=spotipy.Spotify.max_retries,
+            connect=None,
+            read=False,
+            allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+            status=spotipy.Spotify.max_retries,
+            backoff_factor=0.3,
+            status_forcelist=RETRY_STATUS_CODES,
+            # urllib3 would otherwise sleep out and retry 429s with a
+            # Retry-After header itself, hiding them from the rate limiter
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
 
 class SpotifyAuthService:
-    def __init__(self):
+    def __init__(self, client_registry: Optional[SpotifyClientRegistry] = None):
         self.settings = get_settings()
+        self.clients = client_registry or SpotifyClientRegistry()
+        if REDIS_URL:
+            backend = RedisTokenBackend(redis.Redis.from_url(REDIS_URL))
+        else:
+            backend = FileTokenBackend()
+        self.token_store = TokenStore(backend, refresh=self._refresh_access_token)
+        secret = SESSION_SECRET_KEY or self._shared_session_secret(backend)
+        self.sessions = URLSafeTimedSerializer(secret, salt="spotify-session")
+        # Signs /liked page cursors so they are only valid for their query
+        self.cursors = cursor_signer(secret)
+
+    @staticmethod
+    def _shared_session_secret(backend) -> str:
+        """Return the session key generated once and kept in the token backend.
+
+        Every worker using the same token directory or redis reads the same
+        key, so sessions stay valid across workers and restarts.
+        """
+        logger.warning(
+            "SESSION_SECRET_KEY is not set; signing sessions with the key kept "
+            "in the token store"
+        )
+        return backend.load_or_create(
+            SHARED_SESSION_SECRET, {"secret": secrets.token_urlsafe(32)}
+        )["secret"]
 
-    def get_auth_manager(self):
-        """Get Spotify OAuth authentication manager"""
-        # Remove existing cache file if it exists
-        cache_path = ".cache"
-        if os.path.exists(cache_path):
-            os.remove(cache_path)
+    def get_auth_manager(self, key: str = DEFAULT_TOKEN_KEY):
+        """Get Spotify OAuth authentication manager backed by the token store"""
         return SpotifyOAuth(
             client_id=self.settings.SPOTIFY_CLIENT_ID,
             client_secret=self.settings.SPOTIFY_CLIENT_SECRET,
             redirect_uri=self.settings.SPOTIFY_REDIRECT_URI,
             scope=self.settings.SPOTIFY_SCOPE,
-            cache_path=".cache",
+            cache_handler=TokenStoreCacheHandler(self.token_store, key),
             open_browser=True,  # Optional: Opens browser for authentication
         )
 
+    def complete_login(self, code: str):
+        """Exchange an authorization code and store the token under the Spotify user ID"""
+        auth_manager = SpotifyOAuth(
+            client_id=self.settings.SPOTIFY_CLIENT_ID,
+            client_secret=self.settings.SPOTIFY_CLIENT_SECRET,
+            redirect_uri=self.settings.SPOTIFY_REDIRECT_URI,
+            scope=self.settings.SPOTIFY_SCOPE,
+            cache_handler=MemoryCacheHandler(),
+        )
+        token_info = auth_manager.get_access_token(code, check_cache=False)
+        user_id = spotipy.Spotify(auth=token_info["access_token"]).current_user()["id"]
+        self.token_store.save(user_id, token_info)
+        # Drop any client still holding the user's previous token
+        self.clients.remove(f"user:{user_id}")
+        return user_id, token_info
+
+    def create_session(self, user_id: str) -> str:
+        """Sign a session cookie value identifying the Spotify user"""
+        return self.sessions.dumps(user_id)
+
+    def get_session_user(self, request: Request) -> Optional[str]:
+        """Return the Spotify user ID from the session cookie, if it is valid"""
+        cookie = request.cookies.get(SESSION_COOKIE)
+        if not cookie:
+            return None
+        try:
+            return self.sessions.loads(cookie, max_age=SESSION_MAX_AGE)
+        except BadSignature:
+            return None
+
+    def logout(self, user_id: str):
+        """Forget the stored token, cached client and cached library of a user"""
+        self.token_store.delete(user_id)
+        self.clients.remove(f"user:{user_id}")
+        get_response_cache().invalidate(user_id)
+        get_library_index_cache().invalidate(user_id)
+
+    def _refresh_access_token(self, refresh_token: str):
+        """Exchange a refresh token for new token info without touching the store"""
+        auth_manager = SpotifyOAuth(
+            client_id=self.settings.SPOTIFY_CLIENT_ID,
+            client_secret=self.settings.SPOTIFY_CLIENT_SECRET,
+            redirect_uri=self.settings.SPOTIFY_REDIRECT_URI,
+            scope=self.settings.SPOTIFY_SCOPE,
+            cache_handler=MemoryCacheHandler(),
+        )
+        return auth_manager.refresh_access_token(refresh_token)
+
     def get_auth_url(self):
         """Get the Spotify authorization URL"""
         auth_manager = self.get_auth_manager()
@@ -43,26 +217,47 @@ class SpotifyAuthService:
             logger.error(f"Error getting access token: {str(e)}")
             raise HTTPException(status_code=400, detail="Invalid authorization code")
 
-    def get_spotify_client(self, token=None):
-        """Get authenticated Spotify client"""
-        if token:
+    def get_spotify_client(self, token=None, user_id: Optional[str] = None):
+        """Get authenticated Spotify client, reusing its pooled HTTP session"""
+        if user_id:
+            # Use the user's own token from the token store
+            return self.clients.get(
+                f"user:{user_id}",
+                lambda session: spotipy.Spotify(
+                    auth_manager=self.get_auth_manager(user_id),
+                    requests_session=session,
+                ),
+            )
+        elif token:
             # Use provided token
-            return spotipy.Spotify(auth=token)
+            return self.clients.get(
+                f"token:{token}",
+                lambda session: spotipy.Spotify(auth=token, requests_session=session),
+            )
         else:
             # Use OAuth flow
-            auth_manager = self.get_auth_manager()
-            return spotipy.Spotify(auth_manager=auth_manager)
+            return self.clients.get(
+                "oauth",
+                lambda session: spotipy.Spotify(
+                    auth_manager=self.get_auth_manager(), requests_session=session
+                ),
+            )
 
     def validate_token(self, request: Request):
         """Validate Spotify token from session or token storage"""
-        auth_manager = self.get_auth_manager()
+        user_id = self.get_session_user(request)
+        token_info = self.token_store.get(user_id) if user_id else None
 
-        if not auth_manager.validate_token(
-            auth_manager.cache_handler.get_cached_token()
-        ):
+        if not token_info or token_info["expires_at"] <= time.time():
             raise HTTPException(
                 status_code=401,
                 detail="Invalid or expired Spotify token. Please re-authenticate.",
             )
 
-        return auth_manager.get_cached_token()
+        return token_info
+
+
+@lru_cache()
+def get_auth_service() -> SpotifyAuthService:
+    """Return the auth service shared by every router."""
+    return SpotifyAuthService()
@@ -1,15 +1,83 @@
 import json
 import os
 from collections import defaultdict
-from typing import List, Dict, Any, Set
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 import logging
+from app.core.storage import user_data_dir
+from app.models.track import Track
 
 logger = logging.getLogger("spotify_playlist_sorter")
 
+# Broad genres in order of priority/specificity; a song goes to the first match
+GENRE_PRIORITY = [
+    "Classical",
+    "Jazz",
+    "Metal",
+    "Punk",
+    "Hip Hop",
+    "R&B",
+    "Blues",
+    "Reggae",
+    "Gospel",
+    "Folk",
+    "Country",
+    "Latin",
+    "World",
+    "Electronic",
+    "Rock",
+    "Alternative",
+    "Pop",
+    "Soundtrack",
+    "Holiday",
+    "Children's",
+    "Other",
+]
+# Rank of songs none of whose genres map to a broad genre
+NO_MATCH = len(GENRE_PRIORITY)
+
+
+def _bucket_by_rank(uris: List[str], ranks: Sequence[int]) -> Dict[str, List[str]]:
+    """Group URIs into broad genres in priority order, keeping song order.
+
+    A URI seen more than once keeps its best rank and the position of the
+    first song that reached it. Unmatched songs go to "Other" unless the same
+    URI matched elsewhere.
+    """
+    if len(set(uris)) != len(uris):
+        best_match = {}  # uri -> (rank, position)
+        for position, (uri, rank) in enumerate(zip(uris, ranks)):
+            if rank == NO_MATCH:
+                continue
+            current = best_match.get(uri)
+            if current is None or rank < current[0]:
+                best_match[uri] = (rank, position)
+        keep = {position for _, position in best_match.values()}
+        kept = [
+            (uri, rank)
+            for position, (uri, rank) in enumerate(zip(uris, ranks))
+            if position in keep or (rank == NO_MATCH and uri not in best_match)
+        ]
+        uris = [uri for uri, _ in kept]
+        ranks = [rank for _, rank in kept]
+
+    buckets = [[] for _ in range(NO_MATCH + 1)]
+    for uri, rank in zip(uris, ranks):
+        buckets[rank].append(uri)
+
+    genre_playlists = defaultdict(list)
+    for rank, bucket in enumerate(buckets):
+        if bucket:
+            # Unmatched songs share the "Other" playlist after its own sub-genres
+            genre_playlists[GENRE_PRIORITY[min(rank, NO_MATCH - 1)]].extend(bucket)
+    return genre_playlists
+
 
 class GenreService:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", user_id: Optional[str] = None):
         self.data_dir = data_dir
+        # Generated playlists are kept per user; mappings are shared
+        self.output_dir = user_data_dir(user_id, data_dir) if user_id else data_dir
 
         # Ensure data directory exists
         os.makedirs(data_dir, exist_ok=True)
@@ -17,6 +85,25 @@ class GenreService:
         # Load genre mapping
         self.genre_mapping = self._load_genre_mapping()
 
+    @property
+    def genre_mapping(self) -> Dict[str, List[str]]:
+        return self._genre_mapping
+
+    @genre_mapping.setter
+    def genre_mapping(self, mapping: Dict[str, List[str]]):
+        self._genre_mapping = mapping
+        self._genre_ranks = self._compile_genre_ranks(mapping)
+
+    @staticmethod
+    def _compile_genre_ranks(mapping: Dict[str, List[str]]) -> Dict[str, int]:
+        """Build a lowercase sub-genre -> broad genre priority rank index."""
+        genre_ranks = {}
+        for rank, priority_genre in enumerate(GENRE_PRIORITY):
+            for sub_genre in mapping.get(priority_genre, []):
+                # Keep the highest priority broad genre for shared sub-genres
+                genre_ranks.setdefault(sub_genre.lower(), rank)
+        return genre_ranks
+
     def _load_genre_mapping(self):
         """Load genre mapping from JSON file or use default mapping"""
         mapping_file = os.path.join(self.data_dir, "broad_genres.json")
@@ -41,68 +128,63 @@ class GenreService:
                 "Other": [],
             }
 
-    def organize_by_broad_genre(self, song_data: List[Dict[str, Any]]):
+    def organize_by_broad_genre(
+        self, song_data: Iterable[Union[Track, Dict[str, Any]]]
+    ) -> Dict[str, List[str]]:
         """Organize songs into broad genre playlists, ensuring each song only goes into one playlist."""
-        genre_playlists = defaultdict(list)
-        processed_songs = set()  # Track which songs have been processed
-
-        # Process genres in order of priority/specificity
-        genre_priority = [
-            "Classical",
-            "Jazz",
-            "Metal",
-            "Punk",
-            "Hip Hop",
-            "R&B",
-            "Blues",
-            "Reggae",
-            "Gospel",
-            "Folk",
-            "Country",
-            "Latin",
-            "World",
-            "Electronic",
-            "Rock",
-            "Alternative",
-            "Pop",
-            "Soundtrack",
-            "Holiday",
-            "Children's",
-            "Other",
-        ]
-
         logger.info("Organizing songs by genre...")
 
-        # First pass: assign songs to specific genres based on priority
-        for priority_genre in genre_priority:
-            for song in song_data:
-                # Skip songs that are already assigned
-                if song["uri"] in processed_songs:
-                    continue
-
-                for song_genre in song["genres"]:
-                    if priority_genre in self.genre_mapping and song_genre.lower() in [
-                        g.lower() for g in self.genre_mapping[priority_genre]
-                    ]:
-                        genre_playlists[priority_genre].append(song["uri"])
-                        processed_songs.add(song["uri"])
-                        break
-
-        # Second pass: assign any remaining songs to "Other"
-        for song in song_data:
-            if song["uri"] not in processed_songs:
-                genre_playlists["Other"].append(song["uri"])
+        # Integer-code the input: every distinct genre list (usually shared by
+        # all tracks of an artist) is stored once, and each track keeps only
+        # its URI and the index of its genre list.
+        uris = []
+        track_lists = array("I")
+        list_index = {}
+        for song in map(Track.coerce, song_data):
+            genres = song.genres
+            if type(genres) is not tuple:
+                genres = tuple(genres)
+            index = list_index.get(genres)
+            if index is None:
+                index = list_index[genres] = len(list_index)
+            uris.append(song.uri)
+            track_lists.append(index)
+
+        ranks = self._rank_tracks(list_index, track_lists)
+        genre_playlists = _bucket_by_rank(uris, ranks)
 
         logger.info(
             f"Genre organization complete. Organized into {len(genre_playlists)} genre playlists."
         )
         return genre_playlists
 
+    def _rank_tracks(
+        self, list_index: Dict[Tuple[str, ...], int], track_lists: array
+    ) -> Sequence[int]:
+        """Return each track's broad genre rank, or NO_MATCH.
+
+        Each distinct genre list and each distinct genre is ranked once;
+        tracks then only look up the rank of their genre list.
+        """
+        genre_ranks = self._genre_ranks
+        rank_of = {}
+        list_ranks = []
+        for genres in list_index:
+            best = NO_MATCH
+            for genre in genres:
+                rank = rank_of.get(genre)
+                if rank is None:
+                    rank = rank_of[genre] = genre_ranks.get(genre.lower(), NO_MATCH)
+                if rank < best:
+                    best = rank
+            list_ranks.append(best)
+        return [list_ranks[index] for index in track_lists]
+
     def save_genre_playlists(self, genre_playlists):
         """Save genre playlists to JSON file"""
         try:
-            with open(os.path.join(self.data_dir, "genre_playlists.json"), "w") as f:
-                json.dump(genre_playlists, f, indent=4)
+            with open(os.path.join(self.output_dir, "genre_playlists.json"), "w") as f:
+                json.dump(genre_playlists, f, separators=(",", ":"))
             logger.info("Saved genre playlists to JSON file.")
         except Exception as e:
             logger.error(f"Error saving genre playlists: {e}")
@@ -111,7 +193,7 @@ class GenreService:
     def load_genre_playlists(self):
         """Load genre playlists from JSON file"""
         try:
-            with open(os.path.join(self.data_dir, "genre_playlists.json"), "r") as f:
+            with open(os.path.join(self.output_dir, "genre_playlists.json"), "r") as f:
                 return json.load(f)
         except FileNotFoundError:
             logger.warning("Genre playlists file not found.")
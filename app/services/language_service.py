@@ -1,15 +1,283 @@
 import json
 import os
+import re
 from collections import defaultdict
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional, Union
 import logging
+from app.core.storage import user_data_dir
+from app.models.track import Track
 
 logger = logging.getLogger("spotify_playlist_sorter")
 
+# Language indicators in artist names, song titles, and genres, in priority order.
+# English is last and is also the default when nothing else matches.
+LANGUAGE_INDICATORS = {
+    "Korean": {
+        "artists": [
+            "korean",
+            "bts",
+            "blackpink",
+            "twice",
+            "exo",
+            "nct",
+            "stray kids",
+            "ateez",
+            "seventeen",
+            "got7",
+            "itzy",
+            "aespa",
+            "red velvet",
+            "iu",
+            "bigbang",
+            "txt",
+            "g-dragon",
+            "shinee",
+            "mamamoo",
+            "monsta x",
+            "gidle",
+        ],
+        "keywords": ["k-", "(k)", "한국", "hangul", "hangeul", "seoul"],
+        "genres": ["k-pop", "k-rap", "k-rock", "k-ballad", "korean ost"],
+    },
+    "Japanese": {
+        "artists": [
+            "japanese",
+            "babymetal",
+            "one ok rock",
+            "utada",
+            "kyary",
+            "perfume",
+            "kenshi yonezu",
+            "radwimps",
+            "lisa",
+            "ado",
+            "king gnu",
+            "yoasobi",
+            "eve",
+            "reol",
+            "zutomayo",
+            "malice mizer",
+            "dir en grey",
+            "gackt",
+        ],
+        "keywords": ["j-", "(j)", "日本", "tokyo", "osaka", "jpop", "jrock"],
+        "genres": ["j-pop", "j-rock", "j-rap", "j-r&b", "japanese vgm", "anime"],
+    },
+    "Spanish": {
+        "artists": [
+            "latino",
+            "spanish",
+            "español",
+            "bad bunny",
+            "j balvin",
+            "rosalía",
+            "daddy yankee",
+            "shakira",
+            "enrique iglesias",
+            "maluma",
+            "karol g",
+            "nicky jam",
+            "luis fonsi",
+            "ozuna",
+            "anuel aa",
+            "becky g",
+            "rauw alejandro",
+        ],
+        "keywords": [
+            "latin",
+            "latino",
+            "española",
+            "español",
+            "barcelona",
+            "madrid",
+            "mexico",
+            "cuba",
+        ],
+        "genres": [
+            "reggaeton",
+            "latin pop",
+            "latin hip hop",
+            "spanish-language reggae",
+            "bachata",
+            "salsa",
+            "flamenco",
+            "spanish-language rock",
+        ],
+    },
+    "Hindi": {
+        "artists": [
+            "hindi",
+            "bollywood",
+            "indian",
+            "desi",
+            "arijit singh",
+            "neha kakkar",
+            "badshah",
+            "shreya ghoshal",
+            "yo yo honey singh",
+            "sonu nigam",
+            "a.r. rahman",
+            "kumar sanu",
+            "alka yagnik",
+            "lata mangeshkar",
+            "kishore kumar",
+        ],
+        "keywords": ["hindi", "indian", "desi", "bollywood", "mumbai", "bhangra"],
+        "genres": [
+            "bollywood",
+            "hindi pop",
+            "hindi hip hop",
+            "desi pop",
+            "filmi",
+            "bhangra",
+        ],
+    },
+    "Chinese": {
+        "artists": [
+            "mandarin",
+            "chinese",
+            "cantopop",
+            "cpop",
+            "jay chou",
+            "kris wu",
+            "jackson wang",
+            "lay zhang",
+            "mayday",
+            "jolin tsai",
+            "g.e.m.",
+            "eason chan",
+            "joey yung",
+            "jacky cheung",
+            "taiwan",
+            "hong kong",
+        ],
+        "keywords": [
+            "c-pop",
+            "mandarin",
+            "cantonese",
+            "中文",
+            "beijing",
+            "taiwan",
+            "hong kong",
+        ],
+        "genres": ["c-pop", "mandopop", "cantopop", "chinese r&b", "chinese hip hop"],
+    },
+    "French": {
+        "artists": [
+            "french",
+            "français",
+            "stromae",
+            "indila",
+            "maitre gims",
+            "zaz",
+            "aya nakamura",
+            "christine and the queens",
+            "angèle",
+            "louane",
+            "mylene farmer",
+            "alizée",
+            "pomme",
+            "edith piaf",
+            "daft punk",
+        ],
+        "keywords": ["français", "francais", "france", "paris", "chanson", "québec"],
+        "genres": ["french pop", "french jazz", "variété française", "french hip hop"],
+    },
+    "Tamil": {
+        "artists": [
+            "tamil",
+            "a.r. rahman",
+            "yuvan shankar raja",
+            "anirudh ravichander",
+            "sid sriram",
+            "ilayaraja",
+            "harris jayaraj",
+            "hipop tamizha",
+        ],
+        "keywords": ["tamil", "kollywood", "chennai", "madras"],
+        "genres": ["kollywood", "tamil pop", "tamil hip hop", "tamil film music"],
+    },
+    "English": {
+        "artists": ["english", "american", "british", "australian", "canadian"],
+        "keywords": ["uk", "usa", "london", "los angeles", "new york"],
+        "genres": ["uk garage", "uk drill", "britpop", "uk hip hop", "americana"],
+    },
+}
+
+LANGUAGE_PRIORITY = list(LANGUAGE_INDICATORS)
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Render a character trie as a regex that matches the longest entry."""
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if "" in node else body
+
+
+def _indicator_ranks(fields: List[str]) -> Dict[str, int]:
+    """Map each indicator string in ``fields`` to its best language rank."""
+    ranks = {}
+    for rank, indicators in enumerate(LANGUAGE_INDICATORS.values()):
+        for field in fields:
+            for text in indicators[field]:
+                ranks.setdefault(text, rank)
+    return ranks
+
+
+def _compile_indicators(fields: List[str]):
+    """Compile the indicator strings in ``fields`` into one trie-shaped regex.
+
+    At any position the regex matches the longest indicator, and every
+    other indicator starting there is a prefix of it. So each indicator is
+    mapped to the best language rank among its indicator prefixes.
+    """
+    ranks = _indicator_ranks(fields)
+    trie = {}
+    for text in ranks:
+        node = trie
+        for char in text:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    prefix_ranks = {
+        text: min(ranks.get(text[:end], rank) for end in range(1, len(text) + 1))
+        for text, rank in ranks.items()
+    }
+    return re.compile(_trie_pattern(trie)), prefix_ranks
+
+
+# Artist names are checked against artist indicators and keywords, song
+# names against keywords only, and genres must match exactly
+_ARTIST_PATTERN, _ARTIST_RANKS = _compile_indicators(["artists", "keywords"])
+_SONG_PATTERN, _SONG_RANKS = _compile_indicators(["keywords"])
+_GENRE_RANKS = _indicator_ranks(["genres"])
+
+
+def _best_rank(pattern, ranks: Dict[str, int], text: str, best: int) -> int:
+    """Return the lowest language rank of any indicator found in ``text``."""
+    match = pattern.search(text)
+    while match:
+        rank = ranks[match.group()]
+        if rank < best:
+            best = rank
+            if best == 0:
+                break
+        # Restart one character later so overlapping indicators are seen
+        match = pattern.search(text, match.start() + 1)
+    return best
+
 
 class LanguageService:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", user_id: Optional[str] = None):
         self.data_dir = data_dir
+        # Generated playlists are kept per user; mappings are shared
+        self.output_dir = user_data_dir(user_id, data_dir) if user_id else data_dir
 
         # Ensure data directory exists
         os.makedirs(data_dir, exist_ok=True)
@@ -17,6 +285,19 @@ class LanguageService:
         # Load language mapping
         self.language_mapping = self._load_language_mapping()
 
+    @property
+    def language_mapping(self) -> Dict[str, List[str]]:
+        return self._language_mapping
+
+    @language_mapping.setter
+    def language_mapping(self, mapping: Dict[str, List[str]]):
+        self._language_mapping = mapping
+        # Lowercase genre -> first language in mapping order that lists it
+        self._mapping_languages = {}
+        for lang, lang_genres in mapping.items():
+            for genre in lang_genres:
+                self._mapping_languages.setdefault(genre.lower(), lang)
+
     def _load_language_mapping(self):
         """Load language mapping from JSON file or use default mapping"""
         mapping_file = os.path.join(self.data_dir, "language_mapping.json")
@@ -38,289 +319,49 @@ class LanguageService:
                 "Other Languages": [],
             }
 
-    def detect_languages(self, song_data: List[Dict[str, Any]]):
+    def detect_languages(self, song_data: Iterable[Union[Track, Dict[str, Any]]]):
         """Detect languages from songs using comprehensive language detection signals."""
         language_data = defaultdict(list)
 
-        # Language indicators in artist names, song titles, and genres
-        language_indicators = {
-            "Korean": {
-                "artists": [
-                    "korean",
-                    "bts",
-                    "blackpink",
-                    "twice",
-                    "exo",
-                    "nct",
-                    "stray kids",
-                    "ateez",
-                    "seventeen",
-                    "got7",
-                    "itzy",
-                    "aespa",
-                    "red velvet",
-                    "iu",
-                    "bigbang",
-                    "txt",
-                    "g-dragon",
-                    "shinee",
-                    "mamamoo",
-                    "monsta x",
-                    "gidle",
-                ],
-                "keywords": ["k-", "(k)", "한국", "hangul", "hangeul", "seoul"],
-                "genres": ["k-pop", "k-rap", "k-rock", "k-ballad", "korean ost"],
-            },
-            "Japanese": {
-                "artists": [
-                    "japanese",
-                    "babymetal",
-                    "one ok rock",
-                    "utada",
-                    "kyary",
-                    "perfume",
-                    "kenshi yonezu",
-                    "radwimps",
-                    "lisa",
-                    "ado",
-                    "king gnu",
-                    "yoasobi",
-                    "eve",
-                    "reol",
-                    "zutomayo",
-                    "malice mizer",
-                    "dir en grey",
-                    "gackt",
-                ],
-                "keywords": ["j-", "(j)", "日本", "tokyo", "osaka", "jpop", "jrock"],
-                "genres": [
-                    "j-pop",
-                    "j-rock",
-                    "j-rap",
-                    "j-r&b",
-                    "japanese vgm",
-                    "anime",
-                ],
-            },
-            "Spanish": {
-                "artists": [
-                    "latino",
-                    "spanish",
-                    "español",
-                    "bad bunny",
-                    "j balvin",
-                    "rosalía",
-                    "daddy yankee",
-                    "shakira",
-                    "enrique iglesias",
-                    "maluma",
-                    "karol g",
-                    "nicky jam",
-                    "luis fonsi",
-                    "ozuna",
-                    "anuel aa",
-                    "becky g",
-                    "rauw alejandro",
-                ],
-                "keywords": [
-                    "latin",
-                    "latino",
-                    "española",
-                    "español",
-                    "barcelona",
-                    "madrid",
-                    "mexico",
-                    "cuba",
-                ],
-                "genres": [
-                    "reggaeton",
-                    "latin pop",
-                    "latin hip hop",
-                    "spanish-language reggae",
-                    "bachata",
-                    "salsa",
-                    "flamenco",
-                    "spanish-language rock",
-                ],
-            },
-            "Hindi": {
-                "artists": [
-                    "hindi",
-                    "bollywood",
-                    "indian",
-                    "desi",
-                    "arijit singh",
-                    "neha kakkar",
-                    "badshah",
-                    "shreya ghoshal",
-                    "yo yo honey singh",
-                    "sonu nigam",
-                    "a.r. rahman",
-                    "kumar sanu",
-                    "alka yagnik",
-                    "lata mangeshkar",
-                    "kishore kumar",
-                ],
-                "keywords": [
-                    "hindi",
-                    "indian",
-                    "desi",
-                    "bollywood",
-                    "mumbai",
-                    "bhangra",
-                ],
-                "genres": [
-                    "bollywood",
-                    "hindi pop",
-                    "hindi hip hop",
-                    "desi pop",
-                    "filmi",
-                    "bhangra",
-                ],
-            },
-            "Chinese": {
-                "artists": [
-                    "mandarin",
-                    "chinese",
-                    "cantopop",
-                    "cpop",
-                    "jay chou",
-                    "kris wu",
-                    "jackson wang",
-                    "lay zhang",
-                    "mayday",
-                    "jolin tsai",
-                    "g.e.m.",
-                    "eason chan",
-                    "joey yung",
-                    "jacky cheung",
-                    "taiwan",
-                    "hong kong",
-                ],
-                "keywords": [
-                    "c-pop",
-                    "mandarin",
-                    "cantonese",
-                    "中文",
-                    "beijing",
-                    "taiwan",
-                    "hong kong",
-                ],
-                "genres": [
-                    "c-pop",
-                    "mandopop",
-                    "cantopop",
-                    "chinese r&b",
-                    "chinese hip hop",
-                ],
-            },
-            "French": {
-                "artists": [
-                    "french",
-                    "français",
-                    "stromae",
-                    "indila",
-                    "maitre gims",
-                    "zaz",
-                    "aya nakamura",
-                    "christine and the queens",
-                    "angèle",
-                    "louane",
-                    "mylene farmer",
-                    "alizée",
-                    "pomme",
-                    "edith piaf",
-                    "daft punk",
-                ],
-                "keywords": [
-                    "français",
-                    "francais",
-                    "france",
-                    "paris",
-                    "chanson",
-                    "québec",
-                ],
-                "genres": [
-                    "french pop",
-                    "french jazz",
-                    "variété française",
-                    "french hip hop",
-                ],
-            },
-            "Tamil": {
-                "artists": [
-                    "tamil",
-                    "a.r. rahman",
-                    "yuvan shankar raja",
-                    "anirudh ravichander",
-                    "sid sriram",
-                    "ilayaraja",
-                    "harris jayaraj",
-                    "hipop tamizha",
-                ],
-                "keywords": ["tamil", "kollywood", "chennai", "madras"],
-                "genres": [
-                    "kollywood",
-                    "tamil pop",
-                    "tamil hip hop",
-                    "tamil film music",
-                ],
-            },
-        }
-
-        # Add English as default with its own indicators
-        language_indicators["English"] = {
-            "artists": ["english", "american", "british", "australian", "canadian"],
-            "keywords": ["uk", "usa", "london", "los angeles", "new york"],
-            "genres": ["uk garage", "uk drill", "britpop", "uk hip hop", "americana"],
-        }
-
         logger.info("Detecting languages for songs...")
 
+        mapping_languages = self._mapping_languages
+        no_match = len(LANGUAGE_PRIORITY)
+
         # Process each song
-        for song in song_data:
-            song_name = song["name"].lower()
-            artist_name = song["artist"].lower()
-            song_genres = [genre.lower() for genre in song["genres"]]
-            language_found = False
+        for song in map(Track.coerce, song_data):
+            song_genres = [genre.lower() for genre in song.genres]
 
             # First check: Check genre-based language signals from language_mapping
-            for genre in song_genres:
-                for lang, lang_genres in self.language_mapping.items():
-                    if genre in [g.lower() for g in lang_genres]:
-                        language_data[lang].append(song["uri"])
-                        language_found = True
-                        break
-                if language_found:
-                    break
-
-            # Second check: Use the comprehensive language indicators
-            if not language_found:
-                for language, indicators in language_indicators.items():
-                    # Check artist name against language-specific artist indicators
-                    if any(artist in artist_name for artist in indicators["artists"]):
-                        language_data[language].append(song["uri"])
-                        language_found = True
-                        break
-
-                    # Check song name and artist name against language keywords
-                    if any(
-                        keyword in artist_name or keyword in song_name
-                        for keyword in indicators["keywords"]
-                    ):
-                        language_data[language].append(song["uri"])
-                        language_found = True
-                        break
-
-                    # Check genres against language-specific genre indicators (as a backup)
-                    if any(genre in song_genres for genre in indicators["genres"]):
-                        language_data[language].append(song["uri"])
-                        language_found = True
-                        break
+            language = next(
+                (
+                    mapping_languages[genre]
+                    for genre in song_genres
+                    if genre in mapping_languages
+                ),
+                None,
+            )
+
+            # Second check: the first language in priority order with any
+            # artist, keyword or genre indicator for this song
+            if language is None:
+                rank = min(
+                    (_GENRE_RANKS[genre] for genre in song_genres if genre in _GENRE_RANKS),
+                    default=no_match,
+                )
+                if rank:
+                    rank = _best_rank(
+                        _ARTIST_PATTERN, _ARTIST_RANKS, song.artist.lower(), rank
+                    )
+                if rank:
+                    rank = _best_rank(
+                        _SONG_PATTERN, _SONG_RANKS, song.name.lower(), rank
+                    )
+                if rank < no_match:
+                    language = LANGUAGE_PRIORITY[rank]
 
             # Last resort: If still not found, categorize as "English" (most common default)
-            if not language_found:
-                language_data["English"].append(song["uri"])
+            language_data[language or "English"].append(song.uri)
 
         logger.info(
             f"Language detection complete. Found tracks in {len(language_data)} languages."
@@ -330,8 +371,8 @@ class LanguageService:
     def save_language_data(self, language_data):
         """Save language data to JSON file"""
         try:
-            with open(os.path.join(self.data_dir, "language_data.json"), "w") as f:
-                json.dump(language_data, f, indent=4)
+            with open(os.path.join(self.output_dir, "language_data.json"), "w") as f:
+                json.dump(language_data, f, separators=(",", ":"))
             logger.info("Saved language data to JSON file.")
         except Exception as e:
             logger.error(f"Error saving language data: {e}")
@@ -340,7 +381,7 @@ class LanguageService:
     def load_language_data(self):
         """Load language data from JSON file"""
         try:
-            with open(os.path.join(self.data_dir, "language_data.json"), "r") as f:
+            with open(os.path.join(self.output_dir, "language_data.json"), "r") as f:
                 return json.load(f)
         except FileNotFoundError:
             logger.warning("Language data file not found.")
@@ -1,24 +1,118 @@
 import logging
-from typing import Dict, List, Set
-import time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.cache import PlaylistCache
+from app.core.jobs import ProgressCallback
+from app.core.projection import (
+    PLAYLIST_ITEMS_FIELDS,
+    PLAYLIST_SNAPSHOT_FIELDS,
+    PLAYLISTS_FIELDS,
+    project,
+)
+from app.core.rate_limiter import RateLimiter, get_rate_limiter
+from app.core.storage import USERS_DIR, sharded_path
 
 logger = logging.getLogger("spotify_playlist_sorter")
 
+# Playlists written at the same time in parallel mode
+PLAYLIST_WRITE_WORKERS = 4
+# Most tracks Spotify accepts in one playlist add or remove request
+PLAYLIST_WRITE_BATCH = 100
+PLAYLIST_CACHE_FILE = "playlist_cache.json"
+
+
+@lru_cache(maxsize=256)
+def get_playlist_cache(user_id: str, data_dir: str = "data") -> PlaylistCache:
+    """Return the playlist-contents cache of a user, shared across jobs."""
+    return PlaylistCache(
+        sharded_path(os.path.join(data_dir, USERS_DIR), user_id, PLAYLIST_CACHE_FILE)
+    )
+
 
 class PlaylistService:
-    def __init__(self, spotify_client):
+    def __init__(
+        self,
+        spotify_client,
+        rate_limiter: Optional[RateLimiter] = None,
+        playlist_cache: Optional[PlaylistCache] = None,
+        data_dir: str = "data",
+    ):
         self.sp = spotify_client
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.data_dir = data_dir
+        # Resolved per user once the playlist index knows who the user is
+        self.playlist_cache = playlist_cache
+        self.user_id = None
+        self.playlist_index = None  # playlist name -> playlist ID
+        self.playlist_snapshots = {}  # playlist ID -> snapshot ID
+        self._index_lock = threading.Lock()
 
-    def get_existing_playlist_tracks(self, playlist_id: str) -> Set[str]:
-        """Get existing tracks in a playlist."""
+    def build_playlist_index(self, limit: int = 50) -> Dict[str, str]:
+        """Index every playlist of the current user by name, across all pages."""
+        self.user_id = self.rate_limiter.call(self.sp.current_user)["id"]
+        if self.playlist_cache is None:
+            self.playlist_cache = get_playlist_cache(self.user_id, self.data_dir)
+        playlist_index = {}
+        playlist_snapshots = {}
+        offset = 0
+
+        while True:
+            results = project(
+                self.rate_limiter.call(
+                    self.sp.current_user_playlists, limit=limit, offset=offset
+                ),
+                PLAYLISTS_FIELDS,
+            )
+            for playlist in results["items"]:
+                # Keep the first playlist when several share a name
+                playlist_index.setdefault(playlist["name"], playlist["id"])
+                playlist_snapshots[playlist["id"]] = playlist.get("snapshot_id")
+
+            if len(results["items"]) < limit or not results.get("next"):
+                break
+            offset += limit
+
+        self.playlist_index = playlist_index
+        self.playlist_snapshots = playlist_snapshots
+        logger.info(f"Indexed {len(playlist_index)} existing playlists.")
+        return playlist_index
+
+    def get_existing_playlist_tracks(
+        self, playlist_id: str, snapshot_id: Optional[str] = None
+    ) -> Optional[Set[str]]:
+        """Get existing tracks in a playlist, or None if they could not be read.
+
+        With a playlist cache, the URIs cached at the playlist's current
+        ``snapshot_id`` are returned without reading the items; an unknown
+        snapshot is looked up with one metadata call. Items are read with a
+        ``fields`` projection, so only track URIs are transferred.
+        """
         tracks = set()
         offset = 0
         limit = 100
+        cache = self.playlist_cache
 
         try:
+            if cache is not None:
+                if snapshot_id is None:
+                    snapshot_id = self.rate_limiter.call(
+                        self.sp.playlist, playlist_id, fields=PLAYLIST_SNAPSHOT_FIELDS
+                    )["snapshot_id"]
+                    self.playlist_snapshots[playlist_id] = snapshot_id
+                cached = cache.get(playlist_id, snapshot_id)
+                if cached is not None:
+                    return set(cached)
+
             while True:
-                results = self.sp.playlist_items(
-                    playlist_id, offset=offset, limit=limit
+                results = self.rate_limiter.call(
+                    self.sp.playlist_items,
+                    playlist_id,
+                    fields=PLAYLIST_ITEMS_FIELDS,
+                    offset=offset,
+                    limit=limit,
                 )
 
                 # Add valid tracks to the set
@@ -26,120 +120,247 @@ class PlaylistService:
                     if item["track"] and "uri" in item["track"]:
                         tracks.add(item["track"]["uri"])
 
-                if len(results["items"]) < limit:
+                if len(results["items"]) < limit or not results.get("next"):
                     break
 
                 offset += limit
 
+            if cache is not None:
+                cache.set(playlist_id, snapshot_id, tracks)
             return tracks
         except Exception as e:
             logger.error(f"Error getting playlist tracks: {str(e)}")
-            return set()
+            # Never keep contents for a playlist that could not be read
+            if cache is not None:
+                cache.discard(playlist_id)
+            return None
 
     def add_tracks_in_batches(
-        self, playlist_id: str, uris: List[str], batch_size: int = 100
-    ):
-        """Add tracks to playlist in batches to avoid API limits."""
+        self, playlist_id: str, uris: List[str], batch_size: int = PLAYLIST_WRITE_BATCH
+    ) -> Optional[str]:
+        """Add tracks to playlist in batches to avoid API limits.
+
+        Returns the playlist's snapshot ID after the last batch, or None if
+        any batch failed.
+        """
+        return self._write_in_batches(
+            self.sp.playlist_add_items, playlist_id, uris, batch_size, "Added"
+        )
+
+    def remove_tracks_in_batches(
+        self, playlist_id: str, uris: List[str], batch_size: int = PLAYLIST_WRITE_BATCH
+    ) -> Optional[str]:
+        """Remove every occurrence of tracks from a playlist in batches.
+
+        Returns the playlist's snapshot ID after the last batch, or None if
+        any batch failed.
+        """
+        return self._write_in_batches(
+            self.sp.playlist_remove_all_occurrences_of_items,
+            playlist_id,
+            uris,
+            batch_size,
+            "Removed",
+        )
+
+    def _write_in_batches(
+        self, write, playlist_id: str, uris: List[str], batch_size: int, verb: str
+    ) -> Optional[str]:
+        snapshot_id = None
+        failed = False
         for i in range(0, len(uris), batch_size):
             batch = uris[i : i + batch_size]
             try:
-                self.sp.playlist_add_items(playlist_id, batch)
-                logger.info(f"Added batch of {len(batch)} songs to playlist.")
-                # Add a small delay to avoid rate limiting
-                time.sleep(1)
+                result = self.rate_limiter.call(write, playlist_id, batch)
+                snapshot_id = (result or {}).get("snapshot_id")
+                logger.info(f"{verb} batch of {len(batch)} songs.")
             except Exception as e:
-                logger.error(f"Error adding tracks: {str(e)}")
+                logger.error(f"Error writing playlist tracks: {str(e)}")
+                failed = True
+        return None if failed else snapshot_id
 
     def create_or_update_playlist(
         self, name: str, description: str, uris: List[str]
     ) -> str:
-        """Create or update a playlist with the given name and add tracks."""
+        """Create a playlist or reconcile it to exactly the given tracks.
+
+        Tracks missing from the playlist are added and tracks no longer in
+        ``uris`` are removed, 100 per request. Contents come from the
+        playlist cache while the snapshot ID from the playlist index is
+        current, so an unchanged library costs no calls at all.
+        """
         if not uris:
             logger.warning(f"No tracks to add to playlist '{name}'")
             return None
 
-        user_id = self.sp.current_user()["id"]
+        if self.playlist_index is None:
+            self.build_playlist_index()
 
-        # Check if playlist already exists
-        playlists = self.sp.current_user_playlists()
-        playlist_id = None
+        target = list(dict.fromkeys(uris))
 
-        for playlist in playlists["items"]:
-            if playlist["name"] == name:
-                playlist_id = playlist["id"]
-                logger.info(f"Found existing playlist: {name}")
-                break
+        # Check if playlist already exists
+        playlist_id = self.playlist_index.get(name)
+        if playlist_id:
+            logger.info(f"Found existing playlist: {name}")
+            existing_tracks = self.get_existing_playlist_tracks(
+                playlist_id, self.playlist_snapshots.get(playlist_id)
+            )
+            if existing_tracks is None:
+                # Without the current contents every track would be re-added
+                logger.error(f"Skipping playlist '{name}': could not read its tracks")
+                return None
+            snapshot_id = self.playlist_snapshots.get(playlist_id)
 
         # Create playlist if it doesn't exist
         if not playlist_id:
             try:
-                result = self.sp.user_playlist_create(
-                    user=user_id, name=name, public=True, description=description
+                result = self.rate_limiter.call(
+                    self.sp.user_playlist_create,
+                    user=self.user_id,
+                    name=name,
+                    public=True,
+                    description=description,
                 )
                 playlist_id = result["id"]
+                snapshot_id = result.get("snapshot_id")
+                with self._index_lock:
+                    self.playlist_index[name] = playlist_id
                 logger.info(f"Created new playlist: {name}")
             except Exception as e:
                 logger.error(f"Error creating playlist: {str(e)}")
                 return None
+            existing_tracks = set()
 
-        # Get existing tracks to avoid duplicates
-        existing_tracks = self.get_existing_playlist_tracks(playlist_id)
-        new_uris = [uri for uri in uris if uri not in existing_tracks]
+        # Diff against the target so only the difference is written
+        target_set = set(target)
+        to_remove = sorted(uri for uri in existing_tracks if uri not in target_set)
+        to_add = [uri for uri in target if uri not in existing_tracks]
 
-        if new_uris:
-            logger.info(f"Adding {len(new_uris)} new tracks to '{name}'")
-            self.add_tracks_in_batches(playlist_id, new_uris)
-        else:
-            logger.info(f"No new tracks to add to '{name}'")
+        failed = False
+        if to_remove:
+            logger.info(f"Removing {len(to_remove)} tracks from '{name}'")
+            snapshot_id = self.remove_tracks_in_batches(playlist_id, to_remove)
+            failed = snapshot_id is None
+        if to_add:
+            logger.info(f"Adding {len(to_add)} new tracks to '{name}'")
+            snapshot_id = self.add_tracks_in_batches(playlist_id, to_add)
+            failed = failed or snapshot_id is None
+        if not to_add and not to_remove:
+            logger.info(f"Playlist '{name}' is already up to date")
 
+        # The contents were read or served from the cache above, so the cache
+        # now holds the target; a failed write leaves the playlist to be
+        # re-read on the next run
+        if self.playlist_cache is not None:
+            snapshot_id = None if failed else snapshot_id
+            self.playlist_cache.set(playlist_id, snapshot_id, target)
         return playlist_id
 
     def create_genre_playlists(
-        self, genre_playlists: Dict[str, List[str]]
+        self,
+        genre_playlists: Dict[str, List[str]],
+        parallel: bool = False,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> Dict[str, Dict]:
         """Create playlists for each genre."""
-        created_playlists = {}
-
-        for genre, uris in genre_playlists.items():
-            if not uris:  # Skip empty playlists
-                continue
-
-            name = f"{genre} Playlist"
-            description = (
-                f"Songs in the {genre} genre, organized by Spotify Playlist Sorter"
-            )
-
-            playlist_id = self.create_or_update_playlist(name, description, uris)
-
-            if playlist_id:
-                created_playlists[genre] = {
-                    "id": playlist_id,
-                    "name": name,
-                    "track_count": len(uris),
-                }
-
-        return created_playlists
+        return self._create_playlists(
+            {
+                genre: (
+                    f"{genre} Playlist",
+                    f"Songs in the {genre} genre, organized by Spotify Playlist Sorter",
+                    uris,
+                )
+                for genre, uris in genre_playlists.items()
+            },
+            parallel,
+            on_progress,
+        )
 
     def create_language_playlists(
-        self, language_playlists: Dict[str, List[str]]
+        self,
+        language_playlists: Dict[str, List[str]],
+        parallel: bool = False,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> Dict[str, Dict]:
         """Create playlists for each language."""
+        return self._create_playlists(
+            {
+                language: (
+                    f"{language} Playlist",
+                    f"Songs in {language}, organized by Spotify Playlist Sorter",
+                    uris,
+                )
+                for language, uris in language_playlists.items()
+            },
+            parallel,
+            on_progress,
+        )
+
+    def _create_playlists(
+        self,
+        playlists: Dict[str, Tuple[str, str, List[str]]],
+        parallel: bool,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Dict]:
+        """Create or update playlists keyed by group, one after another or concurrently.
+
+        In parallel mode playlists are written by a bounded pool sharing the
+        rate limiter, and a failing playlist is reported with an ``error``
+        entry instead of aborting the others. ``on_progress`` is called with
+        the playlists written so far and the total as each one finishes.
+        """
         created_playlists = {}
+        self.build_playlist_index()
 
-        for language, uris in language_playlists.items():
-            if not uris:  # Skip empty playlists
-                continue
+        # Skip empty playlists
+        playlists = {key: value for key, value in playlists.items() if value[2]}
 
-            name = f"{language} Playlist"
-            description = f"Songs in {language}, organized by Spotify Playlist Sorter"
+        if not parallel:
+            for done, (key, (name, description, uris)) in enumerate(
+                playlists.items(), 1
+            ):
+                playlist_id = self.create_or_update_playlist(name, description, uris)
+                if on_progress:
+                    on_progress(done, len(playlists))
+                if playlist_id:
+                    created_playlists[key] = {
+                        "id": playlist_id,
+                        "name": name,
+                        "track_count": len(uris),
+                    }
+            self._save_playlist_cache()
+            return created_playlists
 
-            playlist_id = self.create_or_update_playlist(name, description, uris)
+        with ThreadPoolExecutor(max_workers=PLAYLIST_WRITE_WORKERS) as executor:
+            futures = {
+                key: executor.submit(
+                    self.create_or_update_playlist, name, description, uris
+                )
+                for key, (name, description, uris) in playlists.items()
+            }
+            if on_progress:
+                for done, _ in enumerate(as_completed(futures.values()), 1):
+                    on_progress(done, len(playlists))
 
+        # Collect in input order so results are deterministic
+        for key, future in futures.items():
+            name, _, uris = playlists[key]
+            try:
+                playlist_id = future.result()
+            except Exception as e:
+                logger.error(f"Error writing playlist '{name}': {str(e)}")
+                created_playlists[key] = {"name": name, "error": str(e)}
+                continue
             if playlist_id:
-                created_playlists[language] = {
+                created_playlists[key] = {
                     "id": playlist_id,
                     "name": name,
                     "track_count": len(uris),
                 }
 
+        self._save_playlist_cache()
         return created_playlists
+
+    def _save_playlist_cache(self):
+        if self.playlist_cache is not None:
+            self.playlist_cache.save()
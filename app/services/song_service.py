@@ -1,36 +1,106 @@
 import json
 import os
-from typing import List, Dict, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
-import time
-from spotipy.exceptions import SpotifyException
+from functools import lru_cache
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.core.cache import ArtistCache
+from app.core.jobs import ProgressCallback
+from app.core.library_index import LibraryIndex
+from app.core.projection import ARTISTS_FIELDS, SAVED_TRACKS_FIELDS, project
+from app.core.rate_limiter import RateLimiter, get_rate_limiter
+from app.core.snapshot import LibrarySnapshot, write_snapshot
+from app.core.storage import atomic_write_json, user_data_dir
+from app.models.track import Track, intern_all
+from app.services.genre_service import GenreService
+from app.services.language_service import LanguageService
 
 logger = logging.getLogger("spotify_playlist_sorter")
 
 DATA_DIR = "data"
 CACHE_FILE = os.path.join(DATA_DIR, "artist_cache.json")
+SNAPSHOT_FILE = "song_data.snap"
+
+# Upper bound on concurrent page requests when fetching liked songs
+MAX_FETCH_WORKERS = 8
+# Largest page Spotify serves for the saved-tracks endpoint
+SAVED_TRACKS_PAGE_LIMIT = 50
+
+
+@lru_cache()
+def get_artist_cache() -> ArtistCache:
+    """Return the process-wide artist-genre cache shared across requests."""
+    return ArtistCache(CACHE_FILE)
 
 
 class SongService:
-    def __init__(self, spotify_client, data_dir: str = "data"):
+    def __init__(
+        self,
+        spotify_client,
+        data_dir: str = "data",
+        artist_cache: Optional[ArtistCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        user_id: Optional[str] = None,
+    ):
         self.sp = spotify_client
-        self.data_dir = data_dir
+        self.user_id = user_id
+        # Shared mappings live here; classifiers built for this user use it too
+        self.base_data_dir = data_dir
+        # Each user's snapshots live in their own sharded directory
+        self.data_dir = user_data_dir(user_id, data_dir) if user_id else data_dir
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.artist_cache = (
+            artist_cache if artist_cache is not None else get_artist_cache()
+        )
 
         # Ensure data directory exists
-        os.makedirs(data_dir, exist_ok=True)
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def _saved_tracks_page(self, limit: int, offset: int) -> Dict:
+        """Fetch one page of saved tracks, slimmed to the fields the app reads."""
+        return project(
+            self.rate_limiter.call(
+                self.sp.current_user_saved_tracks, limit=limit, offset=offset
+            ),
+            SAVED_TRACKS_FIELDS,
+        )
+
+    def fetch_liked_songs(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        concurrent: bool = False,
+        max_workers: int = MAX_FETCH_WORKERS,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """Fetch all liked songs from Spotify.
 
-    def fetch_liked_songs(self, limit: int = 50, offset: int = 0) -> Dict:
-        """Fetch all liked songs from Spotify."""
+        With ``concurrent=True`` the first page is used to read the library
+        ``total`` and the remaining pages are fetched in parallel. The result
+        carries the ``total`` Spotify reported; fewer items than that means a
+        page failed and the fetch stopped early. ``on_progress`` is called
+        with the songs fetched so far and the total after every page.
+        """
         if not isinstance(limit, int) or not isinstance(offset, int):
             raise ValueError("Limit and offset must be integers.")
 
+        if concurrent:
+            return self._fetch_liked_songs_concurrent(
+                limit, offset, max_workers, on_progress
+            )
+
         liked_songs = []
+        total = None
         logger.info("Fetching liked songs from Spotify...")
 
         while True:
             try:
-                results = self.sp.current_user_saved_tracks(limit=limit, offset=offset)
+                results = self._saved_tracks_page(limit, offset)
                 liked_songs.extend(results["items"])
+                total = results.get("total")
+                if on_progress:
+                    on_progress(len(liked_songs), total or 0)
 
                 if len(results["items"]) < limit:
                     break
@@ -42,95 +112,416 @@ class SongService:
                 break
 
         logger.info(f"Fetched {len(liked_songs)} liked songs in total.")
-        return {"items": liked_songs}
+        return {"items": liked_songs, "total": total}
+
+    def _fetch_liked_songs_concurrent(
+        self,
+        limit: int,
+        offset: int,
+        max_workers: int,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """Fetch liked songs by planning every page offset from the first page."""
+        logger.info("Fetching liked songs from Spotify concurrently...")
 
-    def load_artist_cache() -> Dict:
-        """Load artist cache from file."""
         try:
-            if os.path.exists(CACHE_FILE):
-                with open(CACHE_FILE, "r") as f:
-                    return json.load(f)
+            first_page = self._saved_tracks_page(limit, offset)
         except Exception as e:
-            logger.error(f"Error loading artist cache: {e}")
-        return {}
+            logger.error(f"Error fetching liked songs: {e}")
+            return {"items": [], "total": None}
+
+        total = first_page.get("total") or 0
+        offsets = list(range(offset + limit, total, limit))
+        pages = {offset: first_page["items"]}
+        fetched = len(first_page["items"])
+        if on_progress:
+            on_progress(fetched, total)
+
+        if offsets and len(first_page["items"]) == limit:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._saved_tracks_page, limit, page): page
+                    for page in offsets
+                }
+                for future in as_completed(futures):
+                    page = futures[future]
+                    try:
+                        pages[page] = future.result()["items"]
+                        fetched += len(pages[page])
+                        if on_progress:
+                            on_progress(fetched, total)
+                    except Exception as e:
+                        logger.error(f"Error fetching liked songs at offset {page}: {e}")
+                        # Stop early: drop every page that has not started yet
+                        for pending in futures:
+                            pending.cancel()
+                        break
+
+            # Pick up pages that were still in flight when we stopped
+            for future, page in futures.items():
+                if page not in pages and future.done() and not future.cancelled():
+                    if future.exception() is None:
+                        pages[page] = future.result()["items"]
+
+        # Reassemble in offset order, stopping at the first gap or short page
+        # so the result matches what the sequential fetch would have returned
+        liked_songs = []
+        for page in [offset] + offsets:
+            if page not in pages:
+                break
+            liked_songs.extend(pages[page])
+            if len(pages[page]) < limit:
+                break
+
+        logger.info(f"Fetched {len(liked_songs)} liked songs in total.")
+        return {"items": liked_songs, "total": total}
+
+    def library_version(self) -> str:
+        """Fingerprint the liked-songs library with a single one-track request.
+
+        Saved tracks come back newest first, so the total plus the newest
+        track and its ``added_at`` change whenever a song is liked or removed.
+        """
+        results = self._saved_tracks_page(1, 0)
+        newest = results["items"][0] if results["items"] else {}
+        track_id = (newest.get("track") or {}).get("id", "")
+        return f"{results.get('total') or 0}:{newest.get('added_at', '')}:{track_id}"
+
+    def sync_liked_songs(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 50,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """Incrementally sync liked songs against the stored library for a user.
+
+        Saved tracks come back newest first, so only pages until the stored
+        ``added_at`` watermark are fetched. The library is fetched in full if
+        the stored and new tracks don't add up to the library total, or if the
+        rest of the page after the first known track differs from the stored
+        library, which catches tracks swapped out while the total stayed the
+        same. A fetch that fails part way is never stored. ``on_progress`` is
+        called with the songs read so far and the library total after every
+        page.
+        """
+        if user_id is None:
+            user_id = self.user_id
+        if user_id is None:
+            user_id = self.rate_limiter.call(self.sp.current_user)["id"]
+
+        state = self.load_library_state(user_id)
+        if not state:
+            logger.info("No stored library found, fetching all liked songs.")
+            return self._resync_liked_songs(user_id, limit, on_progress)
+
+        watermark = state["newest_added_at"]
+        known_ids = {item["track"]["id"] for item in state["items"]}
+        new_items = []
+        overlap = None  # IDs from the first known track to the end of its page
+        offset = 0
 
-    def save_artist_cache(cache: Dict):
-        """Save artist cache to file."""
         try:
-            with open(CACHE_FILE, "w") as f:
-                json.dump(cache, f)
+            while True:
+                results = self._saved_tracks_page(limit, offset)
+                total = results["total"]
+                page = results["items"]
+                if on_progress:
+                    on_progress(offset + len(page), total)
+                for position, item in enumerate(page):
+                    if item["added_at"] <= watermark and item["track"]["id"] in known_ids:
+                        overlap = [item["track"]["id"] for item in page[position:]]
+                        break
+                    new_items.append(item)
+
+                if overlap is not None or len(page) < limit:
+                    break
+                offset += limit
         except Exception as e:
-            logger.error(f"Error saving artist cache: {e}")
+            logger.error(f"Error syncing liked songs: {e}")
+            return {"items": state["items"]}
+
+        # Re-liked tracks come back with a new added_at, so drop their old entry
+        new_ids = {item["track"]["id"] for item in new_items}
+        known = [item for item in state["items"] if item["track"]["id"] not in new_ids]
+        items = new_items + known
+
+        if overlap is not None and overlap != [
+            item["track"]["id"] for item in known[: len(overlap)]
+        ]:
+            logger.info(
+                "Stored library differs from Spotify, fetching all liked songs."
+            )
+            return self._resync_liked_songs(user_id, limit, on_progress)
+        if len(items) != total:
+            logger.info(
+                f"Stored library has {len(items)} tracks but Spotify reports "
+                f"{total}, fetching all liked songs."
+            )
+            return self._resync_liked_songs(user_id, limit, on_progress)
+        if not new_items:
+            logger.info("Liked songs are up to date.")
+            return {"items": items}
+
+        logger.info(f"Synced {len(new_items)} new liked songs.")
+        self.save_library_state(user_id, items)
+        return {"items": items}
 
-    def group_songs_by_genre(self, liked_songs: Dict) -> Dict[str, List[str]]:
-        """Group songs by genre."""
-        genre_map = {}
-        artist_ids = [
-            item["track"]["artists"][0]["id"] for item in liked_songs["items"]
-        ]  # Extract all artist IDs
+    def _resync_liked_songs(
+        self, user_id: str, limit: int, on_progress: Optional[ProgressCallback] = None
+    ) -> Dict:
+        """Fetch the whole library, storing it only if every page arrived."""
+        liked_songs = self.fetch_liked_songs(
+            limit=limit, concurrent=True, on_progress=on_progress
+        )
+        if len(liked_songs["items"]) == liked_songs["total"]:
+            self.save_library_state(user_id, liked_songs["items"])
+        else:
+            logger.warning("Liked songs fetch was incomplete, library not stored.")
+        return liked_songs
+
+    def load_library_state(self, user_id: str) -> Optional[Dict]:
+        """Load the stored library and sync watermark for a user."""
+        try:
+            with open(self._library_state_path(user_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error loading library state: {e}")
+            return None
+
+    def save_library_state(self, user_id: str, items: List[Dict]):
+        """Store the library and its newest ``added_at`` watermark for a user."""
+        try:
+            atomic_write_json(
+                self._library_state_path(user_id),
+                {
+                    "newest_added_at": max(
+                        (item["added_at"] for item in items), default=""
+                    ),
+                    "total": len(items),
+                    "items": items,
+                },
+                separators=(",", ":"),
+            )
+        except Exception as e:
+            logger.error(f"Error saving library state: {e}")
+
+    def _library_state_path(self, user_id: str) -> str:
+        return os.path.join(self.data_dir, "library", f"{user_id}.json")
+
+    def fetch_artist_genres(
+        self, artist_ids: Iterable[str], save: bool = True
+    ) -> Dict[str, List[str]]:
+        """Resolve genres for artists, requesting only those missing from the cache.
+
+        Pass ``save=False`` to leave persisting the cache to the caller.
+        """
+        artist_genres, missing = self.artist_cache.get_many(
+            artist_id for artist_id in artist_ids if artist_id
+        )
 
         # Fetch artist info in batches of 50
-        for i in range(0, len(artist_ids), 50):
-            batch = artist_ids[i : i + 50]
-            retries = 3  # Maximum number of retries
-            while retries > 0:
-                try:
-                    artist_infos = self.sp.artists(batch)[
-                        "artists"
-                    ]  # Fetch info for multiple artists
-                    for artist_info in artist_infos:
-                        genres = artist_info.get("genres", [])
-                        for genre in genres:
-                            if genre not in genre_map:
-                                genre_map[genre] = []
-                            genre_map[genre].append(artist_info["uri"])
-                    break  # Exit retry loop if successful
-                except SpotifyException as e:
-                    if e.http_status == 429:  # Rate limit exceeded
-                        retry_after = int(
-                            e.headers.get("Retry-After", 1)
-                        )  # Default to 1 second
-                        logger.warning(
-                            f"Rate limit exceeded. Retrying after {retry_after} seconds..."
-                        )
-                        time.sleep(retry_after)
-                        retries -= 1
-                    else:
-                        logger.error(f"Error fetching artist info: {e}")
-                        break
+        for i in range(0, len(missing), 50):
+            batch = missing[i : i + 50]
+            try:
+                artist_infos = project(
+                    self.rate_limiter.call(self.sp.artists, batch), ARTISTS_FIELDS
+                )["artists"]  # Fetch info for multiple artists
+            except Exception as e:
+                logger.error(f"Error fetching artist info: {e}")
+                continue
 
-            # Add a delay to avoid rate limiting
-            time.sleep(1)
+            fetched = {
+                artist_info["id"]: artist_info.get("genres", [])
+                for artist_info in artist_infos
+                if artist_info
+            }
+            # Spotify returns null for unknown IDs; remember them as genre-less
+            # so they are not requested again
+            for artist_id in batch:
+                fetched.setdefault(artist_id, [])
+            self.artist_cache.set_many(fetched)
+            artist_genres.update(fetched)
+
+        if save:
+            self.artist_cache.save()
+        logger.info(
+            f"Resolved genres for {len(artist_genres)} artists "
+            f"({len(missing)} requested from Spotify)."
+        )
+        return artist_genres
+
+    def resolve_artist_genres(
+        self, tracks: Iterable[Dict], save: bool = True
+    ) -> Dict[str, Tuple[str, ...]]:
+        """Build an artist ID -> genres map for every artist credited on tracks.
+
+        Artist IDs are deduplicated across all tracks before lookup, so each
+        uncached artist is requested once and the Spotify calls drop to one
+        per 50 unique uncached artists. Genres are interned and shared.
+        """
+        artist_ids = dict.fromkeys(
+            artist["id"]
+            for track in tracks
+            for artist in track.get("artists") or []
+            if artist.get("id")
+        )
+        return self._shared_genres(
+            self.fetch_artist_genres(list(artist_ids), save=save)
+        )
+
+    def group_songs_by_genre(
+        self, liked_songs: Dict, genre_service: Optional[GenreService] = None
+    ) -> Dict[str, List[str]]:
+        """Group liked songs into broad genres, as track URIs per genre.
+
+        Songs go through the same records and classifier as the streaming
+        pipeline, ``GenreService.organize_by_broad_genre``.
+        """
+        song_data, _ = self.fetch_song_metadata(liked_songs)
+        if genre_service is None:
+            genre_service = GenreService(
+                data_dir=self.base_data_dir, user_id=self.user_id
+            )
+        genre_map = genre_service.organize_by_broad_genre(song_data)
 
         logger.info(f"Grouped songs into {len(genre_map)} genres.")
         return genre_map
 
-    def group_songs_by_language(self, liked_songs: Dict) -> Dict[str, List[str]]:
-        """Group songs by language (placeholder implementation)."""
-        # Placeholder: Implement logic to group songs by language
-        # For now, return an empty dictionary
-        logger.warning("Language grouping is not implemented yet.")
-        return {}
+    def fetch_song_metadata(
+        self, liked_songs: Dict
+    ) -> Tuple[List[Track], List[str]]:
+        """Build slim tracks with the genres of all their credited artists."""
+        tracks = [item["track"] for item in liked_songs["items"] if item.get("track")]
+        artist_genres = self.resolve_artist_genres(tracks)
+
+        song_data = [Track.from_spotify(track, artist_genres) for track in tracks]
+        all_genres = set(chain.from_iterable(track.genres for track in song_data))
+
+        logger.info(f"Collected metadata for {len(song_data)} songs.")
+        return song_data, sorted(all_genres)
+
+    def build_library_index(self) -> LibraryIndex:
+        """Sync liked songs and index them with the genres of their artists.
 
-    def save_song_data(self, song_data: List[Dict[str, Any]], all_genres: List[str]):
-        """Save song data to JSON files."""
+        The stored library is synced incrementally, so rebuilding after a
+        few new likes costs one page request plus any uncached artists.
+        """
+        liked_songs = self.sync_liked_songs(limit=SAVED_TRACKS_PAGE_LIMIT)
+        items = [item for item in liked_songs["items"] if item.get("track")]
+        tracks = [item["track"] for item in items]
+        artist_genres = self.resolve_artist_genres(tracks)
+        index = LibraryIndex(
+            [Track.from_spotify(track, artist_genres) for track in tracks],
+            [item["added_at"] for item in items],
+        )
+        logger.info(
+            f"Indexed {len(index)} liked songs across {len(index.by_genre)} genres."
+        )
+        return index
+
+    def iter_liked_song_pages(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Iterator[List[Dict]]:
+        """Yield liked songs one page at a time, fetching each page on demand."""
+        if not isinstance(limit, int) or not isinstance(offset, int):
+            raise ValueError("Limit and offset must be integers.")
+
+        while True:
+            results = self._saved_tracks_page(limit, offset)
+            if on_progress:
+                on_progress(offset + len(results["items"]), results.get("total") or 0)
+            yield results["items"]
+
+            if len(results["items"]) < limit:
+                break
+            offset += limit
+
+    def iter_song_data(
+        self, limit: int = 50, on_progress: Optional[ProgressCallback] = None
+    ) -> Iterator[Track]:
+        """Stream slim tracks with their artist genres for liked songs.
+
+        Each page is slimmed to tracks and enriched with artist genres
+        before the next page is requested, so only one page of raw Spotify
+        items is held at a time. Artist genres are resolved per page; the
+        artist cache dedupes lookups across pages and is written once the
+        stream is exhausted.
+        """
+        count = 0
         try:
-            with open(os.path.join(self.data_dir, "song_data.json"), "w") as f:
-                json.dump(song_data, f, indent=4)
+            for items in self.iter_liked_song_pages(
+                limit=limit, on_progress=on_progress
+            ):
+                tracks = [item["track"] for item in items if item.get("track")]
+                artist_genres = self.resolve_artist_genres(tracks, save=False)
+                for track in tracks:
+                    yield Track.from_spotify(track, artist_genres)
+                count += len(tracks)
+        finally:
+            self.artist_cache.save()
+            logger.info(f"Streamed metadata for {count} songs.")
+
+    @staticmethod
+    def _shared_genres(
+        artist_genres: Dict[str, List[str]]
+    ) -> Dict[str, Tuple[str, ...]]:
+        """Intern artist genres once so every track by an artist shares them."""
+        return {
+            artist_id: intern_all(genres)
+            for artist_id, genres in artist_genres.items()
+        }
+
+    def group_songs_by_language(
+        self, liked_songs: Dict, language_service: Optional[LanguageService] = None
+    ) -> Dict[str, List[str]]:
+        """Group liked songs by language, as track URIs per language.
+
+        Songs go through the same records and classifier as the streaming
+        pipeline, ``LanguageService.detect_languages``.
+        """
+        song_data, _ = self.fetch_song_metadata(liked_songs)
+        if language_service is None:
+            language_service = LanguageService(
+                data_dir=self.base_data_dir, user_id=self.user_id
+            )
+        language_map = dict(language_service.detect_languages(song_data))
 
-            with open(os.path.join(self.data_dir, "unique_genres.json"), "w") as f:
-                json.dump(all_genres, f, indent=4)
+        logger.info(f"Grouped songs into {len(language_map)} languages.")
+        return language_map
 
-            logger.info("Saved song data to JSON files.")
+    def save_song_data(self, song_data: List[Track], all_genres: List[str]):
+        """Save song data as a compact library snapshot."""
+        try:
+            write_snapshot(
+                os.path.join(self.data_dir, SNAPSHOT_FILE), song_data, all_genres
+            )
+            logger.info("Saved song data to library snapshot.")
         except Exception as e:
             logger.error(f"Error saving song data: {e}")
             raise
 
     def load_song_data(self):
-        """Load song data from JSON files."""
+        """Load song data from the library snapshot, or legacy JSON files.
+
+        A snapshot that cannot be read is skipped, so the library is fetched
+        again instead of failing every load.
+        """
+        snapshot_path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            try:
+                with LibrarySnapshot.open(snapshot_path) as snapshot:
+                    return list(snapshot), snapshot.all_genres
+            except ValueError as e:
+                logger.warning(f"Ignoring unreadable library snapshot: {e}")
+
         try:
             with open(os.path.join(self.data_dir, "song_data.json"), "r") as f:
-                song_data = json.load(f)
+                song_data = [Track.from_record(record) for record in json.load(f)]
 
             with open(os.path.join(self.data_dir, "unique_genres.json"), "r") as f:
                 all_genres = json.load(f)
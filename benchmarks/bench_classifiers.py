@@ -0,0 +1,130 @@
+"""Time the genre and language classifiers and check them against a baseline.
+
+    python -m benchmarks.bench_classifiers                   # compare
+    python -m benchmarks.bench_classifiers --update-baseline # record
+    python -m benchmarks.bench_classifiers --sizes 1000 10000 --threshold 0.3
+
+Synthetic libraries of each size are generated from the real
+``data/broad_genres.json`` and ``data/language_mapping.json``. For every
+size the best of ``--repeat`` runs of GenreService.organize_by_broad_genre
+and LanguageService.detect_languages is recorded as songs/s. Compared with
+the baseline JSON, the run exits non-zero if any throughput drops by more
+than ``--threshold`` (a fraction). Baselines are machine specific: record
+one on the machine the comparison runs on.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List
+
+from app.services.genre_service import GenreService
+from app.services.language_service import LanguageService
+from benchmarks.synthetic import generate_tracks, load_mapping
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.2
+
+
+def classifiers() -> Dict[str, Callable]:
+    genre_service = GenreService()
+    genre_service.genre_mapping = load_mapping("broad_genres.json")
+    language_service = LanguageService()
+    language_service.language_mapping = load_mapping("language_mapping.json")
+    return {
+        "genre": genre_service.organize_by_broad_genre,
+        "language": language_service.detect_languages,
+    }
+
+
+def best_throughput(classify: Callable, songs: List, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        classify(songs)
+        best = min(best, time.perf_counter() - start)
+    return len(songs) / best
+
+
+def run(sizes: List[int], repeat: int) -> Dict:
+    library = generate_tracks(max(sizes))
+    services = classifiers()
+    results = {name: {} for name in services}
+    for size in sorted(sizes):
+        songs = library[:size]
+        for name, classify in services.items():
+            throughput = best_throughput(classify, songs, repeat)
+            results[name][str(size)] = round(throughput)
+            print(f"{name:<9} {size:>9,} songs  {throughput:12,.0f} songs/s")
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return a message for every throughput below the baseline threshold."""
+    regressions = []
+    for name, sizes in current["results"].items():
+        for size, throughput in sizes.items():
+            expected = baseline["results"].get(name, {}).get(size)
+            if expected is None:
+                continue
+            change = throughput / expected - 1
+            status = "REGRESSION" if change < -threshold else "ok"
+            print(
+                f"{name:<9} {int(size):>9,} songs  {change:+7.1%} vs baseline  {status}"
+            )
+            if change < -threshold:
+                regressions.append(
+                    f"{name} at {size} songs: {throughput:,} songs/s, "
+                    f"baseline {expected:,} ({change:+.1%})"
+                )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    # The services log every classification run
+    logging.getLogger("spotify_playlist_sorter").setLevel(logging.WARNING)
+
+    current = run(args.sizes, args.repeat)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        return 0
+
+    print()
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\nThroughput regressed by more than {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
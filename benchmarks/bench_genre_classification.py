@@ -0,0 +1,77 @@
+"""Compare GenreService.organize_by_broad_genre with the original nested scan.
+
+    python -m benchmarks.bench_genre_classification --songs 100000
+    python -m benchmarks.bench_genre_classification --pairs 1000000 --skip-legacy
+
+Both implementations run on the same synthetic library and their outputs
+are checked for equality before timings are printed.
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from app.services.genre_service import GENRE_PRIORITY, GenreService
+from benchmarks.synthetic import generate_tracks, load_mapping
+
+
+def legacy_organize_by_broad_genre(genre_mapping, song_data):
+    """The priority × song × genre scan GenreService used before the index."""
+    genre_playlists = defaultdict(list)
+    processed_songs = set()
+    for priority_genre in GENRE_PRIORITY:
+        for song in song_data:
+            if song["uri"] in processed_songs:
+                continue
+            for song_genre in song["genres"]:
+                if priority_genre in genre_mapping and song_genre.lower() in [
+                    g.lower() for g in genre_mapping[priority_genre]
+                ]:
+                    genre_playlists[priority_genre].append(song["uri"])
+                    processed_songs.add(song["uri"])
+                    break
+    for song in song_data:
+        if song["uri"] not in processed_songs:
+            genre_playlists["Other"].append(song["uri"])
+    return genre_playlists
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(count: int, skip_legacy: bool):
+    songs = generate_tracks(count)
+    pairs = sum(len(song.genres) for song in songs)
+    service = GenreService()
+    service.genre_mapping = load_mapping("broad_genres.json")
+
+    indexed, indexed_time = timed(service.organize_by_broad_genre, songs)
+    print(
+        f"indexed: {indexed_time:8.3f}s  {count / indexed_time:12,.0f} songs/s  "
+        f"{pairs / indexed_time:12,.0f} track-genre pairs/s ({pairs:,} pairs)"
+    )
+
+    if skip_legacy:
+        return
+
+    legacy, legacy_time = timed(
+        legacy_organize_by_broad_genre, service.genre_mapping, songs
+    )
+    print(f"legacy:  {legacy_time:8.3f}s  {count / legacy_time:12,.0f} songs/s")
+
+    assert list(indexed.items()) == list(legacy.items()), "results differ"
+    print(f"identical results, speedup {legacy_time / indexed_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=100000)
+    parser.add_argument(
+        "--pairs", type=int, help="size the library by track-genre pairs instead"
+    )
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+    # Synthetic songs carry two genres on average
+    main(args.pairs // 2 if args.pairs else args.songs, args.skip_legacy)
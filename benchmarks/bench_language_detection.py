@@ -0,0 +1,88 @@
+"""Compare LanguageService.detect_languages with the original nested scan.
+
+    python -m benchmarks.bench_language_detection --songs 100000
+
+Both implementations run on the same synthetic library and their outputs
+are checked for equality before throughput is printed.
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from app.services.language_service import LANGUAGE_INDICATORS, LanguageService
+from benchmarks.synthetic import generate_tracks, load_mapping
+
+
+def legacy_detect_languages(language_mapping, song_data):
+    """The per-song substring scan LanguageService used before compilation."""
+    language_data = defaultdict(list)
+    for song in song_data:
+        song_name = song["name"].lower()
+        artist_name = song["artist"].lower()
+        song_genres = [genre.lower() for genre in song["genres"]]
+        language_found = False
+
+        for genre in song_genres:
+            for lang, lang_genres in language_mapping.items():
+                if genre in [g.lower() for g in lang_genres]:
+                    language_data[lang].append(song["uri"])
+                    language_found = True
+                    break
+            if language_found:
+                break
+
+        if not language_found:
+            for language, indicators in LANGUAGE_INDICATORS.items():
+                if any(artist in artist_name for artist in indicators["artists"]):
+                    language_data[language].append(song["uri"])
+                    language_found = True
+                    break
+                if any(
+                    keyword in artist_name or keyword in song_name
+                    for keyword in indicators["keywords"]
+                ):
+                    language_data[language].append(song["uri"])
+                    language_found = True
+                    break
+                if any(genre in song_genres for genre in indicators["genres"]):
+                    language_data[language].append(song["uri"])
+                    language_found = True
+                    break
+
+        if not language_found:
+            language_data["English"].append(song["uri"])
+    return language_data
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(count: int, skip_legacy: bool):
+    songs = generate_tracks(count)
+    service = LanguageService()
+    service.language_mapping = load_mapping("language_mapping.json")
+
+    compiled, compiled_time = timed(service.detect_languages, songs)
+    print(f"compiled: {compiled_time:8.3f}s  {count / compiled_time:12,.0f} songs/s")
+
+    if skip_legacy:
+        return
+
+    legacy, legacy_time = timed(
+        legacy_detect_languages, service.language_mapping, songs
+    )
+    print(f"legacy:   {legacy_time:8.3f}s  {count / legacy_time:12,.0f} songs/s")
+
+    assert dict(compiled) == dict(legacy), "results differ"
+    print(f"identical results, speedup {legacy_time / compiled_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=100000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+    main(args.songs, args.skip_legacy)
@@ -0,0 +1,186 @@
+"""Run the /genres, /languages and /liked pipelines end to end against fake Spotify.
+
+    python -m benchmarks.bench_pipelines --tracks 5000 --latency 0.01
+    python -m benchmarks.bench_pipelines --throttle-every 50 --streaming
+
+The fake Spotify API (benchmarks.fake_spotify) runs in this process. Each
+pipeline runs in a fresh child process through the FastAPI app with a real
+spotipy client, so the app's pagination, batching, rate limiting and job
+handling are all on the measured path. Reported per pipeline: wall time,
+Spotify API calls by endpoint (429s included), and the child's peak RSS.
+Runs share one data directory, so repeating a pipeline (``--pipelines
+genres genres``) shows the cost of a re-sort against stored state.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import warnings
+
+from benchmarks.fake_spotify import FakeSpotify, FakeSpotifyServer
+from benchmarks.synthetic import DATA_DIR
+
+PIPELINES = ("genres", "languages", "liked")
+# /liked pages requested by cursor in one run
+LIKED_PAGES = 10
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def drive(pipeline: str, prefix: str, streaming: bool, data_dir: str):
+    import httpx
+
+    from app.api import playlists, songs
+    from app.api.deps import get_current_user_id
+    from app.core.cache import ArtistCache
+    from app.main import app
+    from app.services.playlist_service import PlaylistService
+    from app.services.song_service import SongService
+    from benchmarks.fake_spotify import spotify_client
+
+    spotify = spotify_client(prefix)
+
+    def song_service():
+        return SongService(
+            spotify, data_dir=data_dir, artist_cache=ArtistCache(), user_id="bench"
+        )
+
+    app.dependency_overrides[get_current_user_id] = lambda: "bench"
+    app.dependency_overrides[playlists.get_song_service] = song_service
+    app.dependency_overrides[songs.get_song_service] = song_service
+    app.dependency_overrides[playlists.get_playlist_service] = lambda: PlaylistService(
+        spotify, data_dir=data_dir
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        if pipeline == "liked":
+            # The first page builds the library index; later pages are served
+            # from it by cursor
+            params = {"limit": 50}
+            songs_seen = pages = 0
+            while pages < LIKED_PAGES:
+                response = await client.get("/liked", params=params)
+                response.raise_for_status()
+                page = response.json()
+                songs_seen += len(page["items"])
+                pages += 1
+                if not page["next_cursor"]:
+                    break
+                params["cursor"] = page["next_cursor"]
+            return f"{songs_seen} songs over {pages} pages"
+
+        params = {"streaming": "true"} if streaming else {}
+        response = await client.post(f"/{pipeline}", params=params)
+        response.raise_for_status()
+        job_url = response.json()["status_url"]
+        while True:
+            job = (await client.get(job_url)).json()
+            if job["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.05)
+        if job["status"] == "failed":
+            raise RuntimeError(f"{pipeline} job failed: {job['error']}")
+        return f"{len(job['result']['playlists'])} playlists"
+
+
+def run_pipeline(pipeline: str, prefix: str, streaming: bool, data_dir: str, conn):
+    """Child process entry point: run one pipeline and report measurements."""
+    import logging
+
+    warnings.simplefilter("ignore", DeprecationWarning)
+    logging.getLogger("spotify_playlist_sorter").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    try:
+        import app.main  # noqa: F401  (import cost is not part of the run)
+
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        summary = asyncio.run(drive(pipeline, prefix, streaming, data_dir))
+        conn.send(
+            {
+                "wall": time.perf_counter() - start,
+                "summary": summary,
+                "baseline_rss": baseline,
+                "peak_rss": peak_rss_mb(),
+            }
+        )
+    except Exception as e:
+        conn.send({"error": repr(e)})
+    finally:
+        conn.close()
+
+
+def main(args):
+    spotify = FakeSpotify(
+        args.tracks, args.artists, saved_tracks_page_limit=args.page_limit
+    )
+    context = multiprocessing.get_context("spawn")
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    # Classify with the real mappings; everything else is written to data_dir
+    for mapping in ("broad_genres.json", "language_mapping.json"):
+        shutil.copy(os.path.join(DATA_DIR, mapping), data_dir)
+    with FakeSpotifyServer(
+        spotify,
+        latency=args.latency,
+        throttle_every=args.throttle_every,
+        retry_after=args.retry_after,
+    ) as server:
+        print(
+            f"{args.tracks} tracks, {args.artists} artists, latency "
+            f"{args.latency * 1000:.0f} ms, 429 every "
+            f"{args.throttle_every or 'never'}, streaming={args.streaming}"
+        )
+        for pipeline in args.pipelines:
+            server.reset_stats()
+            parent, child = context.Pipe(duplex=False)
+            process = context.Process(
+                target=run_pipeline,
+                args=(pipeline, server.prefix, args.streaming, data_dir, child),
+            )
+            process.start()
+            result = parent.recv()
+            process.join()
+            stats = server.stats()
+
+            print(f"\n/{pipeline}")
+            if "error" in result:
+                print(f"  failed: {result['error']}")
+                continue
+            print(f"  result      {result['summary']}")
+            print(f"  wall time   {result['wall']:8.2f} s")
+            print(
+                f"  peak RSS    {result['peak_rss']:8.1f} MB "
+                f"(+{result['peak_rss'] - result['baseline_rss']:.1f} MB over idle app)"
+            )
+            print(
+                f"  API calls   {stats['total_calls']:8d} "
+                f"({stats['throttled']} throttled, "
+                f"{stats['bytes_sent'] / 1e6:.1f} MB received)"
+            )
+            for endpoint, count in sorted(stats["calls"].items()):
+                print(f"    {endpoint:<28} {count:6d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--artists", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--page-limit", type=int, default=50)
+    parser.add_argument("--throttle-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument(
+        "--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES)
+    )
+    main(parser.parse_args())
@@ -0,0 +1,104 @@
+"""Compare the bytes and latency of reading a playlist's track URIs three ways.
+
+    python -m benchmarks.bench_playlist_reads --tracks 5000 --latency 0.02
+
+Against the fake Spotify API (benchmarks.fake_spotify), for one playlist:
+
+* full      pages of complete playlist items, as before the projection
+* projected pages limited to ``items(track(uri)),next,total``
+* cached    a cached URI set revalidated by one ``snapshot_id`` lookup
+
+All three must return the same URIs before their numbers are printed.
+"""
+import argparse
+import logging
+import time
+
+from app.core.cache import PlaylistCache
+from app.core.rate_limiter import RateLimiter
+from app.services.playlist_service import PlaylistService
+from benchmarks.fake_spotify import (
+    USER_ID,
+    FakeSpotify,
+    FakeSpotifyServer,
+    spotify_client,
+)
+
+
+def read_full(sp, playlist_id: str):
+    """The pre-projection read: every field of every playlist item."""
+    uris = set()
+    offset = 0
+    while True:
+        results = sp.playlist_items(playlist_id, offset=offset, limit=100)
+        uris.update(item["track"]["uri"] for item in results["items"])
+        if len(results["items"]) < 100:
+            return uris
+        offset += 100
+
+
+def measure(server: FakeSpotifyServer, read, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        server.reset_stats()
+        start = time.perf_counter()
+        uris = read()
+        best = min(best, time.perf_counter() - start)
+    return uris, best, server.stats()
+
+
+def main(args):
+    logging.getLogger("spotify_playlist_sorter").setLevel(logging.WARNING)
+    spotify = FakeSpotify(args.tracks, args.artists)
+    playlist_id = spotify.handle(
+        "POST", f"users/{USER_ID}/playlists", {}, {"name": "Bench Playlist"}
+    )["id"]
+    spotify.playlists[playlist_id]["uris"] = [
+        item["track"]["uri"] for item in spotify.saved
+    ]
+
+    with FakeSpotifyServer(spotify, latency=args.latency) as server:
+        sp = spotify_client(server.prefix)
+        # The full read has no limiter, so don't pace the service reads either
+        unlimited = RateLimiter(max_rate=1e6)
+        projected = PlaylistService(sp, rate_limiter=unlimited)
+        cached = PlaylistService(
+            sp, rate_limiter=unlimited, playlist_cache=PlaylistCache()
+        )
+        cached.get_existing_playlist_tracks(playlist_id)  # warm the cache
+
+        strategies = {
+            "full": lambda: read_full(sp, playlist_id),
+            "projected": lambda: projected.get_existing_playlist_tracks(playlist_id),
+            "cached": lambda: cached.get_existing_playlist_tracks(playlist_id),
+        }
+        results = {
+            name: measure(server, read, args.repeat)
+            for name, read in strategies.items()
+        }
+
+    expected = results["full"][0]
+    assert len(expected) == args.tracks, "full read is incomplete"
+    for name, (uris, _, _) in results.items():
+        assert uris == expected, f"{name} read differs from the full read"
+
+    print(
+        f"playlist of {args.tracks} tracks, latency {args.latency * 1000:.0f} ms, "
+        f"best of {args.repeat}"
+    )
+    full_bytes = results["full"][2]["bytes_sent"]
+    for name, (_, seconds, stats) in results.items():
+        print(
+            f"{name:<10} {stats['total_calls']:4d} calls  "
+            f"{stats['bytes_sent'] / 1e3:10.1f} kB "
+            f"({stats['bytes_sent'] / full_bytes:6.1%})  {seconds * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=5000)
+    parser.add_argument("--artists", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,132 @@
+"""Measure payload bytes and JSON decode time per 10k tracks with field projection.
+
+    python -m benchmarks.bench_projection --tracks 10000
+
+Pages are taken from the fake Spotify API (benchmarks.fake_spotify) as the
+server would send them, in each endpoint's page size:
+
+* saved tracks  full pages decoded as-is, against the same pages decoded
+                and projected to slim records. The endpoint has no
+                ``fields`` parameter, so the bytes compared are those kept
+                after projection; the download itself is unchanged
+* playlist items  full pages against pages requested with
+                  ``fields=items(track(uri)),next,total``
+
+Both paths must yield the same tracks before their numbers are printed.
+"""
+import argparse
+import json
+import time
+
+from app.core.projection import (
+    PLAYLIST_ITEMS_FIELDS,
+    SAVED_TRACKS_FIELDS,
+    project,
+)
+from app.models.track import Track
+from benchmarks.fake_spotify import (
+    PLAYLIST_ITEMS_PAGE_LIMIT,
+    SAVED_TRACKS_PAGE_LIMIT,
+    USER_ID,
+    FakeSpotify,
+    filter_fields,
+    parse_field_filter,
+)
+
+
+def fetch_pages(spotify: FakeSpotify, path: str, page_limit: int, fields=None):
+    """Serialize every page of an endpoint the way the fake server sends it."""
+    pages = []
+    for offset in range(0, 1 << 62, page_limit):
+        query = {"limit": page_limit, "offset": offset}
+        payload = spotify.handle("GET", path, query, None)
+        if fields:
+            payload = filter_fields(payload, parse_field_filter(fields))
+        pages.append(json.dumps(payload, separators=(",", ":")).encode())
+        if not payload["next"]:
+            return pages
+
+
+def best_time(func, pages, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [func(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def decode_projected(page: bytes):
+    return project(json.loads(page), SAVED_TRACKS_FIELDS)
+
+
+def report(name: str, full, slim, tracks: int):
+    scale = 10_000 / tracks
+    (full_bytes, full_time), (slim_bytes, slim_time) = full, slim
+    print(f"{name}, per 10k tracks")
+    print(
+        f"  full      {full_bytes * scale / 1e6:8.2f} MB  "
+        f"decode {full_time * scale * 1000:8.1f} ms"
+    )
+    print(
+        f"  projected {slim_bytes * scale / 1e6:8.2f} MB  "
+        f"decode {slim_time * scale * 1000:8.1f} ms  "
+        f"({slim_bytes / full_bytes:.1%} of bytes, "
+        f"{full_time / slim_time:.1f}x faster)"
+    )
+
+
+def main(args):
+    spotify = FakeSpotify(args.tracks, args.artists)
+
+    saved = fetch_pages(spotify, "me/tracks", SAVED_TRACKS_PAGE_LIMIT)
+    full_pages, full_time = best_time(json.loads, saved, args.repeat)
+    slim_pages, slim_time = best_time(decode_projected, saved, args.repeat)
+    full_tracks, slim_tracks = (
+        [Track.from_spotify(item["track"]) for page in pages for item in page["items"]]
+        for pages in (full_pages, slim_pages)
+    )
+    assert len(full_tracks) == args.tracks, "saved tracks are incomplete"
+    assert slim_tracks == full_tracks, "slim saved tracks differ"
+    kept_bytes = sum(
+        len(json.dumps(page, separators=(",", ":"))) for page in slim_pages
+    )
+    report(
+        "saved tracks (bytes kept after projection, not on the wire)",
+        (sum(map(len, saved)), full_time),
+        (kept_bytes, slim_time),
+        args.tracks,
+    )
+
+    playlist_id = spotify.handle(
+        "POST", f"users/{USER_ID}/playlists", {}, {"name": "Bench Playlist"}
+    )["id"]
+    spotify.playlists[playlist_id]["uris"] = [
+        item["track"]["uri"] for item in spotify.saved
+    ]
+    path = f"playlists/{playlist_id}/items"
+    full = fetch_pages(spotify, path, PLAYLIST_ITEMS_PAGE_LIMIT)
+    projected = fetch_pages(
+        spotify, path, PLAYLIST_ITEMS_PAGE_LIMIT, PLAYLIST_ITEMS_FIELDS
+    )
+    full_pages, full_time = best_time(json.loads, full, args.repeat)
+    slim_pages, slim_time = best_time(json.loads, projected, args.repeat)
+
+    def uris(pages):
+        return [item["track"]["uri"] for page in pages for item in page["items"]]
+
+    assert uris(slim_pages) == uris(full_pages), "projected playlist items differ"
+    report(
+        "playlist items (bytes on the wire)",
+        (sum(map(len, full)), full_time),
+        (sum(map(len, projected)), slim_time),
+        args.tracks,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--artists", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
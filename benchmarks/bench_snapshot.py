@@ -0,0 +1,62 @@
+"""Compare library snapshot size and load time with indent=4 song_data.json.
+
+    python -m benchmarks.bench_snapshot --songs 100000
+
+Both files are written from the same synthetic library, and every snapshot
+record is checked against the JSON records before timings are printed.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.core.snapshot import LibrarySnapshot, write_snapshot
+from benchmarks.synthetic import generate_songs
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def load_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main(count: int):
+    songs = generate_songs(count)
+    all_genres = sorted({genre for song in songs for genre in song["genres"]})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "song_data.json")
+        snap_path = os.path.join(tmp_dir, "song_data.snap")
+        with open(json_path, "w") as f:
+            json.dump(songs, f, indent=4)
+        write_snapshot(snap_path, songs, all_genres)
+
+        loaded_json, json_time = timed(load_json, json_path)
+        snapshot, open_time = timed(LibrarySnapshot.open, snap_path)
+        decoded, decode_time = timed(list, snapshot)
+        decoded = [track.to_dict() for track in decoded]
+
+        assert decoded == loaded_json, "snapshot differs from JSON"
+        assert snapshot.all_genres == all_genres, "genre list differs"
+        snapshot.close()
+
+        json_size = os.path.getsize(json_path)
+        snap_size = os.path.getsize(snap_path)
+
+    print(f"json:     {json_size / 1e6:8.2f} MB  load   {json_time * 1000:9.1f} ms")
+    print(f"snapshot: {snap_size / 1e6:8.2f} MB  open   {open_time * 1000:9.1f} ms")
+    print(f"          {'':11} decode {decode_time * 1000:9.1f} ms (all tracks)")
+    print(f"identical records, {json_size / snap_size:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.songs)
@@ -0,0 +1,115 @@
+"""Measure memory per liked track: raw Spotify item vs song record vs Track.
+
+    python -m benchmarks.bench_track_memory --songs 20000
+
+Builds a synthetic library of Spotify saved-track items shaped like the
+API payload and reports tracemalloc bytes per track for each
+representation that services have held on to.
+"""
+import argparse
+import json
+import random
+import tracemalloc
+
+from app.models.track import Track, intern_all
+from benchmarks.synthetic import generate_songs
+
+# Country codes in a typical available_markets list
+MARKETS = [f"{a}{b}" for a in "ABCDEFGHIJKLM" for b in "ABCDEFGHIJKLMN"][:180]
+
+
+def spotify_payload(count: int):
+    """JSON text for saved-track items, so every string is freshly decoded."""
+    rng = random.Random(0)
+    items = []
+    for i, song in enumerate(generate_songs(count)):
+        album_id = f"{i // 12:022d}"
+        artist_id = f"{hash(song['artist']) & 0xFFFFFFFF:022d}"
+        artist = {
+            "id": artist_id,
+            "name": song["artist"],
+            "type": "artist",
+            "uri": f"spotify:artist:{artist_id}",
+            "href": f"https://api.spotify.com/v1/artists/{artist_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"},
+        }
+        items.append(
+            {
+                "added_at": "2024-01-01T00:00:00Z",
+                "track": {
+                    "id": song["uri"].rsplit(":", 1)[1],
+                    "name": song["name"],
+                    "uri": song["uri"],
+                    "artists": [artist],
+                    "album": {
+                        "id": album_id,
+                        "name": f"Album {i // 12}",
+                        "images": [
+                            {"url": f"https://i.scdn.co/image/{album_id}{size}",
+                             "height": size, "width": size}
+                            for size in (640, 300, 64)
+                        ],
+                        "available_markets": MARKETS,
+                        "artists": [artist],
+                    },
+                    "available_markets": MARKETS,
+                    "duration_ms": rng.randint(120000, 300000),
+                    "explicit": False,
+                    "popularity": rng.randint(0, 100),
+                    "preview_url": None,
+                    "href": f"https://api.spotify.com/v1/tracks/{song['uri']}",
+                },
+            }
+        )
+    genres = {
+        item["track"]["artists"][0]["id"]: song["genres"]
+        for item, song in zip(items, generate_songs(count))
+    }
+    return json.dumps(items), json.dumps(genres)
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def main(count: int):
+    payload, genres_payload = spotify_payload(count)
+    artist_genres = json.loads(genres_payload)
+
+    items, raw_size = measure(lambda: json.loads(payload))
+    records, record_size = measure(
+        lambda: [
+            {
+                "name": item["track"]["name"],
+                "artist": item["track"]["artists"][0]["name"],
+                "genres": artist_genres[item["track"]["artists"][0]["id"]],
+                "uri": item["track"]["uri"],
+            }
+            for item in json.loads(payload)
+        ]
+    )
+    shared = {artist_id: intern_all(g) for artist_id, g in artist_genres.items()}
+    tracks, track_size = measure(
+        lambda: [
+            Track.from_spotify(item["track"], shared) for item in json.loads(payload)
+        ]
+    )
+
+    for label, size in (
+        ("raw item", raw_size),
+        ("record dict", record_size),
+        ("Track", track_size),
+    ):
+        print(f"{label:12} {size / count:10,.0f} bytes/track")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.songs)
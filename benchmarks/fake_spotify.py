@@ -0,0 +1,471 @@
+"""Local stand-in for the parts of the Spotify Web API this app calls.
+
+Serves a synthetic liked-songs library, artist genres and playlists over
+HTTP so real spotipy clients (and the app's pagination, batching and
+rate limiting) can be exercised without credentials::
+
+    python -m benchmarks.fake_spotify --tracks 5000 --latency 0.02
+
+Point a client at it with ``spotify_client(server.prefix)``, or set
+``sp.prefix = server.prefix`` on an existing ``spotipy.Spotify``.
+Latency, page limits and HTTP 429 injection are configurable, and every
+request is counted per endpoint.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import spotipy
+
+from app.services.auth_service import SpotifyClientRegistry
+from benchmarks.synthetic import generate_songs
+
+USER_ID = "bench"
+# Spotify's own limits
+SAVED_TRACKS_PAGE_LIMIT = 50
+PLAYLISTS_PAGE_LIMIT = 50
+PLAYLIST_ITEMS_PAGE_LIMIT = 100
+ARTISTS_BATCH_LIMIT = 50
+PLAYLIST_WRITE_LIMIT = 100
+# Country codes filling available_markets, as large as real payloads
+MARKETS = [f"{a}{b}" for a in "ABCDEFGHIJKLM" for b in "ABCDEFGHIJKLMN"][:180]
+
+
+def parse_field_filter(spec: str) -> Dict[str, Optional[Dict]]:
+    """Parse a ``fields`` filter such as ``items(track(uri)),next``.
+
+    Written independently of app.core.projection, so the server side of a
+    benchmark does not share the client's parsing bugs.
+    """
+
+    def parse(pos: int):
+        fields: Dict[str, Optional[Dict]] = {}
+        while pos < len(spec):
+            end = pos
+            while end < len(spec) and spec[end] not in ",()":
+                end += 1
+            name = spec[pos:end].strip()
+            if end < len(spec) and spec[end] == "(":
+                fields[name], end = parse(end + 1)
+                end += 1  # past the closing parenthesis
+            elif name:
+                fields[name] = None
+            if end < len(spec) and spec[end] == ")":
+                return fields, end
+            pos = end + 1
+        return fields, pos
+
+    return parse(0)[0]
+
+
+def filter_fields(value: Any, fields: Optional[Dict[str, Optional[Dict]]]) -> Any:
+    """Apply a parsed ``fields`` filter to a response, as Spotify does."""
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [filter_fields(item, fields) for item in value]
+    if not isinstance(value, dict):
+        return value
+    kept = {}
+    for name, sub_fields in fields.items():
+        if name in value:
+            kept[name] = filter_fields(value[name], sub_fields)
+    return kept
+
+
+class SpotifyError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class FakeSpotify:
+    """In-memory Spotify state: a liked-songs library, artists and playlists."""
+
+    def __init__(
+        self,
+        tracks: int = 2000,
+        artists: int = 300,
+        seed: int = 0,
+        saved_tracks_page_limit: int = SAVED_TRACKS_PAGE_LIMIT,
+    ):
+        self.saved_tracks_page_limit = saved_tracks_page_limit
+        self.base_url = ""
+        self.artists: Dict[str, Dict] = {}
+        self.tracks: Dict[str, Dict] = {}
+        self.saved: List[Dict] = []
+        self.playlists: Dict[str, Dict] = {}
+        self._snapshots = itertools.count(1)
+        self._playlist_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        for i, song in enumerate(generate_songs(tracks, seed)):
+            artist_id = f"artist{i % artists:018d}"
+            artist = self.artists.setdefault(
+                artist_id,
+                {
+                    "id": artist_id,
+                    "name": song["artist"],
+                    "type": "artist",
+                    "uri": f"spotify:artist:{artist_id}",
+                    "genres": song["genres"],
+                    "popularity": 50,
+                },
+            )
+            track_id = song["uri"].rsplit(":", 1)[1]
+            album_id = f"album{i // 12:017d}"
+            track = {
+                "id": track_id,
+                "name": song["name"],
+                "type": "track",
+                "uri": song["uri"],
+                "duration_ms": 180000 + i % 60000,
+                "explicit": False,
+                "popularity": i % 100,
+                "preview_url": None,
+                "available_markets": MARKETS,
+                "artists": [
+                    {
+                        "id": artist_id,
+                        "name": artist["name"],
+                        "type": "artist",
+                        "uri": artist["uri"],
+                    }
+                ],
+                "album": {
+                    "id": album_id,
+                    "name": f"Album {i // 12}",
+                    "available_markets": MARKETS,
+                    "images": [
+                        {
+                            "url": f"https://i.scdn.co/image/{album_id}-{size}",
+                            "height": size,
+                            "width": size,
+                        }
+                        for size in (640, 300, 64)
+                    ],
+                },
+            }
+            self.tracks[song["uri"]] = track
+            # Saved tracks are listed newest first
+            self.saved.append(
+                {"added_at": f"2024-01-01T00:00:00.{tracks - i:06d}Z", "track": track}
+            )
+
+    def next_snapshot(self) -> str:
+        return f"snapshot{next(self._snapshots)}"
+
+    def page(self, path: str, items: List, query: Dict, max_limit: int) -> Dict:
+        limit = int(query.get("limit", 20))
+        offset = int(query.get("offset", 0))
+        if not 1 <= limit <= max_limit:
+            raise SpotifyError(400, f"Invalid limit, must be 1 to {max_limit}")
+        end = offset + limit
+        next_url = None
+        if end < len(items):
+            next_url = f"{self.base_url}/v1/{path}?" + urlencode(
+                {"offset": end, "limit": limit}
+            )
+        return {
+            "items": items[offset:end],
+            "total": len(items),
+            "limit": limit,
+            "offset": offset,
+            "next": next_url,
+        }
+
+    def handle(self, method: str, path: str, query: Dict, body: Any) -> Any:
+        """Dispatch one API call; returns the JSON response body."""
+        parts = path.strip("/").split("/")
+        if method == "GET" and parts == ["me"]:
+            return {"id": USER_ID, "display_name": "Benchmark User"}
+        if method == "GET" and parts == ["me", "tracks"]:
+            return self.page(
+                path, self.saved, query, self.saved_tracks_page_limit
+            )
+        if method == "GET" and parts == ["artists"]:
+            ids = [i for i in query.get("ids", "").split(",") if i]
+            if len(ids) > ARTISTS_BATCH_LIMIT:
+                raise SpotifyError(400, "Too many ids requested")
+            return {"artists": [self.artists.get(i) for i in ids]}
+        if method == "GET" and parts == ["me", "playlists"]:
+            with self._lock:
+                summaries = [
+                    {
+                        "id": p["id"],
+                        "name": p["name"],
+                        "snapshot_id": p["snapshot_id"],
+                        "owner": {"id": USER_ID},
+                        "tracks": {"total": len(p["uris"])},
+                    }
+                    for p in self.playlists.values()
+                ]
+            return self.page(path, summaries, query, PLAYLISTS_PAGE_LIMIT)
+        if method == "POST" and parts[0] == "users" and parts[2:] == ["playlists"]:
+            with self._lock:
+                playlist_id = f"playlist{next(self._playlist_ids):014d}"
+                self.playlists[playlist_id] = {
+                    "id": playlist_id,
+                    "name": body.get("name", ""),
+                    "description": body.get("description", ""),
+                    "snapshot_id": self.next_snapshot(),
+                    "uris": [],
+                }
+                return self.playlist_object(playlist_id, {})
+        if parts[0] == "playlists" and len(parts) >= 2:
+            playlist_id = parts[1]
+            if playlist_id not in self.playlists:
+                raise SpotifyError(404, "Playlist not found")
+            if len(parts) == 2 and method == "GET":
+                with self._lock:
+                    return self.playlist_object(playlist_id, query)
+            if len(parts) == 3 and parts[2] in ("items", "tracks"):
+                return self.playlist_items(method, playlist_id, path, query, body)
+        raise SpotifyError(404, f"No fake for {method} /{path}")
+
+    def playlist_object(self, playlist_id: str, query: Dict) -> Dict:
+        playlist = self.playlists[playlist_id]
+        return {
+            "id": playlist_id,
+            "name": playlist["name"],
+            "description": playlist["description"],
+            "snapshot_id": playlist["snapshot_id"],
+            "owner": {"id": USER_ID},
+            "tracks": self.page(
+                f"playlists/{playlist_id}/items",
+                self.playlist_entries(playlist),
+                {"limit": PLAYLIST_ITEMS_PAGE_LIMIT},
+                PLAYLIST_ITEMS_PAGE_LIMIT,
+            ),
+        }
+
+    def playlist_entries(self, playlist: Dict) -> List[Dict]:
+        return [
+            {
+                "added_at": "2024-01-01T00:00:00Z",
+                "track": self.tracks.get(uri, {"uri": uri, "type": "track"}),
+            }
+            for uri in playlist["uris"]
+        ]
+
+    def playlist_items(
+        self, method: str, playlist_id: str, path: str, query: Dict, body: Any
+    ) -> Dict:
+        with self._lock:
+            playlist = self.playlists[playlist_id]
+            if method == "GET":
+                return self.page(
+                    path,
+                    self.playlist_entries(playlist),
+                    query,
+                    PLAYLIST_ITEMS_PAGE_LIMIT,
+                )
+
+            if method == "POST":
+                uris = body["uris"] if isinstance(body, dict) else body
+                if len(uris) > PLAYLIST_WRITE_LIMIT:
+                    raise SpotifyError(400, "Too many items")
+                position = query.get("position")
+                if position is None:
+                    playlist["uris"].extend(uris)
+                else:
+                    index = int(position)
+                    playlist["uris"][index:index] = uris
+            elif method == "DELETE":
+                uris = {item["uri"] for item in body["items"]}
+                if len(body["items"]) > PLAYLIST_WRITE_LIMIT:
+                    raise SpotifyError(400, "Too many items")
+                playlist["uris"] = [u for u in playlist["uris"] if u not in uris]
+            elif method == "PUT":
+                if len(body.get("uris", [])) > PLAYLIST_WRITE_LIMIT:
+                    raise SpotifyError(400, "Too many items")
+                playlist["uris"] = list(body.get("uris", []))
+            else:
+                raise SpotifyError(405, "Method not allowed")
+
+            playlist["snapshot_id"] = self.next_snapshot()
+            return {"snapshot_id": playlist["snapshot_id"]}
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Name a request by endpoint, replacing IDs: ``GET playlists/{id}/items``."""
+    parts = path.strip("/").split("/")
+    if parts[0] in ("playlists", "users") and len(parts) > 1:
+        parts[1] = "{id}"
+    return f"{method} {'/'.join(parts)}"
+
+
+class FakeSpotifyServer:
+    """Serve a :class:`FakeSpotify` over HTTP on a background thread."""
+
+    def __init__(
+        self,
+        spotify: Optional[FakeSpotify] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        throttle_every: int = 0,
+        retry_after: int = 1,
+    ):
+        self.spotify = spotify or FakeSpotify()
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.calls: Counter = Counter()
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._requests = itertools.count(1)
+        self._stats_lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.prefix = f"{self.url}/v1/"
+        self.spotify.base_url = self.url
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeSpotifyServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeSpotifyServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.calls.clear()
+            self.throttled = 0
+            self.bytes_sent = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "throttled": self.throttled,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without TCP_NODELAY small
+            # responses wait on the client's delayed ACK (~40 ms each)
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self, method: str):
+                url = urlparse(self.path)
+                path = url.path[len("/v1/") :] if url.path.startswith("/v1/") else url.path
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                headers = {}
+                if server.throttle_every and next(server._requests) % server.throttle_every == 0:
+                    status = 429
+                    headers["Retry-After"] = str(server.retry_after)
+                    payload = {"error": {"status": 429, "message": "API rate limit exceeded"}}
+                else:
+                    try:
+                        body = json.loads(raw) if raw else None
+                        payload = server.spotify.handle(method, path, query, body)
+                        status = 201 if method == "POST" else 200
+                        fields = query.get("fields")
+                        if fields and method == "GET":
+                            payload = filter_fields(payload, parse_field_filter(fields))
+                    except SpotifyError as e:
+                        status = e.status
+                        payload = {"error": {"status": e.status, "message": str(e)}}
+
+                data = json.dumps(payload, separators=(",", ":")).encode()
+                with server._stats_lock:
+                    server.calls[endpoint_name(method, path)] += 1
+                    server.bytes_sent += len(data)
+                    if status == 429:
+                        server.throttled += 1
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def do_PUT(self):
+                self._serve("PUT")
+
+            def do_DELETE(self):
+                self._serve("DELETE")
+
+        return Handler
+
+
+def spotify_client(prefix: str) -> spotipy.Spotify:
+    """Build a spotipy client wired like the app's, talking to a fake server.
+
+    ``prefix`` is the server's API root, :attr:`FakeSpotifyServer.prefix`.
+    The session comes from the app's client registry, so 429 responses
+    reach the app's rate limiter instead of being retried by urllib3.
+    """
+    client = spotipy.Spotify(
+        auth="fake-token",
+        requests_session=SpotifyClientRegistry().build_session(),
+    )
+    client.prefix = prefix
+    return client
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--artists", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--page-limit", type=int, default=SAVED_TRACKS_PAGE_LIMIT)
+    parser.add_argument(
+        "--throttle-every", type=int, default=0, help="answer every Nth request with 429"
+    )
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeSpotifyServer(
+        FakeSpotify(args.tracks, args.artists, saved_tracks_page_limit=args.page_limit),
+        port=args.port,
+        latency=args.latency,
+        throttle_every=args.throttle_every,
+        retry_after=args.retry_after,
+    )
+    print(f"Fake Spotify API listening on {server.prefix}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
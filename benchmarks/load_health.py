@@ -0,0 +1,128 @@
+"""Measure /health latency while a genre sort job is running.
+
+Spotify is replaced by an in-process client that sleeps to simulate
+network latency, so the run needs no credentials::
+
+    python -m benchmarks.load_health --requests 200 --latency 0.05
+
+If blocking Spotify I/O ran on the event loop, the p99 of /health during
+the sort would jump to roughly the duration of a Spotify call.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from app.api import playlists
+from app.api.deps import get_current_user_id
+from app.core.cache import ArtistCache
+from app.main import app
+from app.services.playlist_service import PlaylistService
+from app.services.song_service import SongService
+
+
+class SlowSpotify:
+    """Minimal blocking Spotify client with a fixed per-call latency."""
+
+    def __init__(self, tracks: int, latency: float):
+        self.latency = latency
+        self.items = [
+            {
+                "added_at": f"2024-01-01T00:00:{i:06d}Z",
+                "track": {
+                    "id": f"t{i}",
+                    "uri": f"spotify:track:t{i}",
+                    "name": f"Track {i}",
+                    "artists": [{"id": f"a{i % 300}", "name": f"Artist {i % 300}"}],
+                }
+            }
+            for i in range(tracks)
+        ]
+
+    def current_user_saved_tracks(self, limit=20, offset=0):
+        time.sleep(self.latency)
+        return {"items": self.items[offset : offset + limit], "total": len(self.items)}
+
+    def artists(self, artist_ids):
+        time.sleep(self.latency)
+        return {"artists": [{"id": a, "genres": ["rock"]} for a in artist_ids]}
+
+    def current_user(self):
+        time.sleep(self.latency)
+        return {"id": "bench"}
+
+    def current_user_playlists(self, limit=50, offset=0):
+        time.sleep(self.latency)
+        return {"items": [], "next": None}
+
+    def user_playlist_create(self, user, name, public=True, description=""):
+        time.sleep(self.latency)
+        return {"id": name}
+
+    def playlist_items(self, playlist_id, **kwargs):
+        time.sleep(self.latency)
+        return {"items": []}
+
+    def playlist_add_items(self, playlist_id, items):
+        time.sleep(self.latency)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe_health(client: httpx.AsyncClient, count: int):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+def report(label: str, latencies):
+    print(
+        f"{label:<14} p50={statistics.median(latencies):7.2f} ms  "
+        f"p99={percentile(latencies, 99):7.2f} ms  max={max(latencies):7.2f} ms"
+    )
+
+
+async def main(requests: int, tracks: int, latency: float):
+    spotify = SlowSpotify(tracks, latency)
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    app.dependency_overrides[get_current_user_id] = lambda: "bench"
+    app.dependency_overrides[playlists.get_song_service] = lambda: SongService(
+        spotify, data_dir=data_dir, artist_cache=ArtistCache(), user_id="bench"
+    )
+    app.dependency_overrides[playlists.get_playlist_service] = lambda: PlaylistService(
+        spotify, data_dir=data_dir
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        report("idle", await probe_health(client, requests))
+
+        response = await client.post("/genres")
+        job_url = response.json()["status_url"]
+        busy = await probe_health(client, requests)
+        report("during sort", busy)
+
+        while (await client.get(job_url)).json()["status"] not in ("completed", "failed"):
+            await asyncio.sleep(0.1)
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.tracks, args.latency))
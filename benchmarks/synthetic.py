@@ -0,0 +1,57 @@
+"""Synthetic song libraries built from the real genre and language mappings."""
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+from app.models.track import Track
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# Genres that no mapping knows about, so some songs fall through to "Other"
+UNKNOWN_GENRES = ["vaporwave", "sea shanty", "hyperpop", "chiptune", "lo-fi beats"]
+
+WORDS = [
+    "love", "night", "tokyo", "paris", "dream", "fire", "heart", "seoul",
+    "city", "rain", "summer", "madrid", "gold", "ocean", "mumbai", "star",
+]
+
+
+def load_mapping(name: str) -> Dict[str, List[str]]:
+    with open(os.path.join(DATA_DIR, name), "r") as f:
+        return json.load(f)
+
+
+def generate_songs(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate ``count`` song records shaped like ``song_data.json`` entries."""
+    rng = random.Random(seed)
+    genres = sorted(
+        {
+            genre
+            for mapping in ("broad_genres.json", "language_mapping.json")
+            for sub_genres in load_mapping(mapping).values()
+            for genre in sub_genres
+        }
+    )
+    genres += UNKNOWN_GENRES
+
+    songs = []
+    for i in range(count):
+        song_genres = rng.sample(genres, rng.randint(0, 4))
+        # Vary the case like Spotify data occasionally does
+        if song_genres and rng.random() < 0.1:
+            song_genres[0] = song_genres[0].title()
+        songs.append(
+            {
+                "name": " ".join(rng.sample(WORDS, rng.randint(1, 3))).title(),
+                "artist": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i % 997}",
+                "genres": song_genres,
+                "uri": f"spotify:track:{i:022d}",
+            }
+        )
+    return songs
+
+
+def generate_tracks(count: int, seed: int = 0) -> List[Track]:
+    """Generate ``count`` slim tracks from the same records as generate_songs."""
+    return [Track.from_record(song) for song in generate_songs(count, seed)]
@@ -0,0 +1,4 @@
+import os
+
+# Sign test sessions with a fixed key instead of one kept in data/tokens
+os.environ.setdefault("SESSION_SECRET_KEY", "test-session-secret")
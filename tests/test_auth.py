@@ -5,7 +5,10 @@ import json
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.services.auth_service import SpotifyAuthService
+from app.api.auth import auth_service
+from app.core.library_index import get_library_index_cache
+from app.core.response_cache import get_response_cache
+from app.services.auth_service import SESSION_COOKIE, SpotifyAuthService
 
 
 class TestAuth(unittest.TestCase):
@@ -77,7 +80,7 @@ class TestAuth(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("Failed to get token", response.json()["detail"])
 
-    @patch("app.api.auth.get_spotify_client")
+    @patch("app.api.auth.auth_service.get_spotify_client")
     def test_current_user_endpoint(self, mock_get_client):
         # Mock the Spotify client
         mock_client = Mock()
@@ -86,6 +89,10 @@ class TestAuth(unittest.TestCase):
             "display_name": "Test User",
         }
         mock_get_client.return_value = mock_client
+        # Log in as a session user
+        self.client.cookies.set(
+            SESSION_COOKIE, auth_service.create_session("test_user")
+        )
 
         # Test the current_user endpoint
         response = self.client.get("/current-user")
@@ -110,22 +117,40 @@ class TestAuth(unittest.TestCase):
         self.assertEqual(response.json(), {"detail": "Not authenticated"})
 
     def test_logout_endpoint(self):
-        # Create a mock cache file
-        with open(self.test_cache, "w") as f:
-            json.dump({"access_token": "test"}, f)
-
-        # Mock the path to use our test cache
-        with (
-            patch("app.api.auth.os.path.exists", return_value=True),
-            patch("app.api.auth.os.remove") as mock_remove,
-        ):
+        # Log in as a session user
+        self.client.cookies.set(
+            SESSION_COOKIE, auth_service.create_session("test_user")
+        )
+
+        with patch("app.api.auth.auth_service.logout") as mock_logout:
             # Test the logout endpoint
             response = self.client.get("/logout")
 
             # Verify the response
             self.assertEqual(response.status_code, 200)
             self.assertEqual(response.json(), {"message": "Successfully logged out"})
-            mock_remove.assert_called_once()
+            mock_logout.assert_called_once_with("test_user")
+
+    def test_logout_drops_cached_library(self):
+        response_cache = get_response_cache()
+        index_cache = get_library_index_cache()
+        response_cache.set("test_user", "/liked", "v1", {"items": []})
+        index_cache.get("test_user", "v1", Mock)
+        build = Mock()
+
+        with patch.object(auth_service.token_store, "delete"):
+            auth_service.logout("test_user")
+
+        # The next session rebuilds everything from Spotify
+        self.assertIsNone(response_cache.get("test_user", "/liked", "v1"))
+        index_cache.get("test_user", "v1", build)
+        build.assert_called_once()
+
+    def test_logout_without_session(self):
+        # Without a session cookie there is no user to log out
+        response = self.client.get("/logout")
+
+        self.assertEqual(response.status_code, 401)
 
 
 if __name__ == "__main__":
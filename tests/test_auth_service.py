@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from app.core.storage import shard_for, user_data_dir
+from app.services.auth_service import SpotifyClientRegistry
+
+
+class TestSpotifyClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = SpotifyClientRegistry(pool_maxsize=8, max_clients=2)
+
+    def test_client_is_reused_per_key(self):
+        factory = MagicMock(side_effect=lambda session: MagicMock(_session=session))
+
+        first = self.registry.get("token:a", factory)
+        second = self.registry.get("token:a", factory)
+
+        self.assertIs(first, second)
+        factory.assert_called_once()
+
+    def test_session_has_sized_connection_pool(self):
+        session = self.registry.build_session()
+        adapter = session.get_adapter("https://api.spotify.com/v1/")
+
+        self.assertEqual(adapter._pool_maxsize, 8)
+        # Bodies reach spotipy untouched; results are projected after decoding
+        self.assertEqual(session.hooks["response"], [])
+        # 429 is left to the shared rate limiter
+        self.assertNotIn(429, adapter.max_retries.status_forcelist)
+        self.assertFalse(
+            adapter.max_retries.is_retry("GET", 429, has_retry_after=True)
+        )
+
+    def test_least_recent_client_is_evicted_and_closed(self):
+        clients = {}
+
+        def factory_for(key):
+            def factory(session):
+                clients[key] = MagicMock(_session=MagicMock())
+                return clients[key]
+
+            return factory
+
+        self.registry.get("a", factory_for("a"))
+        self.registry.get("b", factory_for("b"))
+        self.registry.get("a", factory_for("a"))
+        self.registry.get("c", factory_for("c"))
+
+        clients["b"]._session.close.assert_called_once()
+        clients["a"]._session.close.assert_not_called()
+
+
+class TestUserDataDir(unittest.TestCase):
+    def test_users_get_separate_sharded_directories(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        first = user_data_dir("alice", data_dir=tmp_dir.name)
+        second = user_data_dir("../etc", data_dir=tmp_dir.name)
+
+        self.assertEqual(
+            first, os.path.join(tmp_dir.name, "users", shard_for("alice"), "alice")
+        )
+        self.assertNotEqual(first, second)
+        # User IDs can never escape their shard directory
+        self.assertEqual(os.path.basename(second), "%2E.%2Fetc")
+        self.assertTrue(os.path.isdir(first))
+
+
+if __name__ == "__main__":
+    unittest.main()
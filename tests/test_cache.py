@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.core.cache import ArtistCache, PlaylistCache
+
+
+class TestArtistCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp_dir.name, "artist_cache.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        cache = ArtistCache()
+        cache.set("a1", ["rock"])
+
+        self.assertEqual(cache.get("a1"), ["rock"])
+        self.assertIsNone(cache.get("a2"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    @patch("app.core.cache.time.time")
+    def test_expired_entries_are_misses(self, mock_time):
+        mock_time.return_value = 1000
+        cache = ArtistCache(ttl=60)
+        cache.set("a1", ["rock"])
+
+        mock_time.return_value = 1061
+        self.assertIsNone(cache.get("a1"))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = ArtistCache(max_entries=2)
+        cache.set("a1", ["rock"])
+        cache.set("a2", ["pop"])
+        cache.get("a1")  # a1 is now the most recently used
+        cache.set("a3", ["jazz"])
+
+        self.assertIsNone(cache.get("a2"))
+        self.assertEqual(cache.get("a1"), ["rock"])
+        self.assertEqual(cache.get("a3"), ["jazz"])
+
+    def test_save_and_load_roundtrip(self):
+        cache = ArtistCache(self.cache_file)
+        cache.set_many({"a1": ["rock"], "a2": []})
+        cache.save()
+
+        with open(self.cache_file, "r") as f:
+            self.assertEqual(set(json.load(f)), {"a1", "a2"})
+
+        reloaded = ArtistCache(self.cache_file)
+        self.assertEqual(reloaded.get("a1"), ["rock"])
+        self.assertEqual(reloaded.get("a2"), [])
+
+
+class TestPlaylistCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache_file = os.path.join(self.tmp_dir.name, "playlist_cache.json")
+
+    def test_entries_are_valid_for_one_snapshot(self):
+        cache = PlaylistCache()
+        cache.set("p1", "s1", ["u1", "u2", "u1"])
+
+        self.assertEqual(cache.get("p1", "s1"), {"u1", "u2"})
+        self.assertIsNone(cache.get("p1", "s2"))
+        self.assertIsNone(cache.get("p1", None))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+        # Storing without a known snapshot forgets the playlist
+        cache.set("p1", None, ["u1"])
+        self.assertEqual(len(cache), 0)
+
+    def test_save_and_load_roundtrip(self):
+        cache = PlaylistCache(self.cache_file)
+        cache.set("p1", "s1", ["u2", "u1"])
+        cache.save()
+
+        reloaded = PlaylistCache(self.cache_file)
+        self.assertEqual(reloaded.get("p1", "s1"), {"u1", "u2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -88,9 +88,43 @@ class TestGenreService(unittest.TestCase):
         self.assertIn("spotify:track:3", genre_playlists["Hip Hop"])
         self.assertIn("spotify:track:4", genre_playlists["Other"])
 
+    def test_organize_by_broad_genre_uses_priority(self):
+        service = GenreService()
+        service.genre_mapping = self.test_mapping
+
+        # Hip Hop outranks Pop and Rock regardless of the song's genre order
+        songs = [
+            {"uri": "spotify:track:5", "genres": ["Pop", "Rap", "rock"]},
+            {"uri": "spotify:track:6", "genres": ["Indie Rock", "dance pop"]},
+        ]
+        genre_playlists = service.organize_by_broad_genre(songs)
+
+        self.assertEqual(genre_playlists["Hip Hop"], ["spotify:track:5"])
+        self.assertEqual(genre_playlists["Rock"], ["spotify:track:6"])
+        self.assertNotIn("Pop", genre_playlists)
+
+    def test_organize_by_broad_genre_duplicate_uris(self):
+        service = GenreService()
+        service.genre_mapping = self.test_mapping
+
+        # A URI keeps its best genre; it only lands in "Other" if it never matched
+        songs = [
+            {"uri": "spotify:track:1", "genres": ["pop"]},
+            {"uri": "spotify:track:2", "genres": ["unknown"]},
+            {"uri": "spotify:track:1", "genres": ["rap"]},
+            {"uri": "spotify:track:1", "genres": []},
+        ]
+        genre_playlists = service.organize_by_broad_genre(songs)
+
+        self.assertEqual(
+            dict(genre_playlists),
+            {"Hip Hop": ["spotify:track:1"], "Other": ["spotify:track:2"]},
+        )
+
     @patch("builtins.open", new_callable=mock_open)
     @patch("json.dump")
-    def test_save_genre_playlists(self, mock_json_dump, mock_file):
+    @patch("os.makedirs")
+    def test_save_genre_playlists(self, mock_makedirs, mock_json_dump, mock_file):
         # Sample genre playlists data
         genre_playlists = {
             "Rock": ["spotify:track:1"],
@@ -112,11 +146,12 @@ class TestGenreService(unittest.TestCase):
         mock_json_dump.assert_called_once()
         args, kwargs = mock_json_dump.call_args
         self.assertEqual(args[0], genre_playlists)
-        self.assertEqual(kwargs["indent"], 4)
+        self.assertEqual(kwargs["separators"], (",", ":"))
 
     @patch("builtins.open", new_callable=mock_open)
     @patch("json.load")
-    def test_load_genre_playlists(self, mock_json_load, mock_file):
+    @patch("os.makedirs")
+    def test_load_genre_playlists(self, mock_makedirs, mock_json_load, mock_file):
         # Sample genre playlists data
         expected_playlists = {"Rock": ["spotify:track:1"], "Pop": ["spotify:track:2"]}
         mock_json_load.return_value = expected_playlists
@@ -134,7 +169,8 @@ class TestGenreService(unittest.TestCase):
         self.assertEqual(result, expected_playlists)
 
     @patch("builtins.open")
-    def test_load_genre_playlists_file_not_found(self, mock_file):
+    @patch("os.makedirs")
+    def test_load_genre_playlists_file_not_found(self, mock_makedirs, mock_file):
         # Setup the mock to raise FileNotFoundError
         mock_file.side_effect = FileNotFoundError
 
@@ -0,0 +1,84 @@
+import unittest
+from app.core.jobs import (
+    COMPLETED,
+    FAILED,
+    InMemoryJobStore,
+    JobManager,
+    RedisJobStore,
+    scaled_progress,
+)
+
+
+class FakeRedis:
+    """Tiny stand-in for the redis client methods used by RedisJobStore."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class TestJobManager(unittest.TestCase):
+    def run_job(self, store, func, *args):
+        manager = JobManager(store, max_workers=1)
+        job = manager.submit("test", func, *args)
+        manager.shutdown(wait=True)
+        return manager.get(job["id"])
+
+    def test_job_reports_progress_and_result(self):
+        stages = []
+
+        def pipeline(progress, value):
+            progress("fetching", 10)
+            stages.append("fetching")
+            progress("grouping", 50)
+            return {"value": value}
+
+        job = self.run_job(InMemoryJobStore(), pipeline, 42)
+
+        self.assertEqual(stages, ["fetching"])
+        self.assertEqual(job["status"], COMPLETED)
+        self.assertEqual(job["percent"], 100)
+        self.assertEqual(job["result"], {"value": 42})
+
+    def test_failed_job_records_error(self):
+        def pipeline(progress):
+            progress("fetching", 10)
+            raise RuntimeError("Spotify unavailable")
+
+        job = self.run_job(InMemoryJobStore(), pipeline)
+
+        self.assertEqual(job["status"], FAILED)
+        self.assertEqual(job["stage"], "fetching")
+        self.assertEqual(job["error"], "Spotify unavailable")
+
+    def test_scaled_progress_maps_counts_into_a_range(self):
+        reports = []
+        report = scaled_progress(
+            lambda stage, percent: reports.append((stage, percent)), "fetching", 0, 50
+        )
+
+        report(0, 0)
+        report(100, 400)
+        report(400, 400)
+
+        self.assertEqual(
+            reports, [("fetching", 0), ("fetching", 12.5), ("fetching", 50)]
+        )
+
+    def test_redis_store_shares_state(self):
+        client = FakeRedis()
+        job = self.run_job(RedisJobStore(client), lambda progress: "done")
+
+        # A second store on the same redis (another worker) sees the job
+        other_worker = RedisJobStore(client)
+        self.assertEqual(other_worker.get(job["id"])["result"], "done")
+        self.assertIsNone(other_worker.get("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from app.services.language_service import LanguageService
+
+
+class TestLanguageService(unittest.TestCase):
+    def setUp(self):
+        self.service = LanguageService()
+        self.service.language_mapping = {
+            "Hindi": ["bollywood", "desi pop"],
+            "Korean": ["k-pop"],
+            "Other Languages": [],
+        }
+
+    def detect(self, name, artist, genres=()):
+        song = {"uri": "spotify:track:1", "name": name, "artist": artist}
+        song["genres"] = list(genres)
+        language_data = self.service.detect_languages([song])
+        return next(iter(language_data))
+
+    def test_mapping_genres_take_precedence(self):
+        self.assertEqual(self.detect("Song", "Stromae", ["Bollywood"]), "Hindi")
+
+    def test_indicators_follow_language_priority(self):
+        # "stromae" is a French artist, but "tokyo" is a Japanese keyword and
+        # Japanese comes before French in the indicator priority order
+        self.assertEqual(self.detect("Tokyo Nights", "Stromae"), "Japanese")
+        self.assertEqual(self.detect("Alors on danse", "Stromae"), "French")
+
+    def test_overlapping_indicators_are_found(self):
+        # "seoul" (Korean) starts inside "japanese" (Japanese); Korean wins
+        self.assertEqual(self.detect("Song", "Japaneseoul"), "Korean")
+        self.assertEqual(self.detect("Song", "Japanese Band"), "Japanese")
+
+    def test_genre_indicators(self):
+        self.assertEqual(self.detect("Song", "Someone", ["mandopop"]), "Chinese")
+
+    def test_defaults_to_english(self):
+        self.assertEqual(self.detect("Song", "Nobody"), "English")
+
+
+if __name__ == "__main__":
+    unittest.main()
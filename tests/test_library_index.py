@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app.core.library_index import (
+    InvalidCursor,
+    InvalidPageRequest,
+    LibraryIndex,
+    LibraryIndexCache,
+    cursor_signer,
+    encode_cursor,
+)
+from app.models.track import Track
+
+SIGNER = cursor_signer("test-secret")
+
+
+def make_index(count=10, version="v1"):
+    """Index ``count`` tracks, newest first, alternating two genres and artists."""
+    tracks = [
+        Track(
+            name=f"Song {chr(ord('a') + (i * 7) % count)}{i}",
+            artist=f"Artist {i % 2}",
+            uri=f"spotify:track:{i}",
+            genres=("rock",) if i % 2 else ("pop", "dance"),
+            artist_ids=(f"a{i % 2}",),
+        )
+        for i in range(count)
+    ]
+    added_at = [f"2024-01-01T00:00:{count - i:02d}Z" for i in range(count)]
+    return LibraryIndex(tracks, added_at, version=version)
+
+
+def ids(items):
+    return [track.id for track, _ in items]
+
+
+class TestLibraryIndex(unittest.TestCase):
+    def test_cursor_pages_through_the_library(self):
+        index = make_index(10)
+
+        seen = []
+        cursor = None
+        while True:
+            items, total, cursor = index.page(SIGNER, limit=4, cursor=cursor)
+            seen.extend(ids(items))
+            if cursor is None:
+                break
+
+        self.assertEqual(total, 10)
+        self.assertEqual(seen, [str(i) for i in range(10)])
+
+    def test_filters_use_posting_lists(self):
+        index = make_index(10)
+
+        items, total, _ = index.page(SIGNER, limit=50, genre="rock")
+        self.assertEqual(ids(items), ["1", "3", "5", "7", "9"])
+        self.assertEqual(total, 5)
+
+        items, _, _ = index.page(SIGNER, limit=50, genre="pop", artist="a1")
+        self.assertEqual(items, [])
+        items, _, _ = index.page(SIGNER, limit=2, sort="oldest", artist="a0")
+        self.assertEqual(ids(items), ["8", "6"])
+        self.assertEqual(items[0][1], "2024-01-01T00:00:02Z")
+
+    def test_sorted_orders_match_a_full_sort(self):
+        index = make_index(10)
+        tracks = sorted(index.tracks, key=lambda track: track.name.casefold())
+
+        items, _, _ = index.page(SIGNER, limit=50, sort="name")
+        self.assertEqual(ids(items), [track.id for track in tracks])
+        items, _, _ = index.page(SIGNER, limit=50, sort="name", genre="rock")
+        self.assertEqual(
+            ids(items), [track.id for track in tracks if "rock" in track.genres]
+        )
+
+    def test_cursor_is_bound_to_its_query_and_version(self):
+        old = make_index(10, version="v1")
+        _, _, cursor = old.page(SIGNER, limit=3, sort="name", genre="rock")
+
+        rest = old.page(SIGNER, limit=50, cursor=cursor, sort="name", genre="rock")
+        self.assertEqual(len(rest[0]), 2)
+        for query in ({"sort": "recent", "genre": "rock"}, {"sort": "name"}):
+            with self.assertRaises(InvalidCursor):
+                old.page(SIGNER, cursor=cursor, **query)
+        with self.assertRaises(InvalidCursor):
+            make_index(10, version="v2").page(
+                SIGNER, cursor=cursor, sort="name", genre="rock"
+            )
+
+    def test_rejects_forged_and_malformed_cursors(self):
+        index = make_index(10)
+        forged = encode_cursor(cursor_signer("other"), "v1", 3, ["recent", None, None])
+        for cursor in (forged, "not a cursor", SIGNER.dumps(["v1", -1, []])):
+            with self.assertRaises(InvalidCursor):
+                index.page(SIGNER, cursor=cursor)
+        with self.assertRaises(InvalidPageRequest):
+            index.page(SIGNER, sort="popularity")
+        with self.assertRaises(InvalidPageRequest):
+            index.page(SIGNER, limit=0)
+
+
+class TestLibraryIndexCache(unittest.TestCase):
+    def test_rebuilds_only_when_version_changes(self):
+        cache = LibraryIndexCache()
+        build = MagicMock(side_effect=lambda: make_index(3))
+
+        first = cache.get("u1", "v1", build)
+        self.assertIs(cache.get("u1", "v1", build), first)
+        self.assertEqual(build.call_count, 1)
+
+        second = cache.get("u1", "v2", build)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.version, "v2")
+        self.assertEqual(build.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
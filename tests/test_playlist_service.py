@@ -1,13 +1,22 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
-from app.services.playlist_service import PlaylistService
+from app.core.cache import PlaylistCache
+from app.services.playlist_service import PLAYLIST_ITEMS_FIELDS, PlaylistService
 
 
 class TestPlaylistService(unittest.TestCase):
     def setUp(self):
         # Mock Spotify client
         self.mock_sp = MagicMock()
-        self.playlist_service = PlaylistService(self.mock_sp)
+        self.mock_sp.current_user.return_value = {"id": "user123"}
+        self.mock_sp.playlist_add_items.return_value = {"snapshot_id": "s2"}
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.playlist_service = PlaylistService(
+            self.mock_sp, data_dir=self.tmp_dir.name
+        )
 
         # Sample test data
         self.playlist_id = "playlist123"
@@ -39,9 +48,30 @@ class TestPlaylistService(unittest.TestCase):
         self.assertIn("spotify:track:1", tracks)
         self.assertIn("spotify:track:2", tracks)
         self.mock_sp.playlist_items.assert_called_once_with(
-            self.playlist_id, offset=0, limit=100
+            self.playlist_id, fields=PLAYLIST_ITEMS_FIELDS, offset=0, limit=100
+        )
+
+    def test_playlist_contents_are_cached_by_snapshot(self):
+        self.mock_sp.playlist.return_value = {"snapshot_id": "s1"}
+        self.mock_sp.playlist_items.return_value = {
+            "items": [{"track": {"uri": "spotify:track:1"}}]
+        }
+        self.playlist_service.playlist_cache = PlaylistCache()
+
+        first = self.playlist_service.get_existing_playlist_tracks(self.playlist_id)
+        second = self.playlist_service.get_existing_playlist_tracks(self.playlist_id)
+
+        # The second read is revalidated with one metadata call only
+        self.assertEqual(first, second)
+        self.mock_sp.playlist_items.assert_called_once()
+        self.mock_sp.playlist.assert_called_with(
+            self.playlist_id, fields="snapshot_id"
         )
 
+        self.mock_sp.playlist.return_value = {"snapshot_id": "s2"}
+        self.playlist_service.get_existing_playlist_tracks(self.playlist_id)
+        self.assertEqual(self.mock_sp.playlist_items.call_count, 2)
+
     def test_add_tracks_in_batches(self):
         # Generate test URIs that would trigger batching (150 tracks)
         test_uris = [f"spotify:track:{i}" for i in range(150)]
@@ -140,6 +170,34 @@ class TestPlaylistService(unittest.TestCase):
         # Verify create_or_update_playlist was called twice
         self.assertEqual(self.playlist_service.create_or_update_playlist.call_count, 2)
 
+    def test_create_genre_playlists_parallel(self):
+        def create_or_update(name, description, uris):
+            if name == "Pop Playlist":
+                raise Exception("Pop failed")
+            return f"{name} id"
+
+        self.playlist_service.create_or_update_playlist = MagicMock(
+            side_effect=create_or_update
+        )
+        genre_playlists = dict(self.genre_playlists, Jazz=["spotify:track:11"])
+
+        on_progress = MagicMock()
+
+        result = self.playlist_service.create_genre_playlists(
+            genre_playlists, parallel=True, on_progress=on_progress
+        )
+
+        # Every playlist is attempted, and a failure is reported per playlist
+        self.assertEqual(list(result), ["Rock", "Pop", "Jazz"])
+        self.assertEqual(result["Rock"]["id"], "Rock Playlist id")
+        self.assertEqual(result["Jazz"]["track_count"], 1)
+        self.assertEqual(result["Pop"], {"name": "Pop Playlist", "error": "Pop failed"})
+        self.assertEqual(self.playlist_service.create_or_update_playlist.call_count, 3)
+        # Failed playlists count as finished work too
+        self.assertEqual(
+            [c.args for c in on_progress.call_args_list], [(1, 3), (2, 3), (3, 3)]
+        )
+
     def test_create_language_playlists(self):
         # Mock create_or_update_playlist method
         self.playlist_service.create_or_update_playlist = MagicMock()
@@ -161,6 +219,136 @@ class TestPlaylistService(unittest.TestCase):
         # Verify create_or_update_playlist was called twice
         self.assertEqual(self.playlist_service.create_or_update_playlist.call_count, 2)
 
+    def test_build_playlist_index_paginates(self):
+        self.mock_sp.current_user.return_value = {"id": "user123"}
+        self.mock_sp.current_user_playlists.side_effect = [
+            {
+                "items": [{"name": f"Playlist {i}", "id": f"id{i}"} for i in range(50)],
+                "next": "page-2",
+            },
+            {"items": [{"name": "Rock Playlist", "id": "playlist_rock"}], "next": None},
+        ]
+
+        index = self.playlist_service.build_playlist_index()
+
+        # Playlists beyond the first page are found, so none get duplicated
+        self.assertEqual(len(index), 51)
+        self.assertEqual(index["Rock Playlist"], "playlist_rock")
+        self.assertEqual(self.playlist_service.user_id, "user123")
+        self.mock_sp.current_user_playlists.assert_called_with(limit=50, offset=50)
+
+    def test_playlist_index_is_reused_across_playlists(self):
+        self.mock_sp.current_user.return_value = {"id": "user123"}
+        self.mock_sp.current_user_playlists.return_value = {
+            "items": [{"name": "Rock Playlist", "id": "playlist_rock"}]
+        }
+        self.mock_sp.user_playlist_create.return_value = {"id": "playlist_pop"}
+        self.mock_sp.playlist_items.return_value = {"items": []}
+
+        self.playlist_service.create_genre_playlists(self.genre_playlists)
+
+        # One index scan serves every playlist in the run
+        self.mock_sp.current_user.assert_called_once()
+        self.mock_sp.current_user_playlists.assert_called_once()
+        self.mock_sp.user_playlist_create.assert_called_once()
+        self.assertEqual(
+            self.playlist_service.playlist_index,
+            {"Rock Playlist": "playlist_rock", "Pop Playlist": "playlist_pop"},
+        )
+
+    def reconcile_fixture(self, current_uris):
+        """Point the client at one existing playlist holding ``current_uris``."""
+        self.mock_sp.current_user.return_value = {"id": "user123"}
+        self.mock_sp.current_user_playlists.return_value = {
+            "items": [{"name": "Rock Playlist", "id": "rock", "snapshot_id": "s1"}]
+        }
+        items = [{"track": {"uri": uri}} for uri in current_uris]
+        self.mock_sp.playlist_items.side_effect = lambda _, fields, offset, limit: {
+            "items": items[offset : offset + limit],
+            "next": "more" if offset + limit < len(items) else None,
+        }
+        self.mock_sp.playlist_add_items.return_value = {"snapshot_id": "s2"}
+        self.mock_sp.playlist_remove_all_occurrences_of_items.return_value = {
+            "snapshot_id": "s3"
+        }
+        return PlaylistService(
+            self.mock_sp, playlist_cache=PlaylistCache(), data_dir=self.tmp_dir.name
+        )
+
+    def test_reconcile_adds_and_removes_the_difference(self):
+        stale = [f"spotify:track:old{i}" for i in range(150)]
+        service = self.reconcile_fixture(stale + ["spotify:track:1"])
+
+        service.create_or_update_playlist("Rock Playlist", "d", self.sample_uris)
+
+        removes = self.mock_sp.playlist_remove_all_occurrences_of_items.call_args_list
+        self.assertEqual([len(c.args[1]) for c in removes], [100, 50])
+        self.assertEqual(
+            sorted(uri for c in removes for uri in c.args[1]), sorted(stale)
+        )
+        self.mock_sp.playlist_add_items.assert_called_once_with(
+            "rock", self.sample_uris[1:]
+        )
+
+    def test_reconcile_skips_unchanged_playlist(self):
+        service = self.reconcile_fixture(self.sample_uris)
+
+        # Already in sync: the contents are read once, nothing is written
+        service.create_or_update_playlist("Rock Playlist", "d", self.sample_uris)
+        self.mock_sp.playlist_items.assert_called_once()
+        self.mock_sp.playlist_add_items.assert_not_called()
+        self.mock_sp.playlist_remove_all_occurrences_of_items.assert_not_called()
+
+        # Same snapshot on the next run: contents come from the cache
+        self.mock_sp.playlist_items.reset_mock()
+        service.create_genre_playlists({"Rock": list(reversed(self.sample_uris))})
+        self.mock_sp.playlist_items.assert_not_called()
+        self.mock_sp.playlist_add_items.assert_not_called()
+
+        # An edit on Spotify's side changes the snapshot and forces a re-read
+        playlists = self.mock_sp.current_user_playlists.return_value["items"]
+        playlists[0]["snapshot_id"] = "s9"
+        service.create_genre_playlists({"Rock": self.sample_uris})
+        self.mock_sp.playlist_items.assert_called_once()
+
+    def test_reconcile_failed_write_is_retried(self):
+        service = self.reconcile_fixture([])
+        self.mock_sp.playlist_add_items.side_effect = [
+            Exception("boom"),
+            {"snapshot_id": "s2"},
+        ]
+
+        service.create_or_update_playlist("Rock Playlist", "d", self.sample_uris)
+        service.create_or_update_playlist("Rock Playlist", "d", self.sample_uris)
+
+        self.assertEqual(self.mock_sp.playlist_items.call_count, 2)
+        self.assertEqual(self.mock_sp.playlist_add_items.call_count, 2)
+
+    def test_reconcile_skips_playlist_that_cannot_be_read(self):
+        service = self.reconcile_fixture(self.sample_uris)
+        self.mock_sp.playlist_items.side_effect = Exception("boom")
+
+        playlist_id = service.create_or_update_playlist(
+            "Rock Playlist", "d", self.sample_uris
+        )
+
+        # Nothing is written rather than re-adding every track
+        self.assertIsNone(playlist_id)
+        self.mock_sp.playlist_add_items.assert_not_called()
+        self.mock_sp.playlist_remove_all_occurrences_of_items.assert_not_called()
+
+    def test_failed_read_is_not_cached(self):
+        service = self.reconcile_fixture(self.sample_uris)
+        service.create_or_update_playlist("Rock Playlist", "d", self.sample_uris)
+        self.mock_sp.playlist_items.side_effect = Exception("boom")
+
+        # The snapshot changed on Spotify's side and the re-read fails
+        service.playlist_snapshots["rock"] = "s9"
+        service.create_or_update_playlist("Rock Playlist", "d", self.sample_uris)
+
+        self.assertIsNone(service.playlist_cache.get("rock", "s9"))
+        self.assertIsNone(service.playlist_cache.get("rock", "s1"))
+
     def test_create_or_update_playlist_empty_uris(self):
         # Test with empty URI list
         playlist_id = self.playlist_service.create_or_update_playlist(
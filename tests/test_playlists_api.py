@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app.api import playlists
+from app.api.deps import get_current_user_id
+from app.core.cache import ArtistCache
+from app.core.jobs import COMPLETED, InMemoryJobStore, JobManager
+from app.main import app
+from app.services.song_service import SongService
+
+
+class TestPlaylistJobsApi(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        mock_sp = MagicMock()
+        mock_sp.current_user.return_value = {"id": "user123"}
+        mock_sp.current_user_saved_tracks.return_value = {
+            "items": [
+                {
+                    "added_at": f"2024-01-0{i}T00:00:00Z",
+                    "track": {
+                        "id": str(i),
+                        "name": f"Song {i}",
+                        "uri": f"spotify:track:{i}",
+                        "artists": [{"id": artist_id, "name": "Artist"}],
+                    },
+                }
+                for i, artist_id in ((1, "k1"), (2, "l1"), (3, "k1"))
+            ],
+            "total": 3,
+        }
+        mock_sp.artists.return_value = {
+            "artists": [
+                {"id": "k1", "genres": ["k-pop"]},
+                {"id": "l1", "genres": ["latin"]},
+            ]
+        }
+        song_service = SongService(
+            mock_sp,
+            data_dir=self.tmp_dir.name,
+            artist_cache=ArtistCache(),
+            user_id="user123",
+        )
+        self.playlist_service = MagicMock()
+        self.playlist_service.create_genre_playlists.return_value = {}
+        self.playlist_service.create_language_playlists.return_value = {}
+
+        app.dependency_overrides[get_current_user_id] = lambda: "user123"
+        app.dependency_overrides[playlists.get_song_service] = lambda: song_service
+        app.dependency_overrides[playlists.get_playlist_service] = (
+            lambda: self.playlist_service
+        )
+        self.addCleanup(app.dependency_overrides.clear)
+        self.client = TestClient(app)
+
+    def run_job(self, path: str, streaming: bool):
+        manager = JobManager(InMemoryJobStore(), max_workers=1)
+        with patch.object(playlists, "get_job_manager", return_value=manager):
+            response = self.client.post(path, params={"streaming": streaming})
+        self.assertEqual(response.status_code, 202)
+        manager.shutdown(wait=True)
+        return manager.get(response.json()["job_id"])
+
+    def test_languages_job_classifies_songs(self):
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                job = self.run_job("/languages", streaming)
+
+                self.assertEqual(job["status"], COMPLETED)
+                language_playlists = (
+                    self.playlist_service.create_language_playlists.call_args.args[0]
+                )
+                self.assertEqual(
+                    dict(language_playlists),
+                    {
+                        "Korean": ["spotify:track:1", "spotify:track:3"],
+                        "Spanish": ["spotify:track:2"],
+                    },
+                )
+
+    def test_jobs_write_only_into_the_data_dir(self):
+        cwd = tempfile.TemporaryDirectory()
+        self.addCleanup(cwd.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(cwd.name)
+
+        for path in ("/genres", "/languages"):
+            for streaming in (False, True):
+                self.assertEqual(self.run_job(path, streaming)["status"], COMPLETED)
+
+        self.assertEqual(os.listdir(cwd.name), [])
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["users"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from app.core.projection import SAVED_TRACKS_FIELDS, parse_fields, project
+
+
+def saved_track_page():
+    return {
+        "href": "https://api.spotify.com/v1/me/tracks",
+        "items": [
+            {
+                "added_at": "2024-01-01T00:00:00Z",
+                "track": {
+                    "id": "t1",
+                    "uri": "spotify:track:t1",
+                    "name": "Song",
+                    "popularity": 50,
+                    "available_markets": ["AD", "AE"],
+                    "artists": [{"id": "a1", "name": "Artist", "type": "artist"}],
+                    "album": {
+                        "name": "Album",
+                        "available_markets": ["AD"],
+                        "images": [{"url": "u", "height": 640, "width": 640}],
+                    },
+                },
+            },
+            {"added_at": "2024-01-01T00:00:00Z", "track": None},
+        ],
+        "next": None,
+        "total": 2,
+    }
+
+
+class TestProjection(unittest.TestCase):
+    def test_parse_fields(self):
+        self.assertEqual(
+            parse_fields("items(track(uri,album(name))),next"),
+            {"items": {"track": {"uri": None, "album": {"name": None}}}, "next": None},
+        )
+
+    def test_project_keeps_only_requested_fields(self):
+        page = project(saved_track_page(), SAVED_TRACKS_FIELDS)
+
+        track = page["items"][0]["track"]
+        self.assertEqual(set(page), {"items", "next", "total"})
+        self.assertNotIn("available_markets", track)
+        self.assertNotIn("popularity", track)
+        self.assertEqual(track["artists"], [{"id": "a1", "name": "Artist"}])
+        self.assertEqual(track["album"], {"name": "Album", "images": [{"url": "u"}]})
+        self.assertIsNone(page["items"][1]["track"])
+
+
+if __name__ == "__main__":
+    unittest.main()
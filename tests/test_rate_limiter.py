@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from spotipy.exceptions import SpotifyException
+from app.core.rate_limiter import RateLimiter
+
+
+def throttled(retry_after="2"):
+    return SpotifyException(
+        429, -1, "rate limited", headers={"Retry-After": retry_after}
+    )
+
+
+class FakeClock:
+    """Monotonic clock that only moves forward when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("app.core.rate_limiter.time.monotonic", self.clock.monotonic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = RateLimiter(max_rate=10, min_rate=1, increase=1, decrease=0.5)
+
+    @patch("app.core.rate_limiter.time.sleep")
+    def test_call_runs_without_sleeping_when_not_throttled(self, mock_sleep):
+        func = MagicMock(return_value="ok")
+
+        for _ in range(5):
+            self.assertEqual(self.limiter.call(func, 1, key="value"), "ok")
+
+        func.assert_called_with(1, key="value")
+        mock_sleep.assert_not_called()
+        self.assertEqual(self.limiter.rate, 10)
+
+    def test_call_honours_retry_after_and_backs_off(self):
+        func = MagicMock(side_effect=[throttled("2"), "ok"])
+
+        with patch("app.core.rate_limiter.time.sleep", side_effect=self.clock.sleep):
+            self.assertEqual(self.limiter.call(func), "ok")
+
+        # The retry waited for Retry-After and the rate was halved, then
+        # ramped up by one step after the successful retry
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(self.clock.now, 2)
+        self.assertEqual(self.limiter.rate, 6)
+        self.assertEqual(self.limiter.throttle_count, 1)
+
+    def test_call_gives_up_after_max_retries(self):
+        self.limiter.max_retries = 2
+        func = MagicMock(side_effect=throttled("1"))
+
+        with patch("app.core.rate_limiter.time.sleep", side_effect=self.clock.sleep):
+            with self.assertRaises(SpotifyException):
+                self.limiter.call(func)
+
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(self.limiter.rate, 2.5)
+
+    def test_other_errors_are_not_retried(self):
+        func = MagicMock(side_effect=SpotifyException(404, -1, "not found"))
+
+        with self.assertRaises(SpotifyException):
+            self.limiter.call(func)
+
+        func.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
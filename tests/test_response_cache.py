@@ -0,0 +1,149 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app.api import songs
+from app.api.deps import get_current_user_id
+from app.core.library_index import LibraryIndex, LibraryIndexCache
+from app.core.response_cache import ResponseCache, etag_matches
+from app.main import app
+from app.models.track import Track
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_entries_are_valid_for_one_version(self):
+        cache = ResponseCache()
+        cache.set("u1", "genres", "v1", [{"name": "rock", "count": 1}])
+
+        self.assertEqual(cache.get("u1", "genres", "v1"), [{"name": "rock", "count": 1}])
+        self.assertIsNone(cache.get("u1", "genres", "v2"))
+        self.assertIsNone(cache.get("u2", "genres", "v1"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("u1", "a", "v", 1)
+        cache.set("u1", "b", "v", 2)
+        cache.get("u1", "a", "v")
+        cache.set("u1", "c", "v", 3)
+
+        self.assertEqual(cache.get("u1", "a", "v"), 1)
+        self.assertIsNone(cache.get("u1", "b", "v"))
+
+    @patch("app.core.response_cache.time.monotonic")
+    def test_library_version_is_probed_once_per_ttl(self, mock_monotonic):
+        cache = ResponseCache(version_ttl=30)
+        probe = MagicMock(side_effect=["v1", "v2"])
+
+        mock_monotonic.return_value = 100
+        self.assertEqual(cache.library_version("u1", probe), "v1")
+        mock_monotonic.return_value = 120
+        self.assertEqual(cache.library_version("u1", probe), "v1")
+        mock_monotonic.return_value = 131
+        self.assertEqual(cache.library_version("u1", probe), "v2")
+        self.assertEqual(probe.call_count, 2)
+
+    def test_etag_matching(self):
+        etag = ResponseCache.etag("genres", "v1")
+
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(f'"other", W/{etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches(ResponseCache.etag("genres", "v2"), etag))
+        self.assertFalse(etag_matches(None, etag))
+
+
+class TestCachedEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        patcher = patch.object(songs, "get_response_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(
+            songs, "get_library_index_cache", return_value=LibraryIndexCache()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tracks = [
+            Track(f"Song {i}", "Artist", f"spotify:track:{i}", ("rock",), ("a1",))
+            for i in range(5)
+        ]
+        added_at = [f"2024-01-0{5 - i}T00:00:00Z" for i in range(5)]
+        self.song_service = MagicMock(user_id="user123")
+        self.song_service.library_version.return_value = "5:2024-01-05:0"
+        self.song_service.build_library_index.side_effect = lambda: LibraryIndex(
+            tracks, added_at
+        )
+
+        app.dependency_overrides[get_current_user_id] = lambda: "user123"
+        app.dependency_overrides[songs.get_song_service] = lambda: self.song_service
+        self.addCleanup(app.dependency_overrides.clear)
+        self.client = TestClient(app)
+
+    def test_genres_revalidates_with_etag(self):
+        first = self.client.get("/genres")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["etag"]
+
+        second = self.client.get("/genres", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers["etag"], etag)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(first.json(), [{"name": "rock", "count": 5}])
+        self.song_service.build_library_index.assert_called_once()
+
+        stats = self.client.get("/cache/stats").json()["response_cache"]
+        self.assertEqual(stats["endpoints"]["genres"]["not_modified"], 1)
+
+    def test_library_change_rebuilds_response(self):
+        etag = self.client.get("/genres").headers["etag"]
+
+        self.cache.invalidate("user123")
+        self.song_service.library_version.return_value = "6:2024-01-06:9"
+        response = self.client.get("/genres", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+        self.assertEqual(self.song_service.build_library_index.call_count, 2)
+
+    def test_liked_pages_with_cursor_from_one_index(self):
+        first = self.client.get("/liked", params={"limit": 3}).json()
+        self.assertEqual([item["id"] for item in first["items"]], ["0", "1", "2"])
+        self.assertEqual(first["total"], 5)
+        self.assertEqual(first["items"][0]["added_at"], "2024-01-05T00:00:00Z")
+
+        second = self.client.get(
+            "/liked", params={"limit": 3, "cursor": first["next_cursor"]}
+        ).json()
+        self.assertEqual([item["id"] for item in second["items"]], ["3", "4"])
+        self.assertIsNone(second["next_cursor"])
+        self.song_service.build_library_index.assert_called_once()
+
+    def test_liked_rejects_bad_cursor(self):
+        response = self.client.get("/liked", params={"cursor": "bogus"})
+        self.assertEqual(response.status_code, 400)
+        cursor = self.client.get("/liked", params={"limit": 3}).json()["next_cursor"]
+        response = self.client.get("/liked", params={"cursor": cursor, "sort": "name"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/liked", params={"sort": "popularity"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_liked_clamps_limit(self):
+        first = self.client.get("/liked", params={"limit": 0}).json()
+        self.assertEqual(len(first["items"]), 1)
+
+        every = self.client.get("/liked", params={"limit": 1000}).json()
+        self.assertEqual(len(every["items"]), 5)
+
+    def test_liked_library_errors_are_not_client_errors(self):
+        self.song_service.build_library_index.side_effect = ValueError("bad page")
+
+        response = self.client.get("/liked")
+        self.assertEqual(response.status_code, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
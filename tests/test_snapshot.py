@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import unittest
+from array import array
+from app.core.snapshot import (
+    _HEADER,
+    LibrarySnapshot,
+    build_snapshot,
+    main,
+    write_snapshot,
+)
+from app.models.track import Track
+
+SONGS = [
+    {
+        "name": "Song 1",
+        "artist": "Artist A",
+        "genres": ["rock", "indie"],
+        "uri": "spotify:track:1",
+    },
+    {"name": "Canción", "artist": "Artist B", "genres": [], "uri": "spotify:track:2"},
+    {
+        "name": "Song 3",
+        "artist": "Artist A",
+        "genres": ["rock"],
+        "uri": "spotify:track:3",
+    },
+]
+
+TRACKS = [Track.from_record(song) for song in SONGS]
+
+
+class TestLibrarySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        snapshot = LibrarySnapshot(build_snapshot(SONGS, ["indie", "rock"]))
+
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(list(snapshot), TRACKS)
+        self.assertEqual(snapshot[-1], TRACKS[2])
+        self.assertEqual(snapshot[1:], TRACKS[1:])
+        self.assertEqual(snapshot.all_genres, ["indie", "rock"])
+        with self.assertRaises(IndexError):
+            snapshot[3]
+
+    def test_strings_are_interned(self):
+        data = build_snapshot(SONGS * 100)
+
+        self.assertEqual(data.count(b"Artist A"), 1)
+        self.assertEqual(data.count(b"rock"), 1)
+
+    def test_default_genre_list(self):
+        snapshot = LibrarySnapshot(build_snapshot(SONGS))
+
+        self.assertEqual(snapshot.all_genres, ["indie", "rock"])
+
+    def test_empty_library(self):
+        snapshot = LibrarySnapshot(build_snapshot([], []))
+
+        self.assertEqual(len(snapshot), 0)
+        self.assertEqual(snapshot.all_genres, [])
+
+    def test_open_memory_maps_file(self):
+        path = os.path.join(self.tmp_dir.name, "song_data.snap")
+        write_snapshot(path, SONGS)
+
+        with LibrarySnapshot.open(path) as snapshot:
+            self.assertEqual(snapshot[0], TRACKS[0])
+            track = snapshot[1]
+
+        # Tracks outlive the mapping; the snapshot itself is closed
+        self.assertEqual(track, TRACKS[1])
+        with self.assertRaises(ValueError):
+            snapshot[0]
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            LibrarySnapshot(b"[{}]" + b"\0" * 32)
+
+    def test_rejects_truncated_files(self):
+        data = build_snapshot(SONGS)
+        for size in (0, _HEADER.size - 1, len(data) - 4):
+            with self.assertRaises(ValueError):
+                LibrarySnapshot(data[:size])
+
+        path = os.path.join(self.tmp_dir.name, "song_data.snap")
+        with open(path, "wb") as f:
+            f.write(data[: len(data) // 2])
+        with self.assertRaises(ValueError):
+            LibrarySnapshot.open(path)
+
+    def test_reads_foreign_byte_order(self):
+        snapshot = LibrarySnapshot(_foreign_byte_order(build_snapshot(SONGS)))
+
+        self.assertEqual(list(snapshot), TRACKS)
+
+    def test_converter(self):
+        source = os.path.join(self.tmp_dir.name, "song_data.json")
+        genres = os.path.join(self.tmp_dir.name, "unique_genres.json")
+        target = os.path.join(self.tmp_dir.name, "song_data.snap")
+        with open(source, "w") as f:
+            json.dump(SONGS, f, indent=4)
+        with open(genres, "w") as f:
+            json.dump(["indie", "rock"], f)
+
+        main([source, target, "--genres", genres])
+
+        snapshot = LibrarySnapshot.open(target)
+        self.assertEqual(list(snapshot), TRACKS)
+        self.assertEqual(snapshot.all_genres, ["indie", "rock"])
+
+
+def _foreign_byte_order(data: bytes) -> bytes:
+    """Re-encode a native snapshot as if written on the opposite byte order."""
+    header = bytearray(data[:_HEADER.size])
+    header[6] ^= 1
+    n_strings = _HEADER.unpack_from(data)[4]
+    offsets = array("I", data[_HEADER.size : _HEADER.size + 4 * (n_strings + 1)])
+    blob_end = _HEADER.size + 4 * len(offsets) + offsets[-1]
+    blob_end += -blob_end % 4
+    blob = data[_HEADER.size + 4 * len(offsets) : blob_end]
+    columns = array("I", data[blob_end:])
+    offsets.byteswap()
+    columns.byteswap()
+    return bytes(header) + offsets.tobytes() + blob + columns.tobytes()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,339 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from app.core.cache import ArtistCache
+from app.services.song_service import SongService
+
+
+def make_library(total, start=0):
+    """Build fake saved-track items for a library of the given size, newest first."""
+    return [
+        {
+            "added_at": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z",
+            "track": {"id": str(i), "uri": f"spotify:track:{i}", "artists": []},
+        }
+        for i in reversed(range(start, start + total))
+    ]
+
+
+class TestSongService(unittest.TestCase):
+    def setUp(self):
+        # Mock Spotify client
+        self.mock_sp = MagicMock()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.artist_cache = ArtistCache()
+        self.song_service = SongService(
+            self.mock_sp, data_dir=self.tmp_dir.name, artist_cache=self.artist_cache
+        )
+
+        self.library = make_library(237)
+
+        def saved_tracks(limit=50, offset=0):
+            return {
+                "items": self.library[offset : offset + limit],
+                "total": len(self.library),
+            }
+
+        self.mock_sp.current_user_saved_tracks.side_effect = saved_tracks
+
+    def test_fetch_liked_songs_sequential(self):
+        result = self.song_service.fetch_liked_songs()
+
+        self.assertEqual(result["items"], self.library)
+        self.assertEqual(self.mock_sp.current_user_saved_tracks.call_count, 5)
+
+    def test_fetch_liked_songs_concurrent_keeps_offset_order(self):
+        result = self.song_service.fetch_liked_songs(concurrent=True, max_workers=4)
+
+        # Items must come back in library order regardless of completion order
+        self.assertEqual(result["items"], self.library)
+        self.assertEqual(self.mock_sp.current_user_saved_tracks.call_count, 5)
+
+    def test_fetch_liked_songs_reports_progress_per_page(self):
+        for concurrent in (False, True):
+            reports = []
+            self.song_service.fetch_liked_songs(
+                concurrent=concurrent,
+                on_progress=lambda done, total: reports.append((done, total)),
+            )
+
+            self.assertEqual(len(reports), 5)
+            self.assertEqual(reports[0], (50, 237))
+            self.assertEqual(reports[-1], (237, 237))
+            self.assertEqual(reports, sorted(reports))
+
+    def test_fetch_liked_songs_concurrent_stops_on_error(self):
+        def saved_tracks(limit=50, offset=0):
+            if offset == 100:
+                raise Exception("boom")
+            return {
+                "items": self.library[offset : offset + limit],
+                "total": len(self.library),
+            }
+
+        self.mock_sp.current_user_saved_tracks.side_effect = saved_tracks
+
+        result = self.song_service.fetch_liked_songs(concurrent=True, max_workers=1)
+
+        # Only the pages before the failed offset are returned
+        self.assertEqual(result["items"], self.library[:100])
+
+    def test_fetch_liked_songs_concurrent_single_page(self):
+        self.library = make_library(10)
+
+        result = self.song_service.fetch_liked_songs(concurrent=True)
+
+        self.assertEqual(result["items"], self.library)
+        self.mock_sp.current_user_saved_tracks.assert_called_once_with(
+            limit=50, offset=0
+        )
+
+    def test_fetch_artist_genres_uses_cache(self):
+        self.artist_cache.set("a1", ["rock"])
+        self.mock_sp.artists.return_value = {
+            "artists": [{"id": "a2", "genres": ["pop"]}]
+        }
+
+        result = self.song_service.fetch_artist_genres(["a1", "a2", "a2", "a1"])
+
+        # Only the uncached artist is requested, and only once
+        self.assertEqual(result, {"a1": ["rock"], "a2": ["pop"]})
+        self.mock_sp.artists.assert_called_once_with(["a2"])
+
+        # A second lookup is served entirely from the cache
+        self.song_service.fetch_artist_genres(["a1", "a2"])
+        self.mock_sp.artists.assert_called_once()
+        self.assertEqual(self.artist_cache.stats()["hits"], 3)
+
+    def test_resolve_artist_genres_dedupes_all_credited_artists(self):
+        # 237 tracks credit 120 distinct artists, most of them several times
+        tracks = [
+            {"artists": [{"id": f"a{i % 100}"}, {"id": f"f{i % 20}"}]}
+            for i in range(237)
+        ]
+        self.artist_cache.set("a0", ["rock"])
+        self.mock_sp.artists.side_effect = lambda ids: {
+            "artists": [{"id": artist_id, "genres": ["pop"]} for artist_id in ids]
+        }
+
+        artist_genres = self.song_service.resolve_artist_genres(tracks)
+
+        self.assertEqual(len(artist_genres), 120)
+        self.assertEqual(artist_genres["a0"], ("rock",))
+        # 119 uncached artists need ceil(119 / 50) requests
+        self.assertEqual(self.mock_sp.artists.call_count, 3)
+        requested = [
+            artist_id
+            for call in self.mock_sp.artists.call_args_list
+            for artist_id in call.args[0]
+        ]
+        self.assertEqual(len(requested), len(set(requested)))
+
+    def test_unknown_artists_are_not_requested_again(self):
+        self.mock_sp.artists.return_value = {"artists": [None]}
+
+        self.assertEqual(self.song_service.fetch_artist_genres(["gone"]), {"gone": []})
+        self.song_service.fetch_artist_genres(["gone"])
+
+        self.mock_sp.artists.assert_called_once()
+
+    def test_group_songs_by_genre_returns_track_uris(self):
+        genre_service = MagicMock()
+        genre_service.organize_by_broad_genre.side_effect = lambda songs: {
+            "Rock": [song.uri for song in songs]
+        }
+        liked_songs = {
+            "items": [
+                {
+                    "track": {
+                        "name": f"S{i}",
+                        "uri": f"spotify:track:{i}",
+                        "artists": [{"id": "a1"}],
+                    }
+                }
+                for i in (1, 2)
+            ]
+        }
+        self.artist_cache.set("a1", ["rock"])
+
+        genre_map = self.song_service.group_songs_by_genre(liked_songs, genre_service)
+
+        self.assertEqual(
+            genre_map, {"Rock": ["spotify:track:1", "spotify:track:2"]}
+        )
+        songs = genre_service.organize_by_broad_genre.call_args.args[0]
+        self.assertEqual([song.genres for song in songs], [("rock",), ("rock",)])
+
+    def test_iter_song_data_fetches_pages_lazily(self):
+        for i, item in enumerate(self.library):
+            item["track"].update(
+                name=f"Song {i}", artists=[{"id": f"a{i % 3}", "name": "Artist"}]
+            )
+        self.mock_sp.artists.return_value = {
+            "artists": [{"id": f"a{i}", "genres": [f"g{i}"]} for i in range(3)]
+        }
+
+        songs = self.song_service.iter_song_data(limit=50)
+        first = next(songs)
+
+        # Only the first page has been requested so far
+        self.mock_sp.current_user_saved_tracks.assert_called_once_with(
+            limit=50, offset=0
+        )
+        self.assertEqual(
+            first.to_dict(),
+            {
+                "name": "Song 0",
+                "artist": "Artist",
+                "genres": ["g0"],
+                "uri": self.library[0]["track"]["uri"],
+            },
+        )
+
+        rest = list(songs)
+        self.assertEqual(len(rest), 236)
+        self.assertEqual(self.mock_sp.current_user_saved_tracks.call_count, 5)
+        # Artists resolved on the first page are served from the cache afterwards
+        self.mock_sp.artists.assert_called_once()
+
+    def test_build_library_index_keeps_saved_order_and_genres(self):
+        for item in self.library:
+            item["track"].update(
+                name="Song", artists=[{"id": "a1", "name": "Artist"}]
+            )
+        self.mock_sp.current_user.return_value = {"id": "user123"}
+        self.mock_sp.artists.return_value = {
+            "artists": [{"id": "a1", "genres": ["rock"]}]
+        }
+
+        index = self.song_service.build_library_index()
+
+        self.assertEqual(len(index), 237)
+        self.assertEqual(index.tracks[0].id, self.library[0]["track"]["id"])
+        self.assertEqual(index.added_at[0], self.library[0]["added_at"])
+        self.assertEqual(len(index.by_genre["rock"]), 237)
+        self.assertEqual(len(index.by_artist["a1"]), 237)
+
+    def test_saved_tracks_are_slimmed_to_used_fields(self):
+        self.library[0]["track"].update(
+            name="Song", popularity=50, available_markets=["AD"], disc_number=1
+        )
+
+        items = self.song_service.fetch_liked_songs(limit=50)["items"]
+
+        self.assertEqual(len(items), 237)
+        self.assertEqual(
+            items[0]["track"],
+            {"id": "236", "uri": "spotify:track:236", "name": "Song", "artists": []},
+        )
+
+    def test_library_version_changes_with_the_library(self):
+        version = self.song_service.library_version()
+        self.mock_sp.current_user_saved_tracks.assert_called_once_with(
+            limit=1, offset=0
+        )
+        self.assertEqual(self.song_service.library_version(), version)
+
+        # Liking one song and removing another keeps the total but not the head
+        self.library = make_library(1, start=1000) + self.library[:-1]
+        self.assertNotEqual(self.song_service.library_version(), version)
+
+    def test_sync_liked_songs_incremental(self):
+        # First sync downloads the whole library
+        result = self.song_service.sync_liked_songs(user_id="user123")
+        self.assertEqual(result["items"], self.library)
+
+        # Nothing changed: a single page request is enough
+        self.mock_sp.current_user_saved_tracks.reset_mock()
+        result = self.song_service.sync_liked_songs(user_id="user123")
+        self.assertEqual(result["items"], self.library)
+        self.mock_sp.current_user_saved_tracks.assert_called_once()
+
+        # New tracks are prepended without re-downloading the library
+        self.mock_sp.current_user_saved_tracks.reset_mock()
+        self.library = make_library(3, start=1000) + self.library
+        result = self.song_service.sync_liked_songs(user_id="user123")
+        self.assertEqual(result["items"], self.library)
+        self.mock_sp.current_user_saved_tracks.assert_called_once()
+
+    def test_sync_liked_songs_detects_removals(self):
+        self.song_service.sync_liked_songs(user_id="user123")
+
+        # Removing a track changes the total, forcing a full fetch
+        del self.library[100]
+        self.mock_sp.current_user_saved_tracks.reset_mock()
+        result = self.song_service.sync_liked_songs(user_id="user123")
+
+        self.assertEqual(result["items"], self.library)
+        self.assertGreater(self.mock_sp.current_user_saved_tracks.call_count, 1)
+
+    def test_sync_liked_songs_resyncs_when_the_overlap_differs(self):
+        self.song_service.sync_liked_songs(user_id="user123")
+
+        # A stored track gives way to another one at the same added_at (a
+        # relinked or region-locked track), so the total stays at 237
+        replacement = make_library(1, start=5000)[0]
+        replacement["added_at"] = self.library[5]["added_at"]
+        self.library[5] = replacement
+        self.mock_sp.current_user_saved_tracks.reset_mock()
+        result = self.song_service.sync_liked_songs(user_id="user123")
+
+        self.assertEqual(result["items"], self.library)
+        self.assertGreater(self.mock_sp.current_user_saved_tracks.call_count, 1)
+        state = self.song_service.load_library_state("user123")
+        self.assertEqual(state["items"], self.library)
+
+    def test_sync_liked_songs_does_not_store_a_partial_fetch(self):
+        def saved_tracks(limit=50, offset=0):
+            if offset == 100:
+                raise Exception("boom")
+            return {
+                "items": self.library[offset : offset + limit],
+                "total": len(self.library),
+            }
+
+        self.mock_sp.current_user_saved_tracks.side_effect = saved_tracks
+
+        result = self.song_service.sync_liked_songs(user_id="user123")
+
+        self.assertEqual(result["items"], self.library[:100])
+        self.assertIsNone(self.song_service.load_library_state("user123"))
+
+    def test_song_data_round_trips_through_snapshot(self):
+        song_data = [
+            {"name": "S", "artist": "A", "genres": ["rock"], "uri": "spotify:track:1"}
+        ]
+
+        self.song_service.save_song_data(song_data, ["rock"])
+        loaded, all_genres = self.song_service.load_song_data()
+
+        self.assertTrue(
+            os.path.exists(os.path.join(self.tmp_dir.name, "song_data.snap"))
+        )
+        self.assertEqual([track.to_dict() for track in loaded], song_data)
+        self.assertEqual(all_genres, ["rock"])
+
+    def test_load_song_data_ignores_a_corrupt_snapshot(self):
+        with open(os.path.join(self.tmp_dir.name, "song_data.snap"), "wb") as f:
+            f.write(b"SPLS")
+
+        # No usable data, so the caller fetches the library again
+        self.assertEqual(self.song_service.load_song_data(), ([], []))
+
+    def test_load_song_data_falls_back_to_json(self):
+        song_data = [{"name": "S", "artist": "A", "genres": [], "uri": "u"}]
+        with open(os.path.join(self.tmp_dir.name, "song_data.json"), "w") as f:
+            json.dump(song_data, f)
+        with open(os.path.join(self.tmp_dir.name, "unique_genres.json"), "w") as f:
+            json.dump([], f)
+
+        loaded, all_genres = self.song_service.load_song_data()
+        self.assertEqual([track.to_dict() for track in loaded], song_data)
+        self.assertEqual(all_genres, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from app.core.token_store import FileTokenBackend, RedisTokenBackend, TokenStore
+
+
+def token(access_token, expires_in=3600):
+    return {
+        "access_token": access_token,
+        "refresh_token": "refresh",
+        "expires_at": int(time.time()) + expires_in,
+    }
+
+
+class TestTokenStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.backend = FileTokenBackend(self.tmp_dir.name)
+        self.refresh = MagicMock(return_value=token("new"))
+        self.store = TokenStore(self.backend, refresh=self.refresh, margin=300)
+
+    def test_valid_token_is_served_from_memory(self):
+        self.store.save("user", token("current"))
+        self.backend.load = MagicMock()
+
+        self.assertEqual(self.store.get_access_token("user"), "current")
+        self.backend.load.assert_not_called()
+        self.refresh.assert_not_called()
+
+    def test_token_is_loaded_from_backend(self):
+        self.backend.save("user", token("persisted"))
+
+        self.assertEqual(self.store.get_access_token("user"), "persisted")
+
+    def test_token_is_refreshed_before_expiry(self):
+        self.store.save("user", token("old", expires_in=120))
+
+        self.assertEqual(self.store.get_access_token("user"), "new")
+        self.refresh.assert_called_once_with("refresh")
+        # The refreshed token is persisted too
+        self.assertEqual(self.backend.load("user")["access_token"], "new")
+
+    def test_concurrent_refreshes_are_single_flight(self):
+        self.store.save("user", token("old", expires_in=120))
+
+        def slow_refresh(refresh_token):
+            time.sleep(0.05)
+            return token("new")
+
+        self.refresh.side_effect = slow_refresh
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.store.get_access_token("user"))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["new"] * 8)
+        self.refresh.assert_called_once()
+
+    def test_delete_removes_token(self):
+        self.store.save("user", token("current"))
+        self.store.delete("user")
+
+        self.assertIsNone(self.store.get("user"))
+        self.assertIsNone(self.backend.load("user"))
+
+
+class FakeRedis:
+    """Tiny stand-in for the redis client methods used by RedisTokenBackend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+
+class TestLoadOrCreate(unittest.TestCase):
+    def test_file_backends_share_the_first_value(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        first = FileTokenBackend(tmp_dir.name)
+        second = FileTokenBackend(tmp_dir.name)
+
+        self.assertEqual(first.load_or_create(":key", {"secret": "a"})["secret"], "a")
+        self.assertEqual(second.load_or_create(":key", {"secret": "b"})["secret"], "a")
+
+    def test_redis_backend_shares_the_first_value(self):
+        backend = RedisTokenBackend(FakeRedis())
+
+        self.assertEqual(backend.load_or_create(":key", {"secret": "a"})["secret"], "a")
+        self.assertEqual(backend.load_or_create(":key", {"secret": "b"})["secret"], "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from app.models.track import Track, intern_all
+
+
+def spotify_track(i):
+    # Build strings at runtime, like JSON decoding does, so none are shared
+    return {
+        "id": str(i),
+        "name": f"Song {i}",
+        "uri": f"spotify:track:{i}",
+        "artists": [
+            {"id": "a1", "name": " ".join(["Artist", "A"])},
+            {"id": "a2", "name": "Featured"},
+        ],
+        "album": {"name": "".join(["Al", "bum"]), "images": [{"url": "https://img/1"}]},
+        "available_markets": ["US", "GB"],
+        "preview_url": None,
+    }
+
+
+class TestTrack(unittest.TestCase):
+    def test_from_spotify_keeps_used_fields(self):
+        track = Track.from_spotify(spotify_track(1), {"a1": ("rock",)})
+
+        self.assertEqual(track.id, "1")
+        self.assertEqual(track.name, "Song 1")
+        self.assertEqual(track.artist, "Artist A")
+        self.assertEqual(track.artist_ids, ("a1", "a2"))
+        self.assertEqual(track.album, "Album")
+        self.assertEqual(track.image_url, "https://img/1")
+        self.assertEqual(track.genres, ("rock",))
+        self.assertFalse(hasattr(track, "__dict__"))
+
+    def test_repeated_strings_are_shared(self):
+        genres = {"a1": intern_all(["rock", "indie"])}
+        solo = [spotify_track(i) for i in (1, 2)]
+        for track in solo:
+            del track["artists"][1:]
+        first = Track.from_spotify(solo[0], genres)
+        second = Track.from_spotify(solo[1], genres)
+
+        self.assertIs(first.artist, second.artist)
+        self.assertIs(first.album, second.album)
+        self.assertIs(first.genres, second.genres)
+
+    def test_genres_cover_all_credited_artists(self):
+        genres = {"a1": ("rock", "indie"), "a2": ("indie", "pop")}
+
+        track = Track.from_spotify(spotify_track(1), genres)
+
+        self.assertEqual(track.genres, ("rock", "indie", "pop"))
+
+    def test_song_data_record_access(self):
+        record = {"name": "S", "artist": "A", "genres": ["pop"], "uri": "spotify:track:9"}
+        track = Track.from_record(record)
+
+        self.assertEqual(track["genres"], ("pop",))
+        self.assertEqual(track.to_dict(), record)
+        self.assertIs(Track.coerce(track), track)
+        self.assertEqual(Track.coerce(record), track)
+        with self.assertRaises(KeyError):
+            track["album"]
+
+    def test_tracks_hash_by_uri(self):
+        first = Track.from_spotify(spotify_track(1), {"a1": ["rock"]})
+        again = Track.from_spotify(spotify_track(1), {"a1": ["rock"]})
+        other = Track.from_spotify(spotify_track(2), {"a1": ["rock"]})
+
+        self.assertEqual(hash(first), hash(again))
+        self.assertEqual(len({first, again, other}), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()